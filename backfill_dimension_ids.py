@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Renseigne esi_id (migration 007) sur les pilotes, corporations, systèmes et vaisseaux créés par nom,
+via POST /universe/ids/ (noms -> identifiants ESI, par lots de 500).
+
+    python backfill_dimension_ids.py
+"""
+import logging
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from src.database import DatabaseConnection
+from src.database.dimension_cache import DIMENSIONS
+from src.services.api_client import get_client, post_url
+from src.services.eve_data_provider import ESI_BASE_URL
+from src.services.name_cache import UNKNOWN_NAME, get_name_cache
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+
+ESI_IDS_URL = f"{ESI_BASE_URL}/universe/ids/?datasource=tranquility"
+IDS_BATCH_SIZE = 500  # Limite ESI de /universe/ids/
+
+# Dimension -> (clé de la réponse /universe/ids/, type d'entité du cache de noms)
+ESI_CATEGORIES = {
+    'pilots': ('characters', 'characters'),
+    'corporations': ('corporations', 'corporations'),
+    'systems': ('systems', 'universe/systems'),
+    'ships': ('inventory_types', 'universe/types'),
+}
+
+
+def get_rows_without_esi_id(db, dimension):
+    table, id_column, name_column = DIMENSIONS[dimension]
+    db.cur.execute(f"""
+        SELECT {id_column}, {name_column} FROM {table}
+        WHERE esi_id IS NULL AND {name_column} IS NOT NULL AND {name_column} <> %s
+    """, (UNKNOWN_NAME,))
+    rows = db.cur.fetchall()
+    db.conn.commit()
+    return rows
+
+
+def resolve_ids(names, category, entity_type, headers):
+    """Retourne nom (en minuscules) -> identifiant ESI pour les noms connus d'ESI."""
+    ids = {}
+    for start in range(0, len(names), IDS_BATCH_SIZE):
+        response = post_url(ESI_IDS_URL, names[start:start + IDS_BATCH_SIZE], headers)
+        if not response:
+            logging.warning(f"/universe/ids/ n'a rien renvoyé pour {len(names[start:start + IDS_BATCH_SIZE])} noms")
+            continue
+        entries = response.get(category, [])
+        ids.update({entry['name'].lower(): entry['id'] for entry in entries})
+        get_name_cache().set_many(entity_type, {entry['id']: entry['name'] for entry in entries})
+    return ids
+
+
+def backfill_dimension(db, dimension, headers):
+    table, id_column, name_column = DIMENSIONS[dimension]
+    category, entity_type = ESI_CATEGORIES[dimension]
+    rows = get_rows_without_esi_id(db, dimension)
+    if not rows:
+        logging.info(f"{table}: rien à compléter")
+        return
+    ids = resolve_ids([row[1] for row in rows], category, entity_type, headers)
+    matches = {}
+    for row_id, name in rows:
+        esi_id = ids.get(name.lower())
+        if esi_id and esi_id not in matches:
+            matches[esi_id] = row_id
+    matches = [(row_id, esi_id) for esi_id, row_id in matches.items()]
+    try:
+        # Un identifiant déjà porté par une autre ligne (personnage renommé) est laissé de côté
+        updated = execute_values(db.cur, f"""
+            UPDATE {table} SET esi_id = v.esi_id
+            FROM (VALUES %s) AS v (row_id, esi_id)
+            WHERE {table}.{id_column} = v.row_id
+              AND NOT EXISTS (SELECT 1 FROM {table} o WHERE o.esi_id = v.esi_id)
+            RETURNING {table}.{id_column}
+        """, matches, template="(%s, %s::bigint)", page_size=1000, fetch=True) if matches else []
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        logging.error(f"Erreur lors de la mise à jour de {table}: {e}")
+        raise
+    logging.info(f"{table}: {len(updated)}/{len(rows)} lignes complétées, "
+                 f"{len(rows) - len(matches)} noms inconnus d'ESI, "
+                 f"{len(matches) - len(updated)} identifiants déjà attribués")
+
+
+def main():
+    headers = {
+        "User-Agent": "EVE Application telynor@gmail.com",
+        "Accept": "application/json"
+    }
+    with DatabaseConnection() as db:
+        for dimension in ESI_CATEGORIES:
+            backfill_dimension(db, dimension, headers)
+    get_name_cache().log_stats()
+    get_client().log_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compare killmail write throughput: per-row commits (main.py before the batch writer) vs KillmailBatchWriter.
+
+Runs against the database configured in .env, inside a throw-away schema
+(zkill_bench) holding copies of killmails / killmail_attackers, which is
+dropped at the end.
+
+    python benchmarks/bench_batch_writer.py --kills 500 --attackers 20
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import DatabaseConnection  # noqa: E402
+from src.database.batch_writer import KillmailBatchWriter  # noqa: E402
+
+BENCH_SCHEMA = "zkill_bench"
+
+
+def make_kills(count: int, attackers: int, first_id: int):
+    start = datetime(2025, 1, 1)
+    kills = []
+    for i in range(count):
+        killmail_id = first_id + i
+        killmail_data = {
+            'killmail_id': killmail_id,
+            'kill_hash': f"{killmail_id:040x}",
+            'datetime': start + timedelta(minutes=i),
+            'system_id': None,
+            'pilot_id': None,
+            'ship_id': None,
+            'value': round(random.uniform(1e6, 1e9), 2),
+            'kill_type': random.choice(('KILL', 'LOSS')),
+            'victim_corporation_id': None,
+        }
+        attacker_rows = [{
+            'pilot_id': None,
+            'pilot_name': f"Pilot {random.randint(1, 5000)}",
+            'attacker_corporation_id': None,
+            'final_blow': j == 0,
+            'damage_done': random.randint(0, 20000),
+        } for j in range(attackers)]
+        kills.append((killmail_data, attacker_rows))
+    return kills
+
+
+def setup_schema(db):
+    db.cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    db.cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    db.cur.execute(f"CREATE TABLE {BENCH_SCHEMA}.killmails (LIKE public.killmails INCLUDING ALL)")
+    # EXCLUDING DEFAULTS keeps the copy off the public serial sequence
+    db.cur.execute(f"CREATE TABLE {BENCH_SCHEMA}.killmail_attackers "
+                   f"(LIKE public.killmail_attackers INCLUDING ALL EXCLUDING DEFAULTS)")
+    db.cur.execute(f"ALTER TABLE {BENCH_SCHEMA}.killmail_attackers "
+                   f"ALTER COLUMN killmail_attacker_id ADD GENERATED BY DEFAULT AS IDENTITY")
+    db.cur.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+    db.conn.commit()
+
+
+def truncate(db):
+    db.cur.execute("TRUNCATE killmails, killmail_attackers")
+    db.conn.commit()
+
+
+def per_row(db, kills):
+    """One committed INSERT per killmail and per attacker, as main.py wrote them before the batch writer."""
+    for killmail_data, attacker_rows in kills:
+        db.cur.execute("SELECT 1 FROM killmails WHERE killmail_id = %s OR kill_hash = %s",
+                       (killmail_data['killmail_id'], killmail_data['kill_hash']))
+        db.cur.fetchone()
+        db.cur.execute("""
+            INSERT INTO killmails (killmail_id, kill_hash, kill_datetime, system_id, pilot_id, ship_id,
+                                   value, kill_type, victim_corporation_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (killmail_id, kill_datetime) DO NOTHING
+            RETURNING killmail_id
+        """, (killmail_data['killmail_id'], killmail_data['kill_hash'], killmail_data['datetime'],
+              killmail_data['system_id'], killmail_data['pilot_id'], killmail_data['ship_id'],
+              killmail_data['value'], killmail_data['kill_type'], killmail_data['victim_corporation_id']))
+        db.conn.commit()
+        for attacker_index, attacker in enumerate(attacker_rows):
+            db.cur.execute("""
+                INSERT INTO killmail_attackers (killmail_id, kill_datetime, attacker_index, pilot_id, pilot_name,
+                                                attacker_corporation_id, final_blow, damage_done)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (killmail_id, attacker_index, kill_datetime) DO NOTHING
+            """, (killmail_data['killmail_id'], killmail_data['datetime'], attacker_index, attacker['pilot_id'],
+                  attacker['pilot_name'], attacker['attacker_corporation_id'], attacker['final_blow'],
+                  attacker['damage_done']))
+            db.conn.commit()
+
+
+def batched(db, kills, flush_kills, flush_rows):
+    with KillmailBatchWriter(db, max_kills=flush_kills, max_rows=flush_rows) as writer:
+        for killmail_data, attacker_rows in kills:
+            writer.add(killmail_data, attacker_rows)
+    return writer
+
+
+def timed(label, func, rows):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {rows:>8} rows {elapsed:>8.2f}s {rows / elapsed:>10.0f} rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kills', type=int, default=500)
+    parser.add_argument('--attackers', type=int, default=20, help='Attackers per kill')
+    parser.add_argument('--flush-kills', type=int, default=50)
+    parser.add_argument('--flush-rows', type=int, default=5000)
+    parser.add_argument('--keep', action='store_true', help=f'Keep the {BENCH_SCHEMA} schema afterwards')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    kills = make_kills(args.kills, args.attackers, first_id=10 ** 12)
+    rows = args.kills * (1 + args.attackers)
+    with DatabaseConnection() as db:
+        setup_schema(db)
+        try:
+            row_time = timed("per-row commits", lambda: per_row(db, kills), rows)
+            truncate(db)
+            batch_time = timed(f"batch writer ({args.flush_kills} kills)",
+                               lambda: batched(db, kills, args.flush_kills, args.flush_rows), rows)
+            db.cur.execute("SELECT COUNT(*) FROM killmail_attackers")
+            assert db.cur.fetchone()[0] == args.kills * args.attackers
+            print(f"speed-up: x{row_time / batch_time:.1f}")
+        finally:
+            if not args.keep:
+                db.cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+                db.conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Compare row representations for large query results: DictCursor rows vs NamedTuple rows vs plain tuples.
+
+Fetches --rows rows shaped like the ranking results (PilotLosses) from a
+generate_series query, so no table is needed, then reports the memory held
+per 100k rows (tracemalloc) and the time aggregate_by_player-style code
+takes to walk them.
+
+    python benchmarks/bench_row_types.py --rows 100000
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import DictCursor  # noqa: E402
+
+from src.database import DatabaseConnection  # noqa: E402
+from src.models.rows import PilotLosses  # noqa: E402
+
+QUERY = """
+    SELECT 'Pilot ' || (i %% 5000) AS pilot_name,
+           (i %% 7) + 1 AS losses,
+           round((random() * 1e9)::numeric, 2) AS total_value,
+           round((random() * 1e8)::numeric, 2) AS average_value,
+           now() - i * INTERVAL '1 minute' AS first_loss,
+           now() AS last_loss
+    FROM generate_series(1, %s) AS i
+"""
+PILOTS = 5000
+PLAYERS = 50
+
+# Column positions of QUERY for the plain tuple variant
+PILOT_NAME, LOSSES, TOTAL_VALUE, AVERAGE_VALUE, FIRST_LOSS, LAST_LOSS = range(6)
+
+
+def fetch(db, rows, factory=None, row_type=None):
+    """Return (rows, bytes still held by them once fetched) for one row representation."""
+    gc.collect()
+    tracemalloc.start()
+    with db.conn.cursor(cursor_factory=factory) as cursor:
+        cursor.execute(QUERY, (rows,))
+        result = cursor.fetchall()
+        if row_type:
+            # Same conversion as DatabaseConnection.stream(row_type=...)
+            result = [row_type._make(row) for row in result]
+    db.conn.commit()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held
+
+
+def aggregate_dict(data, character_to_player):
+    stats = {}
+    for row in data:
+        player_id = character_to_player.get(row.get('pilot_name', '').lower())
+        if player_id:
+            player = stats.setdefault(player_id, {'losses': 0, 'value': 0.0, 'first': None})
+            player['losses'] += int(row.get('losses', 0))
+            player['value'] += float(row.get('total_value', 0))
+            if 'first_loss' in row and row['first_loss']:
+                if player['first'] is None or row['first_loss'] < player['first']:
+                    player['first'] = row['first_loss']
+    return stats
+
+
+def aggregate_namedtuple(data, character_to_player):
+    stats = {}
+    for row in data:
+        player_id = character_to_player.get(row.pilot_name.lower())
+        if player_id:
+            player = stats.setdefault(player_id, {'losses': 0, 'value': 0.0, 'first': None})
+            player['losses'] += row.losses
+            player['value'] += float(row.total_value)
+            if row.first_loss and (player['first'] is None or row.first_loss < player['first']):
+                player['first'] = row.first_loss
+    return stats
+
+
+def aggregate_tuple(data, character_to_player):
+    stats = {}
+    for row in data:
+        player_id = character_to_player.get(row[PILOT_NAME].lower())
+        if player_id:
+            player = stats.setdefault(player_id, {'losses': 0, 'value': 0.0, 'first': None})
+            player['losses'] += row[LOSSES]
+            player['value'] += float(row[TOTAL_VALUE])
+            first_loss = row[FIRST_LOSS]
+            if first_loss and (player['first'] is None or first_loss < player['first']):
+                player['first'] = first_loss
+    return stats
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5, help='Aggregation runs, the best one is kept')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    # Every 100th pilot belongs to a player, like the alts of PLAYER_DATA
+    character_to_player = {f"pilot {i}": i // 100 % PLAYERS + 1 for i in range(0, PILOTS, 100)}
+    per_100k = 100000 / args.rows
+
+    with DatabaseConnection() as db:
+        dict_rows, dict_bytes = fetch(db, args.rows, DictCursor)
+        named_rows, named_bytes = fetch(db, args.rows, row_type=PilotLosses)
+        tuple_rows, tuple_bytes = fetch(db, args.rows)
+
+    variants = [
+        ("DictCursor rows", dict_bytes, lambda: aggregate_dict(dict_rows, character_to_player)),
+        ("NamedTuple rows", named_bytes, lambda: aggregate_namedtuple(named_rows, character_to_player)),
+        ("plain tuples", tuple_bytes, lambda: aggregate_tuple(tuple_rows, character_to_player)),
+    ]
+    assert len(aggregate_dict(dict_rows, character_to_player)) == len(aggregate_tuple(tuple_rows, character_to_player))
+
+    print(f"{'representation':<18} {'MB / 100k rows':>15} {'aggregation':>12} {'rows/s':>12}")
+    for label, held, func in variants:
+        elapsed = timed(func, args.repeat)
+        print(f"{label:<18} {held * per_100k / 1e6:>15.1f} {elapsed * 1000:>10.1f}ms {args.rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Before/after EXPLAIN ANALYZE of the queries targeted by sql/migrations/004_performance_indexes.sql.
+
+"Before" plans are taken inside a transaction that drops the migration's
+indexes and is rolled back afterwards, so the database is left unchanged
+(the drop holds an exclusive lock on the tables for the duration of the
+run: do not run it while main.py is writing).
+
+    python benchmarks/explain_indexes.py --corporation "goat to go" --ship Ishtar
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import DatabaseConnection  # noqa: E402
+from src.database.migrations import MIGRATIONS_DIR  # noqa: E402
+
+INDEX_MIGRATION = os.path.join(MIGRATIONS_DIR, "004_performance_indexes.sql")
+
+# Access class of each scan node type, and the suffix of monthly / default partitions (migration 005)
+SCAN_CLASSES = {
+    'Seq Scan': 'seq',
+    'Index Scan': 'index',
+    'Index Only Scan': 'index',
+    'Bitmap Heap Scan': 'index',
+}
+PARTITION_SUFFIX = re.compile(r'_(y\d{4}m\d{2}|default)$')
+
+# Query shapes of the ranking generators, the backfill scripts and main.py
+QUERIES = {
+    'ranking_30_days': """
+        SELECT p.pilot_name, COUNT(*), SUM(k.value)
+        FROM killmails k
+        JOIN pilots p ON k.pilot_id = p.pilot_id
+        JOIN ships s ON k.ship_id = s.ship_id
+        JOIN corporations c ON k.victim_corporation_id = c.corporation_id
+        WHERE LOWER(c.corporation_name) = %(corporation)s
+          AND s.ship_name = %(ship)s
+          AND k.kill_datetime >= CURRENT_DATE - INTERVAL '30 days'
+        GROUP BY p.pilot_name
+    """,
+    'ranking_by_month': """
+        SELECT TO_CHAR(k.kill_datetime, 'YYYY-MM'), p.pilot_name, COUNT(*), SUM(k.value)
+        FROM killmails k
+        JOIN pilots p ON k.pilot_id = p.pilot_id
+        JOIN ships s ON k.ship_id = s.ship_id
+        JOIN corporations c ON k.victim_corporation_id = c.corporation_id
+        WHERE LOWER(c.corporation_name) = %(corporation)s
+          AND s.ship_name = %(ship)s
+          AND k.kill_datetime >= CURRENT_DATE - INTERVAL '12 months'
+        GROUP BY 1, 2
+    """,
+    'killmails_without_attackers': """
+        SELECT k.killmail_id, k.kill_hash
+        FROM killmails k
+        WHERE NOT EXISTS (SELECT 1 FROM killmail_attackers ka WHERE ka.killmail_id = k.killmail_id)
+    """,
+    'killmails_without_corporation': """
+        SELECT killmail_id, kill_hash FROM killmails WHERE victim_corporation_id IS NULL
+    """,
+    'attackers_of_killmail': """
+        SELECT * FROM killmail_attackers
+        WHERE killmail_id = (SELECT killmail_id FROM killmails ORDER BY kill_datetime DESC LIMIT 1)
+    """,
+    'newest_kill': """
+        SELECT kill_datetime FROM killmails ORDER BY kill_datetime DESC LIMIT 1
+    """,
+}
+
+
+def migration_indexes():
+    with open(INDEX_MIGRATION, encoding='utf-8') as f:
+        return re.findall(r'CREATE INDEX IF NOT EXISTS (\w+)', f.read())
+
+
+def index_names(node):
+    names = [node['Index Name']] if 'Index Name' in node else []
+    for child in node.get('Plans', []):
+        names.extend(index_names(child))
+    return names
+
+
+def scan_classes(node, classes=None):
+    """Return table -> 'index' or 'seq' for every table a plan reads (partitions count as their table)."""
+    classes = {} if classes is None else classes
+    if 'Relation Name' in node and node['Node Type'] in SCAN_CLASSES:
+        table = PARTITION_SUFFIX.sub('', node['Relation Name'])
+        # One sequentially scanned partition makes the whole table 'seq'
+        if classes.get(table) != 'seq':
+            classes[table] = SCAN_CLASSES[node['Node Type']]
+    for child in node.get('Plans', []):
+        scan_classes(child, classes)
+    return classes
+
+
+def explain(db, query, params):
+    db.cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+    plan = db.cur.fetchone()[0]
+    plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+    root = plan['Plan']
+    return {
+        'ms': plan['Execution Time'],
+        'buffers': root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+        'node': root['Node Type'],
+        'indexes': sorted(set(index_names(root))),
+        'scans': scan_classes(root),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corporation', default='goat to go', help='Lower-cased victim corporation name')
+    parser.add_argument('--ship', default='Ishtar')
+    args = parser.parse_args()
+    params = {'corporation': args.corporation.lower(), 'ship': args.ship}
+
+    with DatabaseConnection() as db:
+        indexes = migration_indexes()
+        try:
+            for index in indexes:
+                db.cur.execute(f"DROP INDEX IF EXISTS {index}")
+            before = {label: explain(db, query, params) for label, query in QUERIES.items()}
+        finally:
+            db.conn.rollback()
+        after = {label: explain(db, query, params) for label, query in QUERIES.items()}
+        db.conn.rollback()
+
+    print(f"{'query':<32} {'before ms':>10} {'after ms':>10} {'buffers':>17}  indexes after")
+    for label in QUERIES:
+        b, a = before[label], after[label]
+        print(f"{label:<32} {b['ms']:>10.2f} {a['ms']:>10.2f} {b['buffers']:>8}->{a['buffers']:<8} "
+              f"{', '.join(a['indexes']) or a['node']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression suite: EXPLAIN (ANALYZE, BUFFERS) of every registered report, ranking and backfill query.
+
+The SQL is taken from the code itself (RankingRepository, KillmailRepository,
+the ranking generators) by handing them a connection that records the
+statements instead of running them, so any edit to a query is measured.
+For each query the suite compares with benchmarks/baselines/query_plans.json:
+
+- plan class: how each table is read ('index' or 'seq'); any change fails,
+- timing: median of --runs executions; slower than --threshold times the
+  baseline (and by more than --min-delta-ms) fails.
+
+Baselines only make sense on the dataset they were taken on: generate it
+with tools/generate_synthetic_data.py (same --seed and --kills), then
+
+    python benchmarks/plan_regression.py --update   # record the baselines
+    python benchmarks/plan_regression.py            # compare, exit 1 on regression
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ishtar_ranking_generator  # noqa: E402
+from benchmarks.explain_indexes import explain  # noqa: E402
+from src.database import DatabaseConnection  # noqa: E402
+from src.database.connection import DEFAULT_PAGE_SIZE  # noqa: E402
+from src.database.repositories import KillmailRepository, RankingRepository  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "query_plans.json")
+DEDUP_SAMPLE = 200
+
+
+class RecordingConnection:
+    """Stands in for DatabaseConnection: records the statements a repository would run."""
+
+    def __init__(self):
+        self.statements = []
+        self.cur = SimpleNamespace(execute=lambda query, params=None: self.statements.append((query, params)),
+                                   fetchall=lambda: [], fetchone=lambda: None)
+
+    def stream(self, query, params=None, itersize=None, row_type=None):
+        self.statements.append((query, params))
+        return iter(())
+
+    def iter_keyset(self, query, key, params=None, page_size=None, after=0, row_type=None):
+        self.statements.append((query, {**(params or {}), 'after': after, 'limit': page_size or DEFAULT_PAGE_SIZE}))
+        return iter(())
+
+    def execute_query(self, query, params=None):
+        self.statements.append((query, params))
+        return []
+
+    def execute_prepared(self, name, query, params=None):
+        # $1, $2, ... become named psycopg2 placeholders so the statement can be EXPLAINed as is
+        self.statements.append((re.sub(r'\$(\d+)', r'%(p\1)s', query),
+                                {f"p{i}": value for i, value in enumerate(params or (), start=1)}))
+
+
+def dedup_page(db):
+    """A zKillboard-sized page for filter_new_killmails: half stored kills, half new ones."""
+    db.cur.execute("SELECT killmail_id, kill_hash FROM killmails ORDER BY killmail_id DESC LIMIT %s",
+                   (DEDUP_SAMPLE // 2,))
+    stored = [(row[0], row[1]) for row in db.cur.fetchall()]
+    db.conn.commit()
+    return stored + [(killmail_id + 10 ** 9, f"{killmail_id:040x}") for killmail_id, _ in stored]
+
+
+def ranked_targets(db):
+    """The Ishtar ranking targets, resolved to row ids once on the live connection."""
+    if not hasattr(ranked_targets, 'repository'):
+        ranked_targets.repository = RankingRepository.for_targets(
+            db, ishtar_ranking_generator.DEFAULT_CORPORATION, ishtar_ranking_generator.DEFAULT_SHIPS)
+    return ranked_targets.repository
+
+
+def ranking(rec, db):
+    targets = ranked_targets(db)
+    return RankingRepository(rec, targets.corporation_ids, targets.ship_ids)
+
+
+# Query name -> function(recording connection, live connection) calling the code that issues the query
+REGISTERED_QUERIES = {
+    'ranking_30_days': lambda rec, db: ishtar_ranking_generator.get_ishtar_losses_30_days(ranking(rec, db)),
+    'ranking_all_time': lambda rec, db: ishtar_ranking_generator.get_ishtar_losses_all_time(ranking(rec, db)),
+    'ranking_by_month': lambda rec, db: ishtar_ranking_generator.get_ishtar_losses_by_month(ranking(rec, db)),
+    'ranking_recent_losses': lambda rec, db: ishtar_ranking_generator.get_recent_losses_details(ranking(rec, db)),
+    'page_dedup': lambda rec, db: KillmailRepository(rec).filter_new_killmails(dedup_page(db)),
+    'backfill_attackers_page': lambda rec, db: KillmailRepository(rec).iter_killmails_without_attackers(),
+    'backfill_corporations_page': lambda rec, db: KillmailRepository(rec).iter_killmails_without_corporation(),
+}
+
+
+def registered_statements(db):
+    """Return query name -> (sql, params) as issued by the code."""
+    statements = {}
+    for name, issue in REGISTERED_QUERIES.items():
+        recorder = RecordingConnection()
+        issue(recorder, db)
+        statements[name] = recorder.statements[0]
+    return statements
+
+
+def dataset_fingerprint(db):
+    db.cur.execute("SELECT (SELECT COUNT(*) FROM killmails), (SELECT COUNT(*) FROM killmail_attackers)")
+    killmails, attackers = db.cur.fetchone()
+    db.conn.commit()
+    return {'killmails': killmails, 'attackers': attackers}
+
+
+def measure(db, query, params, runs):
+    results = []
+    for _ in range(runs):
+        try:
+            results.append(explain(db, query, params))
+        finally:
+            db.conn.rollback()
+    last = results[-1]
+    return {
+        'ms': round(statistics.median(result['ms'] for result in results), 3),
+        'buffers': last['buffers'],
+        'node': last['node'],
+        'scans': last['scans'],
+        'indexes': last['indexes'],
+    }
+
+
+def compare(name, current, baseline, args):
+    """Return the failure messages of one query."""
+    if baseline is None:
+        return [f"{name}: no baseline, run with --update"]
+    failures = []
+    if current['scans'] != baseline['scans']:
+        changed = sorted(set(current['scans']) | set(baseline['scans']))
+        failures.append(f"{name}: plan class changed: " + ", ".join(
+            f"{table} {baseline['scans'].get(table, '-')}->{current['scans'].get(table, '-')}"
+            for table in changed if current['scans'].get(table) != baseline['scans'].get(table)))
+    if (current['ms'] > baseline['ms'] * args.threshold
+            and current['ms'] - baseline['ms'] > args.min_delta_ms):
+        failures.append(f"{name}: {current['ms']:.1f} ms vs {baseline['ms']:.1f} ms baseline "
+                        f"(x{current['ms'] / baseline['ms'] if baseline['ms'] else float('inf'):.1f})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update', action='store_true', help='Record the current plans as baselines')
+    parser.add_argument('--runs', type=int, default=3, help='Executions per query, the median time is kept')
+    parser.add_argument('--threshold', type=float, default=1.5, help='Allowed slowdown ratio')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Slowdowns below this are noise')
+    parser.add_argument('--only', nargs='*', help='Query names to run (default: all)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    with DatabaseConnection() as db:
+        fingerprint = dataset_fingerprint(db)
+        if not args.update and baselines.get('dataset') not in (None, fingerprint):
+            print(f"Dataset {fingerprint} differs from the baseline one {baselines['dataset']}: "
+                  f"regenerate it with tools/generate_synthetic_data.py or re-record with --update")
+            sys.exit(2)
+        statements = registered_statements(db)
+        names = args.only or list(statements)
+        current = {name: measure(db, *statements[name], args.runs) for name in names}
+
+    failures = []
+    print(f"{'query':<28} {'ms':>9} {'baseline':>9} {'buffers':>9}  plan class")
+    for name in names:
+        result, baseline = current[name], baselines.get('queries', {}).get(name)
+        print(f"{name:<28} {result['ms']:>9.1f} {baseline['ms'] if baseline else float('nan'):>9.1f} "
+              f"{result['buffers']:>9}  " + ", ".join(f"{table}:{scan}" for table, scan in sorted(result['scans'].items())))
+        if not args.update:
+            failures.extend(compare(name, result, baseline, args))
+
+    if args.update:
+        baselines = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'dataset': fingerprint,
+            'queries': {**baselines.get('queries', {}), **current},
+        }
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baselines written to {args.baseline}")
+        return
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
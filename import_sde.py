@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Import the EVE static data export (Fuzzwork CSV dumps) into the sde_* lookup tables,
+then bulk-load ship_types / ships from it.
+
+Expected files in --sde-dir, plain or bz2-compressed:
+invTypes.csv, invGroups.csv, invCategories.csv,
+mapSolarSystems.csv, mapConstellations.csv, mapRegions.csv
+"""
+
+import argparse
+import bz2
+import csv
+import logging
+import os
+
+from psycopg2.extras import execute_values
+
+from src.database import DatabaseConnection
+from src.database.migrations import MigrationRunner
+from src.services.static_data import VICTIM_CATEGORIES
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+def open_csv(sde_dir, name):
+    """Yield the rows of name or name.bz2 in sde_dir as dictionaries."""
+    path = os.path.join(sde_dir, name)
+    if os.path.exists(path):
+        handle = open(path, newline='', encoding='utf-8')
+    elif os.path.exists(path + '.bz2'):
+        handle = bz2.open(path + '.bz2', 'rt', newline='', encoding='utf-8')
+    else:
+        raise FileNotFoundError(f"{name} (or {name}.bz2) not found in {sde_dir}")
+    with handle:
+        yield from csv.DictReader(handle)
+
+
+def is_true(value):
+    return value in ('1', 'True', 'true')
+
+
+def read_types(sde_dir):
+    categories = {int(row['categoryID']): row['categoryName'] for row in open_csv(sde_dir, 'invCategories.csv')}
+    groups = {
+        int(row['groupID']): (row['groupName'], int(row['categoryID']))
+        for row in open_csv(sde_dir, 'invGroups.csv')
+    }
+    types = []
+    for row in open_csv(sde_dir, 'invTypes.csv'):
+        group_id = int(row['groupID'])
+        group_name, category_id = groups.get(group_id, ('Unknown', 0))
+        types.append((
+            int(row['typeID']), row['typeName'], group_id, group_name,
+            category_id, categories.get(category_id, 'Unknown'), is_true(row.get('published'))
+        ))
+    return types
+
+
+def read_systems(sde_dir):
+    regions = {int(row['regionID']): row['regionName'] for row in open_csv(sde_dir, 'mapRegions.csv')}
+    constellations = {
+        int(row['constellationID']): row['constellationName']
+        for row in open_csv(sde_dir, 'mapConstellations.csv')
+    }
+    systems = []
+    for row in open_csv(sde_dir, 'mapSolarSystems.csv'):
+        constellation_id = int(row['constellationID'])
+        region_id = int(row['regionID'])
+        security = row.get('security')
+        systems.append((
+            int(row['solarSystemID']), row['solarSystemName'],
+            constellation_id, constellations.get(constellation_id, 'Unknown'),
+            region_id, regions.get(region_id, 'Unknown'),
+            round(float(security), 4) if security not in (None, '', 'None') else None
+        ))
+    return systems
+
+
+def replace_table(cur, table, columns, rows):
+    """Replace the whole content of an SDE table in the current transaction."""
+    cur.execute(f"TRUNCATE {table}")
+    execute_values(cur, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s", rows, page_size=1000)
+    logging.info(f"{len(rows)} rows loaded into {table}")
+
+
+def bulk_load_ships(cur, categories):
+    """Create every ship class and hull (keyed by type id) of the given SDE categories."""
+    cur.execute("""
+        INSERT INTO ship_types (type_name)
+        SELECT DISTINCT group_name FROM sde_types WHERE category_id = ANY(%s)
+        ON CONFLICT (type_name) DO NOTHING
+    """, (list(categories),))
+    logging.info(f"{cur.rowcount} ship types created")
+
+    # Ships created by name before the import get their type id, so they keep their killmails
+    cur.execute("""
+        UPDATE ships s
+        SET esi_id = t.type_id
+        FROM (
+            SELECT type_name, MIN(type_id) AS type_id
+            FROM sde_types
+            WHERE category_id = ANY(%s)
+            GROUP BY type_name
+            HAVING COUNT(*) = 1
+        ) t
+        WHERE s.ship_name = t.type_name AND s.esi_id IS NULL
+          AND NOT EXISTS (SELECT 1 FROM ships o WHERE o.esi_id = t.type_id)
+    """, (list(categories),))
+    logging.info(f"{cur.rowcount} existing ships matched with their type id")
+
+    cur.execute("""
+        INSERT INTO ships (esi_id, ship_name, ship_type_id)
+        SELECT t.type_id, t.type_name, st.ship_type_id
+        FROM sde_types t
+        JOIN ship_types st ON st.type_name = t.group_name
+        WHERE t.category_id = ANY(%s)
+        ON CONFLICT (esi_id) DO UPDATE SET ship_name = EXCLUDED.ship_name, ship_type_id = EXCLUDED.ship_type_id
+    """, (list(categories),))
+    logging.info(f"{cur.rowcount} ships created or updated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the EVE static data export into the database")
+    parser.add_argument('--sde-dir', default='sde', help='Directory containing the Fuzzwork CSV dumps')
+    parser.add_argument('--skip-ships', action='store_true', help='Do not bulk-load ship_types / ships')
+    args = parser.parse_args()
+
+    types = read_types(args.sde_dir)
+    systems = read_systems(args.sde_dir)
+
+    with DatabaseConnection() as db:
+        MigrationRunner(db).migrate()
+        try:
+            replace_table(db.cur, 'sde_types',
+                          ['type_id', 'type_name', 'group_id', 'group_name', 'category_id', 'category_name', 'published'],
+                          types)
+            replace_table(db.cur, 'sde_solar_systems',
+                          ['system_id', 'system_name', 'constellation_id', 'constellation_name',
+                           'region_id', 'region_name', 'security_status'],
+                          systems)
+            if not args.skip_ships:
+                bulk_load_ships(db.cur, VICTIM_CATEGORIES)
+            db.conn.commit()
+            logging.info("SDE import completed")
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"SDE import failed: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    main()
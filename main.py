@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
-import requests
+import argparse
+import asyncio
+import signal
 import json
 import time
 from datetime import datetime, timedelta
-import psycopg2
-from psycopg2 import extras
 import logging
 from typing import Optional, List, Dict
 import os
 from dotenv import load_dotenv
+from src.database import DatabaseConnection as PooledConnection
+from src.database.batch_writer import KillmailBatchWriter
+from src.database.dimension_cache import DimensionCache
+from src.database.known_killmails import KnownKillmails
+from src.database.partitions import ensure_partitions
+from src.database.repositories import TrackerRepository
+from src.services.api_client import get_client, get_url
+from src.services.eve_data_provider import cached_names, get_killmail, known_ship_type
+from src.services.killmail_archive import get_killmail_archive
+from src.services.name_cache import PENDING_NAME, UNKNOWN_NAME, get_name_cache
+from src.services.name_resolver import NameResolver
+from src.services.redisq_listener import DEFAULT_REDISQ_URL, RedisQListener
+from src.services.static_data import load_static_data
 
 load_dotenv()
 
@@ -26,254 +39,60 @@ logging.basicConfig(
 )
 logging.info(f"Script started. Logging to {log_filename}")
 
-class DatabaseConnection:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=os.getenv('DB_NAME'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT')
-        )
-        self.cur = self.conn.cursor(cursor_factory=extras.DictCursor)
-        logging.info("Database connection established successfully")
-
-    def __enter__(self):
-        return self
+class DatabaseConnection(PooledConnection):
+    def connect(self):
+        super().connect()
+        self.dimensions = DimensionCache(self).load()
+        self.known_killmails = KnownKillmails(self).load()
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.cur.close()
-        self.conn.close()
-        logging.info("Database connection closed")
+    def disconnect(self):
+        self.dimensions.log_stats()
+        self.known_killmails.save()
+        self.known_killmails.log_stats()
+        super().disconnect()
 
     def get_or_create_system(self, system_name):
-        try:
-            self.cur.execute("""
-                INSERT INTO systems (system_name)
-                VALUES (%s)
-                ON CONFLICT (system_name) DO UPDATE SET system_name = EXCLUDED.system_name
-                RETURNING system_id;
-            """, (system_name,))
-            self.conn.commit()
-            return self.cur.fetchone()[0]
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error in get_or_create_system: {e}")
-            raise
+        return self.dimensions.get_or_create('systems', system_name)
 
     def get_or_create_ship_type(self, type_name):
-        try:
-            self.cur.execute("""
-                INSERT INTO ship_types (type_name)
-                VALUES (%s)
-                ON CONFLICT (type_name) DO UPDATE SET type_name = EXCLUDED.type_name
-                RETURNING ship_type_id;
-            """, (type_name,))
-            self.conn.commit()
-            return self.cur.fetchone()[0]
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error in get_or_create_ship_type: {e}")
-            raise
+        return self.dimensions.get_or_create('ship_types', type_name)
 
     def get_or_create_ship(self, ship_name, ship_type_id):
-        try:
-            self.cur.execute("""
-                INSERT INTO ships (ship_name, ship_type_id)
-                VALUES (%s, %s)
-                ON CONFLICT (ship_name) DO UPDATE SET ship_type_id = EXCLUDED.ship_type_id
-                RETURNING ship_id;
-            """, (ship_name, ship_type_id))
-            self.conn.commit()
-            return self.cur.fetchone()[0]
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error in get_or_create_ship: {e}")
-            raise
+        return self.dimensions.get_or_create('ships', ship_name, ship_type_id)
 
     def get_or_create_pilot(self, pilot_name):
-        try:
-            self.cur.execute("""
-                INSERT INTO pilots (pilot_name)
-                VALUES (%s)
-                ON CONFLICT (pilot_name) DO UPDATE SET pilot_name = EXCLUDED.pilot_name
-                RETURNING pilot_id;
-            """, (pilot_name,))
-            self.conn.commit()
-            return self.cur.fetchone()[0]
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error in get_or_create_pilot: {e}")
-            raise
+        return self.dimensions.get_or_create('pilots', pilot_name)
 
     def get_or_create_corporation(self, corp_name):
-        try:
-            self.cur.execute("""
-                INSERT INTO corporations (corporation_name)
-                VALUES (%s)
-                ON CONFLICT (corporation_name) DO UPDATE SET corporation_name = EXCLUDED.corporation_name
-                RETURNING corporation_id;
-            """, (corp_name,))
-            self.conn.commit()
-            return self.cur.fetchone()[0]
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error in get_or_create_corporation: {e}")
-            raise
+        return self.dimensions.get_or_create('corporations', corp_name)
 
-    def kill_exists(self, killmail_id, kill_hash):
+    def kill_exists(self, killmail_id, kill_hash, kill_datetime=None):
+        # Absent from the filter: definitely not stored, no query needed
+        if killmail_id not in self.known_killmails:
+            self.known_killmails.definitely_new += 1
+            return False
         try:
-            self.cur.execute("""
-                SELECT 1 FROM killmails 
-                WHERE killmail_id = %s OR kill_hash = %s
-            """, (killmail_id, kill_hash))
+            if kill_datetime is None:
+                self.execute_prepared("kill_exists", """
+                    SELECT 1 FROM killmails WHERE killmail_id = $1
+                    UNION ALL
+                    SELECT 1 FROM killmails WHERE kill_hash = $2
+                    LIMIT 1
+                """, (killmail_id, kill_hash))
+            else:
+                # A known kill time prunes both lookups to the partition of its month
+                self.execute_prepared("kill_exists_at", """
+                    SELECT 1 FROM killmails WHERE killmail_id = $1 AND kill_datetime = $3
+                    UNION ALL
+                    SELECT 1 FROM killmails WHERE kill_hash = $2 AND kill_datetime = $3
+                    LIMIT 1
+                """, (killmail_id, kill_hash, kill_datetime))
             return self.cur.fetchone() is not None
         except Exception as e:
             self.conn.rollback()
             logging.error(f"Error checking kill existence: {e}")
             raise
 
-    def insert_killmail(self, killmail_data):
-        try:
-            if self.kill_exists(killmail_data['killmail_id'], killmail_data['kill_hash']):
-                logging.info(f"Kill {killmail_data['killmail_id']} already in database, skipping")
-                return None
-
-            self.cur.execute("""
-                INSERT INTO killmails (
-                    killmail_id, kill_hash, kill_datetime, system_id, 
-                    pilot_id, ship_id, value, kill_type, victim_corporation_id
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (killmail_id) DO NOTHING
-                RETURNING killmail_id;
-            """, (
-                killmail_data['killmail_id'],
-                killmail_data['kill_hash'],
-                killmail_data['datetime'],
-                killmail_data['system_id'],
-                killmail_data['pilot_id'],
-                killmail_data['ship_id'],
-                killmail_data['value'],
-                killmail_data['kill_type'],
-                killmail_data['victim_corporation_id']
-            ))
-            self.conn.commit()
-            result = self.cur.fetchone()
-            if result:
-                logging.info(f"Successfully inserted killmail {killmail_data['killmail_id']}")
-                return result
-            return None  # No insertion due to conflict
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error inserting killmail: {e}")
-            raise
-
-    def insert_killmail_attacker(self, killmail_id, pilot_id, pilot_name, attacker_corporation_id, final_blow, damage_done):
-        try:
-            self.cur.execute("""
-                INSERT INTO killmail_attackers (
-                    killmail_id, pilot_id, pilot_name, attacker_corporation_id, final_blow, damage_done
-                )
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (killmail_id, pilot_id, pilot_name, attacker_corporation_id, final_blow, damage_done))
-            self.conn.commit()
-            logging.info(f"Successfully inserted attacker '{pilot_name}' for killmail {killmail_id}")
-        except Exception as e:
-            self.conn.rollback()
-            logging.error(f"Error inserting killmail attacker for killmail {killmail_id}: {e}")
-            raise
-
-def get_url(url: str, headers: dict, max_retries: int = 3, timeout: int = 30) -> Optional[dict]:
-    for attempt in range(max_retries):
-        try:
-            logging.debug(f"Attempting request to {url} (attempt {attempt + 1}/{max_retries})")
-            response = requests.get(url, headers=headers, timeout=timeout)
-
-            # Get ESI limits
-            esi_remain = int(response.headers.get('X-Esi-Error-Limit-Remain', 100))
-            esi_reset = int(response.headers.get('X-Esi-Error-Limit-Reset', 0))
-
-            if esi_remain < 20:  # Safety threshold
-                wait_time = min(esi_reset + 1, 30)
-                logging.warning(f"ESI error limit low ({esi_remain}), waiting {wait_time} seconds")
-                time.sleep(wait_time)
-
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:
-                wait_time = int(response.headers.get('Retry-After', 60))
-                wait_time = min(wait_time, 300)
-                logging.warning(f"Rate limited on URL: {url}")
-                logging.warning(f"Response headers: {dict(response.headers)}")
-                logging.warning(f"Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            elif response.status_code == 404:
-                logging.warning(f"Resource not found at URL: {url}")
-                logging.warning(f"Response status: {response.status_code}")
-                logging.warning(f"Response headers: {dict(response.headers)}")
-                logging.warning(f"Response content: {response.text[:500]}")
-                return None
-            else:
-                logging.error(f"API request failed for URL: {url}")
-                logging.error(f"Response status: {response.status_code}")
-                logging.error(f"Response headers: {dict(response.headers)}")
-                logging.error(f"Response content: {response.text[:500]}")
-                if attempt < max_retries - 1:
-                    wait_time = 5 * (attempt + 1)
-                    logging.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                return None
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Request failed for URL: {url}")
-            logging.error(f"Exception type: {type(e).__name__}")
-            logging.error(f"Exception details: {str(e)}")
-            if attempt < max_retries - 1:
-                wait_time = 5 * (attempt + 1)
-                logging.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            return None
-        except Exception as e:
-            logging.error(f"Unexpected error for URL: {url}")
-            logging.error(f"Exception type: {type(e).__name__}")
-            logging.error(f"Exception details: {str(e)}")
-            if attempt < max_retries - 1:
-                wait_time = 5 * (attempt + 1)
-                logging.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            return None
-
-    logging.error(f"All {max_retries} attempts failed for URL: {url}")
-    return None
-
-def get_entity_info(entity_id, entity_type, headers):
-    if not entity_id:
-        return "Unknown"
-    try:
-        url = f"https://esi.evetech.net/latest/{entity_type}/{entity_id}/?datasource=tranquility"
-        response = get_url(url, headers)
-        return response.get('name', 'Unknown') if response else "Unknown"
-    except:
-        return "Unknown"
-
-def get_ship_type(ship_type_id, headers):
-    try:
-        url = f"https://esi.evetech.net/latest/universe/types/{ship_type_id}/?datasource=tranquility"
-        response = get_url(url, headers)
-        group_id = response.get('group_id') if response else None
-
-        if group_id:
-            group_url = f"https://esi.evetech.net/latest/universe/groups/{group_id}/?datasource=tranquility"
-            group_response = get_url(group_url, headers)
-            return group_response.get('name', 'Unknown') if group_response else "Unknown"
-        return "Unknown"
-    except:
-        return "Unknown"
-
 def get_latest_killmail_date(db: DatabaseConnection) -> datetime:
     try:
         db.cur.execute("""
@@ -308,7 +127,44 @@ def get_all_kills_for_page(corporation_id: str, page: int, headers: dict) -> Opt
         logging.warning(f"No response received from zKillboard for page {page}")
         return None
 
-def process_single_kill(kill, kill_detail, corporation_id, db: DatabaseConnection, headers: dict):
+def prefetch_dimensions(db: DatabaseConnection, kill_details: List[Dict], names: Dict[int, str]):
+    # Crée ou renomme en une requête par table les systèmes, vaisseaux, pilotes et corporations de la page,
+    # clés par identifiant ESI ; un nom inconnu laisse la ligne sans nom (complétée par resolve_names.py)
+    systems, ships, ship_classes, pilots, corporations = {}, {}, {}, {}, {}
+    try:
+        for kill_detail in kill_details:
+            victim = kill_detail['victim']
+            systems[kill_detail['solar_system_id']] = names.get(kill_detail['solar_system_id'])
+            ships[victim['ship_type_id']] = names.get(victim['ship_type_id'])
+            ship_classes[victim['ship_type_id']] = known_ship_type(victim['ship_type_id'])
+            for character_id, corporation_id in [(victim.get('character_id'), victim.get('corporation_id'))] + [
+                    (attacker.get('character_id'), attacker.get('corporation_id'))
+                    for attacker in kill_detail.get('attackers', [])]:
+                if character_id:
+                    pilots[character_id] = names.get(character_id)
+                if corporation_id:
+                    corporations[corporation_id] = names.get(corporation_id)
+
+        db.dimensions.ensure('ship_types', [type_name for type_name in ship_classes.values() if type_name])
+        db.dimensions.ensure_esi('systems', systems)
+        db.dimensions.ensure_esi('ships', ships, {
+            type_id: db.dimensions.ids['ship_types'][type_name] for type_id, type_name in ship_classes.items()
+            if type_name
+        })
+        db.dimensions.ensure_esi('pilots', pilots)
+        db.dimensions.ensure_esi('corporations', corporations)
+    except Exception as e:
+        # Les kills restent traités, avec une création par ligne
+        logging.warning(f"Dimension prefetch failed: {e}")
+
+def process_single_kill(kill, kill_detail, corporation_id, db: DatabaseConnection, headers: dict,
+                        names: Optional[Dict[int, str]] = None, writer: Optional[KillmailBatchWriter] = None):
+    # Sans writer, le kill est écrit immédiatement (une transaction)
+    flush_now = writer is None
+    writer = writer or KillmailBatchWriter(db, known=db.known_killmails)
+    # Aucun appel HTTP : les noms inconnus sont laissés à resolve_names.py
+    if names is None:
+        names = cached_names([kill_detail])
     try:
         kill_date = datetime.strptime(kill_detail['killmail_time'], "%Y-%m-%dT%H:%M:%SZ")
         logging.info(f"Processing kill {kill['killmail_id']} from {kill_date}")
@@ -321,21 +177,15 @@ def process_single_kill(kill, kill_detail, corporation_id, db: DatabaseConnectio
         # Compare as string because API corporation_id and the provided corporation_id might differ in type
         is_kill = 'KILL' if str(victim_corp_raw) != corporation_id else 'LOSS'
 
-        # Get and insert reference data
-        system_name = get_entity_info(system_id, 'universe/systems', headers)
-        system_db_id = db.get_or_create_system(system_name)
-
-        ship_name = get_entity_info(ship_type_id, 'universe/types', headers)
-        ship_type_name = get_ship_type(ship_type_id, headers)
-        ship_type_db_id = db.get_or_create_ship_type(ship_type_name)
-        ship_db_id = db.get_or_create_ship(ship_name, ship_type_db_id)
+        # Reference data is keyed by ESI id: no HTTP call is needed to store the kill
+        system_db_id = db.dimensions.get_by_esi_id('systems', system_id, names.get(system_id))
 
-        victim_name = get_entity_info(victim_id, 'characters', headers) if victim_id else "Unknown"
-        pilot_db_id = db.get_or_create_pilot(victim_name)
+        ship_type_name = known_ship_type(ship_type_id)
+        ship_type_db_id = db.get_or_create_ship_type(ship_type_name) if ship_type_name else None
+        ship_db_id = db.dimensions.get_by_esi_id('ships', ship_type_id, names.get(ship_type_id), ship_type_db_id)
 
-        # Retrieve and insert the victim corporation
-        victim_corp_name = get_entity_info(victim_corp_raw, 'corporations', headers) if victim_corp_raw else "Unknown"
-        victim_corp_db_id = db.get_or_create_corporation(victim_corp_name)
+        pilot_db_id = db.dimensions.get_by_esi_id('pilots', victim_id, names.get(victim_id))
+        victim_corp_db_id = db.dimensions.get_by_esi_id('corporations', victim_corp_raw, names.get(victim_corp_raw))
 
         # Insert killmail with victim's corporation
         killmail_data = {
@@ -350,43 +200,27 @@ def process_single_kill(kill, kill_detail, corporation_id, db: DatabaseConnectio
             'victim_corporation_id': victim_corp_db_id
         }
 
-        result = db.insert_killmail(killmail_data)
-        if not result:
-            logging.info(f"Killmail {kill['killmail_id']} already exists, skipping attackers processing")
-            return False
-
         # Process attackers for this killmail
-        attackers = kill_detail.get('attackers', [])
-        for attacker in attackers:
+        attacker_rows = []
+        for attacker in kill_detail.get('attackers', []):
             attacker_character_id = attacker.get('character_id')
-            if attacker_character_id:
-                attacker_name = get_entity_info(attacker_character_id, 'characters', headers)
-                attacker_pilot_id = db.get_or_create_pilot(attacker_name)
-            else:
-                attacker_name = "Unknown"
-                attacker_pilot_id = None
-
             attacker_corp_raw = attacker.get('corporation_id')
-            if attacker_corp_raw:
-                attacker_corp_name = get_entity_info(attacker_corp_raw, 'corporations', headers)
-            else:
-                attacker_corp_name = "Unknown"
-            attacker_corp_db_id = db.get_or_create_corporation(attacker_corp_name)
-
-            final_blow = attacker.get('final_blow', False)
-            damage_done = attacker.get('damage_done', 0)
-
-            db.insert_killmail_attacker(
-                killmail_id=kill['killmail_id'],
-                pilot_id=attacker_pilot_id,
-                pilot_name=attacker_name,
-                attacker_corporation_id=attacker_corp_db_id,
-                final_blow=final_blow,
-                damage_done=damage_done
-            )
-            time.sleep(0.5)  # Small pause to respect API limits
-
-        logging.info(f"Successfully processed killmail {kill['killmail_id']}")
+            attacker_rows.append({
+                'pilot_id': db.dimensions.get_by_esi_id('pilots', attacker_character_id,
+                                                        names.get(attacker_character_id)),
+                'pilot_name': names.get(attacker_character_id) or PENDING_NAME if attacker_character_id else UNKNOWN_NAME,
+                'attacker_corporation_id': db.dimensions.get_by_esi_id('corporations', attacker_corp_raw,
+                                                                       names.get(attacker_corp_raw)),
+                'final_blow': attacker.get('final_blow', False),
+                'damage_done': attacker.get('damage_done', 0)
+            })
+
+        writer.add(killmail_data, attacker_rows)
+        if flush_now and not writer.flush():
+            logging.info(f"Killmail {kill['killmail_id']} already exists or was rejected")
+            return False
+
+        logging.info(f"Queued killmail {kill['killmail_id']} with {len(attacker_rows)} attackers")
         return True
 
     except Exception as e:
@@ -437,6 +271,7 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
     else:
         logging.info(f"Loading kills newer than {newest_kill_date}")
 
+    writer = KillmailBatchWriter(db, known=db.known_killmails)
     current_page = 1
     total_processed = 0
     max_pages = 10  # Limiter à 10 pages maximum
@@ -461,6 +296,15 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
 
         kills_processed_this_page = 0
         existing_kills_this_page = 0
+        pending_kills = []
+        stop_update = False
+
+        # Kills absents du filtre : nouveaux sans requête ; les autres vérifiés en une seule requête
+        new_ids = db.known_killmails.filter_new_killmails(
+            (kill['killmail_id'], kill['zkb']['hash'])
+            for kill in kills
+            if isinstance(kill, dict) and kill.get('killmail_id') and kill.get('zkb', {}).get('hash')
+        )
 
         for kill in kills:
             try:
@@ -479,23 +323,21 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
                     logging.warning("Missing killmail_id or hash")
                     continue
 
-                if db.kill_exists(killmail_id, kill_hash):
+                if killmail_id not in new_ids:
                     existing_kills_this_page += 1
                     consecutive_existing_kills += 1
 
                     if consecutive_existing_kills >= max_consecutive_existing:
                         logging.info(f"Found {max_consecutive_existing} consecutive existing kills, stopping update")
-                        return total_processed
+                        stop_update = True
+                        break
 
                     continue
 
                 consecutive_existing_kills = 0
 
                 # Récupérer les détails du kill
-                kill_detail = get_url(
-                    f"https://esi.evetech.net/latest/killmails/{killmail_id}/{kill_hash}/?datasource=tranquility",
-                    headers
-                )
+                kill_detail = get_killmail(killmail_id, kill_hash, headers)
 
                 if not kill_detail:
                     logging.warning(f"Could not get details for kill {killmail_id}")
@@ -507,12 +349,10 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
                 # Si le kill est plus ancien que le plus récent en base, on arrête
                 if kill_date <= newest_kill_date:
                     logging.info(f"Found kill ({kill_date}) older than newest in database ({newest_kill_date})")
-                    return total_processed
-
-                if process_single_kill(kill, kill_detail, corporation_id, db, headers):
-                    total_processed += 1
-                    kills_processed_this_page += 1
+                    stop_update = True
+                    break
 
+                pending_kills.append((kill, kill_detail))
                 time.sleep(1)  # Respect API rate limits
 
             except Exception as e:
@@ -520,6 +360,23 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
                 logging.error(f"Kill data: {json.dumps(kill, indent=2)}")
                 continue
 
+        # Noms connus localement seulement, les autres sont résolus en différé par resolve_names.py
+        names = cached_names([kill_detail for _, kill_detail in pending_kills]) if pending_kills else {}
+        if pending_kills:
+            prefetch_dimensions(db, [kill_detail for _, kill_detail in pending_kills], names)
+
+        for kill, kill_detail in pending_kills:
+            process_single_kill(kill, kill_detail, corporation_id, db, headers, names, writer)
+
+        # Toute la page est écrite en une seule transaction
+        writer.flush()
+        kills_processed_this_page = writer.kills_written - total_processed
+        total_processed = writer.kills_written
+
+        if stop_update:
+            writer.log_stats()
+            return total_processed
+
         logging.info(f"Processed {kills_processed_this_page} new kills on page {current_page}")
         logging.info(f"Found {existing_kills_this_page} existing kills on page {current_page}")
 
@@ -531,10 +388,152 @@ def process_killmails_batch(db: DatabaseConnection, headers: dict, corporation_i
         current_page += 1
         time.sleep(base_delay)
 
+    writer.log_stats()
     logging.info(f"Batch processing complete. Total new kills processed: {total_processed}")
     return total_processed
 
+def process_killmails_async(db: DatabaseConnection, headers: dict, corporation_id: str, queue_size: int = 100):
+    from src.services.async_ingestion import AsyncKillmailPipeline
+
+    writer = KillmailBatchWriter(db, known=db.known_killmails)
+
+    def flush_writer():
+        writer.flush()
+        return writer.kills_written
+
+    pipeline = AsyncKillmailPipeline(
+        headers,
+        corporation_id,
+        filter_new_kills=db.known_killmails.filter_new_killmails,
+        store_kill=lambda kill, kill_detail, names: process_single_kill(
+            kill, kill_detail, corporation_id, db, headers, names, writer),
+        newest_kill_date=get_newest_kill_date(db),
+        queue_size=queue_size,
+        prepare_page=lambda kill_details, names: prefetch_dimensions(db, kill_details, names),
+        flush=flush_writer
+    )
+    asyncio.run(pipeline.run())
+    writer.log_stats()
+    return writer.kills_written
+
+def discover_killmails(headers: dict, corporation_id: str, tracker: TrackerRepository, max_pages: int = 10) -> int:
+    """Stage 1: record the id/hash of the kills listed by zKillboard in killmail_tracker."""
+    discovered = 0
+    for page in range(1, max_pages + 1):
+        kills = get_all_kills_for_page(corporation_id, page, headers)
+        if not kills:
+            logging.info("No more kills available")
+            break
+
+        rows = [
+            (kill['killmail_id'], kill['zkb']['hash'], kill['zkb'].get('totalValue', 0))
+            for kill in kills
+            if isinstance(kill, dict) and kill.get('killmail_id') and kill.get('zkb', {}).get('hash')
+        ]
+        added = tracker.enqueue(rows)
+        discovered += added
+        logging.info(f"Page {page}: {added} new kills queued, {len(rows) - added} already tracked")
+        if added == 0:
+            logging.info("No new kills found on this page, stopping discovery")
+            break
+        time.sleep(2)
+
+    logging.info(f"Discovery complete: {discovered} kills queued, {tracker.count_pending()} pending")
+    return discovered
+
+def enrich_pending(db: DatabaseConnection, headers: dict, corporation_id: str, tracker: TrackerRepository,
+                   batch_size: int = 100) -> int:
+    """Stage 2: fetch details of the pending tracker rows and store them, until none is due."""
+    writer = KillmailBatchWriter(db, known=db.known_killmails)
+    while True:
+        pending = tracker.get_pending(batch_size)
+        if not pending:
+            break
+
+        done = []
+        ready = []
+        new_ids = db.known_killmails.filter_new_killmails((row['killmail_id'], row['kill_hash']) for row in pending)
+        for row in pending:
+            killmail_id, kill_hash = row['killmail_id'], row['kill_hash']
+            if killmail_id not in new_ids:
+                done.append((killmail_id, None))
+                continue
+            kill_detail = get_killmail(killmail_id, kill_hash, headers)
+            if not kill_detail:
+                tracker.mark_failed(killmail_id, "Could not get killmail details from ESI")
+                continue
+            kill = {'killmail_id': killmail_id, 'zkb': {'hash': kill_hash, 'totalValue': row['total_value'] or 0}}
+            ready.append((kill, kill_detail))
+
+        names = cached_names([kill_detail for _, kill_detail in ready]) if ready else {}
+        if ready:
+            prefetch_dimensions(db, [kill_detail for _, kill_detail in ready], names)
+        queued = {
+            kill['killmail_id'] for kill, kill_detail in ready
+            if process_single_kill(kill, kill_detail, corporation_id, db, headers, names, writer)
+        }
+        writer.flush()
+        for kill, kill_detail in ready:
+            if kill['killmail_id'] in queued and kill['killmail_id'] not in writer.rejected:
+                done.append((kill['killmail_id'], kill_detail['killmail_time']))
+            else:
+                tracker.mark_failed(kill['killmail_id'], "Error while storing the killmail")
+
+        tracker.mark_processed(done)
+        logging.info(f"Enriched batch: {len(done)} done, {len(pending) - len(done)} rescheduled, "
+                     f"{tracker.count_pending()} pending")
+
+    writer.log_stats()
+    logging.info(f"Enrichment complete: {writer.kills_written} new kills stored")
+    return writer.kills_written
+
+def process_killmails_tracked(db: DatabaseConnection, headers: dict, corporation_id: str, stage: str,
+                              batch_size: int = 100) -> int:
+    tracker = TrackerRepository(db)
+    if stage in ('discover', 'both'):
+        discover_killmails(headers, corporation_id, tracker)
+    if stage in ('enrich', 'both'):
+        return enrich_pending(db, headers, corporation_id, tracker, batch_size)
+    return 0
+
+def listen_for_kills(db: DatabaseConnection, headers: dict, corporation_ids: List[str], queue_id: str, url: str):
+    def handle_kill(kill, kill_detail, corporation_id):
+        kill_date = datetime.strptime(kill_detail['killmail_time'], "%Y-%m-%dT%H:%M:%SZ")
+        if db.kill_exists(kill['killmail_id'], kill['zkb'].get('hash'), kill_date):
+            logging.info(f"Kill {kill['killmail_id']} already in database, skipping")
+            return
+        process_single_kill(kill, kill_detail, str(corporation_id), db, headers)
+
+    def fill_gap():
+        # Page polling catches up on the kills published while the listener was down
+        for corporation_id in corporation_ids:
+            process_killmails_batch(db, headers, corporation_id)
+
+    fill_gap()
+    listener = RedisQListener(queue_id, corporation_ids, handle_kill, on_gap=fill_gap, url=url)
+    signal.signal(signal.SIGTERM, lambda signum, frame: listener.stop())
+    listener.listen()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fetch corporation killmails from zKillboard and ESI')
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help='Fetch pages, killmail details and names concurrently (requires aiohttp)')
+    parser.add_argument('--queue-size', type=int, default=100,
+                        help='Kills buffered between the fetch stages and the database writer in async mode')
+    parser.add_argument('--listen', action='store_true',
+                        help='Run continuously on the zKillboard RedisQ feed, page polling only fills gaps')
+    parser.add_argument('--redisq-url', default=os.getenv('REDISQ_URL', DEFAULT_REDISQ_URL),
+                        help='RedisQ endpoint (point it at tools/redisq_standin.py for local tests)')
+    parser.add_argument('--tracker', action='store_true',
+                        help='Resumable two-stage ingestion through killmail_tracker (run migrate.py first)')
+    parser.add_argument('--stage', choices=('discover', 'enrich', 'both'), default='both',
+                        help='Tracker stage to run: page discovery, enrichment of pending rows, or both')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Tracker rows enriched per batch')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     logging.info("Starting killmail processing script")
 
     headers = {
@@ -544,16 +543,36 @@ def main():
     }
 
     corporation_id = os.getenv('CORPORATION_ID', "98730717")
+    corporation_ids = [c.strip() for c in os.getenv('CORPORATION_IDS', corporation_id).split(',')]
 
     try:
         with DatabaseConnection() as db:
             logging.info("Successfully connected to database")
-            process_killmails_batch(db, headers, corporation_id)
-            logging.info("Killmail processing completed successfully")
+            load_static_data(db.cur)
+            ensure_partitions(db)
+            if args.listen:
+                queue_id = os.getenv('REDISQ_QUEUE_ID', f"zkill-batch-{corporation_id}")
+                listen_for_kills(db, headers, corporation_ids, queue_id, args.redisq_url)
+                return
+            started = time.monotonic()
+            if args.tracker:
+                total_processed = process_killmails_tracked(db, headers, corporation_id, args.stage, args.batch_size)
+            elif args.async_mode:
+                total_processed = process_killmails_async(db, headers, corporation_id, args.queue_size)
+            else:
+                total_processed = process_killmails_batch(db, headers, corporation_id)
+            elapsed = time.monotonic() - started
+            logging.info(f"Killmail processing completed successfully: {total_processed} kills in {elapsed:.1f}s "
+                         f"({total_processed / elapsed if elapsed else 0:.2f} kills/s)")
+            NameResolver(db).log_backlog()
 
     except Exception as e:
         logging.error(f"Error in main execution: {e}")
         raise
+    finally:
+        get_name_cache().log_stats()
+        get_killmail_archive().log_stats()
+        get_client().log_stats()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Maintain the monthly partitions of killmails / killmail_attackers (migration 005).
+
+    python manage_partitions.py --list              # attached months and estimated rows
+    python manage_partitions.py --ensure 6          # create the current month and the next 6
+    python manage_partitions.py --detach 2023-01    # detach a month into the archive schema
+    python manage_partitions.py --attach 2023-01    # attach an archived month back
+"""
+
+import argparse
+import logging
+
+from src.database import DatabaseConnection
+from src.database.partitions import (ARCHIVE_SCHEMA, attach_month, detach_month, ensure_partitions, list_partitions,
+                                     parse_month)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the monthly killmail partitions")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--list', action='store_true', help='List the attached partitions')
+    group.add_argument('--ensure', type=int, metavar='MONTHS', help='Create partitions up to MONTHS months ahead')
+    group.add_argument('--detach', metavar='YYYY-MM', help=f'Detach a month into the {ARCHIVE_SCHEMA} schema')
+    group.add_argument('--attach', metavar='YYYY-MM', help=f'Attach a month back from the {ARCHIVE_SCHEMA} schema')
+    args = parser.parse_args()
+
+    with DatabaseConnection() as db:
+        if args.list:
+            for name, bounds, rows in list_partitions(db):
+                print(f"{name:<28} {bounds:<70} ~{max(rows, 0)} rows")
+        elif args.ensure is not None:
+            ensure_partitions(db, args.ensure)
+        elif args.detach:
+            detach_month(db, parse_month(args.detach))
+        else:
+            attach_month(db, parse_month(args.attach))
+
+
+if __name__ == "__main__":
+    main()
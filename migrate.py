@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Apply the versioned schema migrations of sql/migrations/ to the database configured in .env.
+
+    python migrate.py            # apply every pending migration
+    python migrate.py --status   # list migrations and whether they are applied
+    python migrate.py --target 3 # stop after migration 003
+"""
+
+import argparse
+import logging
+
+from src.database import DatabaseConnection
+from src.database.migrations import MigrationRunner
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the schema migrations in sql/migrations")
+    parser.add_argument('--status', action='store_true', help='Show applied and pending migrations')
+    parser.add_argument('--target', type=int, help='Last migration version to apply')
+    args = parser.parse_args()
+
+    with DatabaseConnection() as db:
+        runner = MigrationRunner(db)
+        if args.status:
+            for version, name, applied in runner.status():
+                print(f"{version:03d}_{name:<40} {'applied' if applied else 'pending'}")
+            return
+        applied = runner.migrate(args.target)
+        logging.info(f"{applied} migration(s) applied")
+
+
+if __name__ == "__main__":
+    main()
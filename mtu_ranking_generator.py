@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 """
-Générateur de rapport de classement des MTU (Mobile Tractor Unit) perdus par joueur pour Goat to Go
+Générateur de rapport de classement des MTU (Mobile Tractor Unit) perdus par joueur d'une corporation (Goat to Go par défaut)
 """
 
-import psycopg2
-from psycopg2.extras import DictCursor
 import json
 import os
 from datetime import datetime, timedelta
@@ -12,6 +10,10 @@ from dotenv import load_dotenv
 import argparse
 import logging
 import calendar
+from html import escape
+
+from src.database import DatabaseConnection as PooledConnection
+from src.database.repositories import RankingRepository
 
 # Configuration du logging
 logging.basicConfig(
@@ -22,6 +24,10 @@ logging.basicConfig(
 # Charger les variables d'environnement
 load_dotenv()
 
+# Corporation (nom ou identifiant ESI) et coques classées, modifiables par --corporation / --ship
+DEFAULT_CORPORATION = os.getenv('RANKING_CORPORATION', 'goat to go')
+DEFAULT_SHIPS = ['Mobile Tractor Unit']
+
 # Données des joueurs et leurs personnages alternatifs
 PLAYER_DATA = """
 2113160540,Boutdechoux Malhorne,Alija2,BankBoutdechoux01,Bdcbdcbdc malhmalhmalh,Bdcmindeuh Boutdechoux,BoutdeARITTANT,BoutdeBABIRMOULT,Boutdechouxbdc Boutdechoux,BoutdechouxFittingTeam,BoutdeChouxSRPTeam,BoutdeFAURULLE,BoutdeGhoul,BoutdeHARE,BoutdeHELUENE,BoutdeKnockKnock,BoutdeMolok,BoutdeOGARIA,BoutdeORUSE,BoutdeTitan,GauloisGhoul,Good Name WhatGoodName,Hauler 08'15,It's Cool name,Lumiere BDM,Lumiere is up,Malhorne Boutdechoux,Malhorne Nakrar,MalhorneGhoul
@@ -70,29 +76,9 @@ PLAYER_DATA = """
 """
 
 
-class DatabaseConnection:
-    """Gestion de la connexion à la base de données"""
-    
-    def __init__(self):
-        self.conn = None
-        self.cur = None
-        self._conn_params = {
-            'dbname': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASSWORD'),
-            'host': os.getenv('DB_HOST'),
-            'port': os.getenv('DB_PORT')
-        }
-    
-    def __enter__(self):
-        self.conn = psycopg2.connect(**self._conn_params)
-        self.cur = self.conn.cursor(cursor_factory=DictCursor)
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
-            self.conn.close()
-    
+class DatabaseConnection(PooledConnection):
+    """Gestion de la connexion à la base de données (pool partagé de src.database)"""
+
     def execute_query(self, query, params=None):
         try:
             self.cur.execute(query, params)
@@ -125,125 +111,37 @@ def parse_player_data():
     return character_to_player, player_info
 
 
-def get_mtu_losses_by_month(db, months=12):
+def get_mtu_losses_by_month(ranking, months=12):
     """Récupère les pertes de MTU par mois (12 derniers mois)"""
-    query = """
-    SELECT 
-        TO_CHAR(k.kill_datetime, 'YYYY-MM') as mois,
-        p.pilot_name,
-        COUNT(*) as mtu_perdus,
-        SUM(k.value) as valeur_totale_perdue
-    FROM killmails k
-    JOIN pilots p ON k.pilot_id = p.pilot_id
-    JOIN ships s ON k.ship_id = s.ship_id
-    JOIN ship_types st ON s.ship_type_id = st.ship_type_id
-    JOIN corporations c ON k.victim_corporation_id = c.corporation_id
-    WHERE 
-        LOWER(c.corporation_name) = 'goat to go'
-        AND s.ship_name = 'Mobile Tractor Unit'
-        AND k.kill_datetime >= CURRENT_DATE - INTERVAL '12 months'
-    GROUP BY 
-        TO_CHAR(k.kill_datetime, 'YYYY-MM'),
-        p.pilot_name
-    ORDER BY 
-        mois DESC, 
-        mtu_perdus DESC
-    """
-    return db.execute_query(query, (12,))
+    return ranking.losses_by_month(months)
 
 
-def get_mtu_losses_30_days(db):
+def get_mtu_losses_30_days(ranking):
     """Récupère les pertes de MTU des 30 derniers jours"""
-    query = """
-    SELECT 
-        p.pilot_name,
-        COUNT(*) as mtu_perdus,
-        SUM(k.value) as valeur_totale_perdue,
-        AVG(k.value) as valeur_moyenne_par_mtu,
-        MIN(k.kill_datetime) as premiere_perte,
-        MAX(k.kill_datetime) as derniere_perte
-    FROM killmails k
-    JOIN pilots p ON k.pilot_id = p.pilot_id
-    JOIN ships s ON k.ship_id = s.ship_id
-    JOIN ship_types st ON s.ship_type_id = st.ship_type_id
-    JOIN corporations c ON k.victim_corporation_id = c.corporation_id
-    WHERE 
-        LOWER(c.corporation_name) = 'goat to go'
-        AND s.ship_name = 'Mobile Tractor Unit'
-        AND k.kill_datetime >= CURRENT_DATE - INTERVAL '30 days'
-    GROUP BY 
-        p.pilot_name
-    ORDER BY 
-        mtu_perdus DESC,
-        valeur_totale_perdue DESC
-    """
-    return db.execute_query(query)
+    return ranking.losses_since(30)
 
 
-def get_mtu_losses_all_time(db):
-    """Récupère toutes les pertes de MTU"""
-    query = """
-    SELECT 
-        p.pilot_name,
-        COUNT(*) as mtu_perdus,
-        SUM(k.value) as valeur_totale_perdue,
-        AVG(k.value) as valeur_moyenne_par_mtu,
-        MIN(k.kill_datetime) as premiere_perte,
-        MAX(k.kill_datetime) as derniere_perte,
-        EXTRACT(DAYS FROM (MAX(k.kill_datetime) - MIN(k.kill_datetime))) as periode_jours
-    FROM killmails k
-    JOIN pilots p ON k.pilot_id = p.pilot_id
-    JOIN ships s ON k.ship_id = s.ship_id
-    JOIN ship_types st ON s.ship_type_id = st.ship_type_id
-    JOIN corporations c ON k.victim_corporation_id = c.corporation_id
-    WHERE 
-        LOWER(c.corporation_name) = 'goat to go'
-        AND s.ship_name = 'Mobile Tractor Unit'
-    GROUP BY
-        p.pilot_name
-    ORDER BY 
-        mtu_perdus DESC,
-        valeur_totale_perdue DESC
-    """
-    return db.execute_query(query)
+def get_mtu_losses_all_time(ranking):
+    """Récupère toutes les pertes de MTU (lues dans le rollup journalier)"""
+    return ranking.losses_since()
 
 
-def get_recent_losses_details(db):
+def get_recent_losses_details(ranking):
     """Récupère les détails des pertes récentes"""
-    query = """
-    SELECT 
-        k.kill_datetime,
-        p.pilot_name,
-        sys.system_name,
-        k.value,
-        k.kill_hash
-    FROM killmails k
-    JOIN pilots p ON k.pilot_id = p.pilot_id
-    JOIN ships s ON k.ship_id = s.ship_id
-    JOIN ship_types st ON s.ship_type_id = st.ship_type_id
-    JOIN corporations c ON k.victim_corporation_id = c.corporation_id
-    LEFT JOIN systems sys ON k.system_id = sys.system_id
-    WHERE 
-        LOWER(c.corporation_name) = 'goat to go'
-        AND s.ship_name = 'Mobile Tractor Unit'
-        AND k.kill_datetime >= CURRENT_DATE - INTERVAL '30 days'
-    ORDER BY
-        k.kill_datetime DESC
-    """
-    return db.execute_query(query)
+    return ranking.recent_losses(30)
 
 
 def aggregate_by_player(data, character_to_player, player_info):
-    """Agrège les données par joueur"""
+    """Agrège les données par joueur (lignes PilotLosses)"""
     player_stats = {}
     
     for row in data:
-        pilot_name = row.get('pilot_name', '')
-        player_id = character_to_player.get(pilot_name.lower())
+        player_id = character_to_player.get(row.pilot_name.lower())
         
         if player_id:
-            if player_id not in player_stats:
-                player_stats[player_id] = {
+            stats = player_stats.get(player_id)
+            if stats is None:
+                stats = player_stats[player_id] = {
                     'player_name': player_info[player_id]['main_character'],
                     'player_id': player_id,
                     'mtu_perdus': 0,
@@ -254,25 +152,15 @@ def aggregate_by_player(data, character_to_player, player_info):
                     'losses_by_month': {}
                 }
             
-            player_stats[player_id]['mtu_perdus'] += int(row.get('mtu_perdus', 0))
-            player_stats[player_id]['valeur_totale_perdue'] += float(row.get('valeur_totale_perdue', 0))
-            player_stats[player_id]['characters_involved'].add(pilot_name)
+            stats['mtu_perdus'] += int(row.losses)
+            stats['valeur_totale_perdue'] += float(row.total_value or 0)
+            stats['characters_involved'].add(row.pilot_name)
             
             # Gérer les dates
-            if 'premiere_perte' in row and row['premiere_perte']:
-                if player_stats[player_id]['premiere_perte'] is None or row['premiere_perte'] < player_stats[player_id]['premiere_perte']:
-                    player_stats[player_id]['premiere_perte'] = row['premiere_perte']
-            
-            if 'derniere_perte' in row and row['derniere_perte']:
-                if player_stats[player_id]['derniere_perte'] is None or row['derniere_perte'] > player_stats[player_id]['derniere_perte']:
-                    player_stats[player_id]['derniere_perte'] = row['derniere_perte']
-            
-            # Gérer les données mensuelles
-            if 'mois' in row:
-                mois = row['mois']
-                if mois not in player_stats[player_id]['losses_by_month']:
-                    player_stats[player_id]['losses_by_month'][mois] = 0
-                player_stats[player_id]['losses_by_month'][mois] += int(row.get('mtu_perdus', 0))
+            if row.first_loss and (stats['premiere_perte'] is None or row.first_loss < stats['premiere_perte']):
+                stats['premiere_perte'] = row.first_loss
+            if row.last_loss and (stats['derniere_perte'] is None or row.last_loss > stats['derniere_perte']):
+                stats['derniere_perte'] = row.last_loss
     
     return player_stats
 
@@ -287,8 +175,8 @@ def format_isk(value):
         return f"{value / 1_000:.2f}K"
 
 
-def generate_html(player_stats_30d, player_stats_all_time, monthly_stats):
-    """Génère le HTML du rapport"""
+def generate_html(player_stats_30d, player_stats_all_time, monthly_stats, corporation_name):
+    """Génère le HTML du rapport pour la corporation classée"""
     
     # Top 10 des 30 derniers jours
     top_30d = sorted(player_stats_30d.values(), key=lambda x: x['mtu_perdus'], reverse=True)[:10]
@@ -313,7 +201,7 @@ def generate_html(player_stats_30d, player_stats_all_time, monthly_stats):
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Classement MTU Perdus - Goat to Go</title>
+    <title>Classement MTU Perdus - {escape(corporation_name)}</title>
     
     <style>
         :root {{
@@ -439,7 +327,7 @@ def generate_html(player_stats_30d, player_stats_all_time, monthly_stats):
 </head>
 <body>
     <div class="container">
-        <h1>🎯 Classement des MTU Perdus - Goat to Go 🎯</h1>
+        <h1>🎯 Classement des MTU Perdus - {escape(corporation_name)} 🎯</h1>
         
         <div class="stats-summary">
             <div class="stat-card">
@@ -729,6 +617,10 @@ def main():
     """Fonction principale"""
     parser = argparse.ArgumentParser(description='Générateur de rapport de classement MTU')
     parser.add_argument('--output', default='html/mtu_ranking.html', help='Fichier de sortie')
+    parser.add_argument('--corporation', default=DEFAULT_CORPORATION,
+                        help='Corporation classée : nom ou identifiant ESI (défaut : RANKING_CORPORATION)')
+    parser.add_argument('--ship', dest='ships', action='append',
+                        help=f"Coque classée, nom ou identifiant ESI, répétable (défaut : {', '.join(DEFAULT_SHIPS)})")
     args = parser.parse_args()
     
     try:
@@ -744,21 +636,25 @@ def main():
         logging.info(f"Données parsées pour {len(player_info)} joueurs")
         
         with DatabaseConnection() as db:
+            # Corporation et coques résolues une fois en identifiants, les requêtes filtrent dessus
+            ranking = RankingRepository.for_targets(db, args.corporation, args.ships or DEFAULT_SHIPS)
+            # Nom stocké de la corporation, à défaut celui passé en argument
+            corporation_name = ranking.corporation_name or str(args.corporation)
+
             # Récupérer les données
             logging.info("Récupération des données des 30 derniers jours")
-            data_30d = get_mtu_losses_30_days(db)
+            data_30d = get_mtu_losses_30_days(ranking)
             player_stats_30d = aggregate_by_player(data_30d, character_to_player, player_info)
             
             logging.info("Récupération des données all time")
-            data_all_time = get_mtu_losses_all_time(db)
+            data_all_time = get_mtu_losses_all_time(ranking)
             player_stats_all_time = aggregate_by_player(data_all_time, character_to_player, player_info)
             
             logging.info("Récupération des données mensuelles (12 derniers mois)")
-            data_monthly = get_mtu_losses_by_month(db, months=12)
+            data_monthly = get_mtu_losses_by_month(ranking, months=12)
             monthly_stats = {}
             for row in data_monthly:
-                pilot_name = row.get('pilot_name', '')
-                player_id = character_to_player.get(pilot_name.lower())
+                player_id = character_to_player.get(row.pilot_name.lower())
                 
                 if player_id:
                     if player_id not in monthly_stats:
@@ -769,15 +665,13 @@ def main():
                             'losses_by_month': {}
                         }
                     
-                    mois = row['mois']
-                    if mois not in monthly_stats[player_id]['losses_by_month']:
-                        monthly_stats[player_id]['losses_by_month'][mois] = 0
-                    monthly_stats[player_id]['losses_by_month'][mois] += int(row.get('mtu_perdus', 0))
-                    monthly_stats[player_id]['mtu_perdus'] += int(row.get('mtu_perdus', 0))
+                    losses_by_month = monthly_stats[player_id]['losses_by_month']
+                    losses_by_month[row.month] = losses_by_month.get(row.month, 0) + int(row.losses)
+                    monthly_stats[player_id]['mtu_perdus'] += int(row.losses)
         
         # Générer le HTML
         logging.info("Génération du HTML")
-        html_content = generate_html(player_stats_30d, player_stats_all_time, monthly_stats)
+        html_content = generate_html(player_stats_30d, player_stats_all_time, monthly_stats, corporation_name)
         
         # Créer le répertoire si nécessaire
         output_dir = os.path.dirname(args.output)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Recompute the daily killmail rollup (migration 006) from the killmails table.
+
+    python rebuild_rollups.py                    # everything
+    python rebuild_rollups.py --since 2025-03-01 # only from that day on
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from src.database import DatabaseConnection
+from src.database.rollups import rebuild_rollups
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily killmail rollup")
+    parser.add_argument('--since', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='First day to recompute (default: all days)')
+    args = parser.parse_args()
+
+    with DatabaseConnection() as db:
+        rebuild_rollups(db, args.since)
+
+
+if __name__ == "__main__":
+    main()
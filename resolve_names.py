@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Resolve the names left pending by the insert path (systems, ships, pilots, corporations, attackers).
+
+    python resolve_names.py                 # resolve the current backlog, then exit
+    python resolve_names.py --interval 60   # keep running, a new round every 60 s
+    python resolve_names.py --status        # only print the backlog
+"""
+
+import argparse
+import logging
+
+from src.database import DatabaseConnection
+from src.services.api_client import get_client
+from src.services.eve_data_provider import NAMES_BATCH_SIZE
+from src.services.name_cache import get_name_cache
+from src.services.name_resolver import NameResolver
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve pending dimension names through ESI")
+    parser.add_argument('--status', action='store_true', help='Print the unresolved backlog and exit')
+    parser.add_argument('--interval', type=float, help='Run as a worker, waiting this many seconds between rounds')
+    parser.add_argument('--batch-size', type=int, default=NAMES_BATCH_SIZE,
+                        help='Rows picked up per table and pass')
+    args = parser.parse_args()
+
+    headers = {
+        "User-Agent": "EVE Application telynor@gmail.com",
+        "Accept": "application/json"
+    }
+    try:
+        with DatabaseConnection() as db:
+            resolver = NameResolver(db, headers, args.batch_size)
+            if args.status:
+                resolver.log_backlog()
+                return
+            resolver.run(args.interval)
+    except KeyboardInterrupt:
+        logging.info("Name resolver stopped")
+    finally:
+        get_name_cache().log_stats()
+        get_client().log_stats()
+
+
+if __name__ == "__main__":
+    main()
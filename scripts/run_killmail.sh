@@ -15,6 +15,9 @@ source /scripts/eve_env/bin/activate
 # Execute the Python script using the full path
 python /scripts/eve_killmails/eve_killmails.py
 
+# Resolve the names left pending by the fetch (rankings match pilots by name)
+python /scripts/eve_killmails/resolve_names.py
+
 # Deactivate the virtual environment
 deactivate
 
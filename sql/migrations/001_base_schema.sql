@@ -0,0 +1,95 @@
+-- Base schema, same tables as sql/eve_killmails.sql (which also creates the database and the user).
+-- Written with IF NOT EXISTS so databases created from that script are adopted as-is.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'kill_type') THEN
+        CREATE TYPE kill_type AS ENUM ('KILL', 'LOSS');
+    END IF;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS systems (
+    system_id SERIAL PRIMARY KEY,
+    system_name VARCHAR(100) NOT NULL,
+    UNIQUE(system_name)
+);
+
+CREATE TABLE IF NOT EXISTS ship_types (
+    ship_type_id SERIAL PRIMARY KEY,
+    type_name VARCHAR(100) NOT NULL,
+    UNIQUE(type_name)
+);
+
+CREATE TABLE IF NOT EXISTS ships (
+    ship_id SERIAL PRIMARY KEY,
+    ship_name VARCHAR(100) NOT NULL,
+    ship_type_id INTEGER REFERENCES ship_types(ship_type_id),
+    UNIQUE(ship_name)
+);
+
+CREATE TABLE IF NOT EXISTS pilots (
+    pilot_id SERIAL PRIMARY KEY,
+    pilot_name VARCHAR(100) NOT NULL,
+    UNIQUE(pilot_name)
+);
+
+CREATE TABLE IF NOT EXISTS corporations (
+    corporation_id SERIAL PRIMARY KEY,
+    corporation_name VARCHAR(100) NOT NULL,
+    UNIQUE(corporation_name)
+);
+
+CREATE TABLE IF NOT EXISTS killmails (
+    killmail_id BIGINT PRIMARY KEY,
+    kill_hash VARCHAR(64) NOT NULL,
+    kill_datetime TIMESTAMP NOT NULL,
+    system_id INTEGER REFERENCES systems(system_id),
+    pilot_id INTEGER REFERENCES pilots(pilot_id),
+    ship_id INTEGER REFERENCES ships(ship_id),
+    value DECIMAL(20, 2) NOT NULL,
+    kill_type kill_type NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(kill_hash)
+);
+
+ALTER TABLE killmails ADD COLUMN IF NOT EXISTS victim_corporation_id INTEGER REFERENCES corporations(corporation_id);
+
+CREATE INDEX IF NOT EXISTS idx_killmails_datetime ON killmails(kill_datetime);
+CREATE INDEX IF NOT EXISTS idx_killmails_value ON killmails(value);
+CREATE INDEX IF NOT EXISTS idx_ships_type ON ships(ship_type_id);
+
+CREATE OR REPLACE VIEW kill_details AS
+SELECT
+    k.killmail_id,
+    k.kill_datetime,
+    s.system_name,
+    p.pilot_name,
+    sh.ship_name,
+    st.type_name as ship_type,
+    k.value,
+    k.kill_type
+FROM killmails k
+JOIN systems s ON k.system_id = s.system_id
+JOIN pilots p ON k.pilot_id = p.pilot_id
+JOIN ships sh ON k.ship_id = sh.ship_id
+JOIN ship_types st ON sh.ship_type_id = st.ship_type_id;
+
+CREATE TABLE IF NOT EXISTS killmail_attackers (
+    killmail_attacker_id SERIAL PRIMARY KEY,
+    killmail_id BIGINT REFERENCES killmails(killmail_id) ON DELETE CASCADE,
+    pilot_id INTEGER,
+    pilot_name VARCHAR(100) NOT NULL,
+    attacker_corporation_id INTEGER REFERENCES corporations(corporation_id),
+    final_blow BOOLEAN,
+    damage_done DECIMAL(20,2)
+);
+
+CREATE TABLE IF NOT EXISTS killmail_tracker (
+    killmail_id BIGINT PRIMARY KEY,
+    kill_hash VARCHAR NOT NULL,
+    kill_datetime TIMESTAMP NOT NULL,
+    is_processed BOOLEAN DEFAULT FALSE,
+    processed_at TIMESTAMP,
+    error_message TEXT
+);
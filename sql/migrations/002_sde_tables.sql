@@ -0,0 +1,23 @@
+-- Static data export (SDE) lookup tables, filled by import_sde.py
+
+CREATE TABLE IF NOT EXISTS sde_types (
+    type_id INTEGER PRIMARY KEY,
+    type_name VARCHAR(200) NOT NULL,
+    group_id INTEGER NOT NULL,
+    group_name VARCHAR(200) NOT NULL,
+    category_id INTEGER NOT NULL,
+    category_name VARCHAR(200) NOT NULL,
+    published BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_sde_types_category ON sde_types(category_id);
+
+CREATE TABLE IF NOT EXISTS sde_solar_systems (
+    system_id INTEGER PRIMARY KEY,
+    system_name VARCHAR(100) NOT NULL,
+    constellation_id INTEGER NOT NULL,
+    constellation_name VARCHAR(100) NOT NULL,
+    region_id INTEGER NOT NULL,
+    region_name VARCHAR(100) NOT NULL,
+    security_status DECIMAL(6, 4)
+);
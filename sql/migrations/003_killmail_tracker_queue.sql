@@ -0,0 +1,14 @@
+-- Turn killmail_tracker into the resumable discovery -> enrichment queue used by main.py --tracker
+
+-- Discovery only knows the id and hash, the date is filled in by enrichment
+ALTER TABLE killmail_tracker ALTER COLUMN kill_datetime DROP NOT NULL;
+
+-- zKillboard value, only known at discovery time
+ALTER TABLE killmail_tracker ADD COLUMN IF NOT EXISTS total_value DECIMAL(20, 2);
+ALTER TABLE killmail_tracker ADD COLUMN IF NOT EXISTS discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE killmail_tracker ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE killmail_tracker ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_killmail_tracker_pending
+    ON killmail_tracker (next_attempt_at NULLS FIRST, killmail_id)
+    WHERE NOT is_processed;
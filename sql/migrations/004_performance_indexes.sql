@@ -0,0 +1,31 @@
+-- Indexes chosen from the query shapes of the ranking generators, the backfill scripts and main.py.
+-- benchmarks/explain_indexes.py prints the before/after EXPLAIN ANALYZE of each of these queries.
+
+-- backfill_killmail_attackers.py: NOT EXISTS (... killmail_attackers WHERE killmail_id = k.killmail_id),
+-- also used by ON DELETE CASCADE from killmails, which otherwise scans the whole attackers table
+CREATE INDEX IF NOT EXISTS idx_killmail_attackers_killmail ON killmail_attackers(killmail_id);
+
+-- Attacker side of the corporation reports (kills credited to a corporation)
+CREATE INDEX IF NOT EXISTS idx_killmail_attackers_corporation ON killmail_attackers(attacker_corporation_id);
+
+-- Ranking generators: victim corporation = X AND ship = Y AND kill_datetime >= now - N days,
+-- equality columns first, the range column last
+CREATE INDEX IF NOT EXISTS idx_killmails_corp_ship_datetime
+    ON killmails(victim_corporation_id, ship_id, kill_datetime);
+
+-- Per-pilot lookups and the pilots foreign key
+CREATE INDEX IF NOT EXISTS idx_killmails_pilot ON killmails(pilot_id);
+
+-- Ranking generators filter on LOWER(corporation_name), which the UNIQUE(corporation_name) index cannot serve
+CREATE INDEX IF NOT EXISTS idx_corporations_lower_name ON corporations(LOWER(corporation_name));
+
+-- backfill_killmail_corporations.py: WHERE victim_corporation_id IS NULL, a shrinking subset
+CREATE INDEX IF NOT EXISTS idx_killmails_missing_corporation
+    ON killmails(killmail_id) WHERE victim_corporation_id IS NULL;
+
+-- kill_datetime keeps its btree (idx_killmails_datetime, migration 001): main.py reads
+-- ORDER BY kill_datetime DESC LIMIT 1, which a BRIN index cannot answer.
+
+ANALYZE killmails;
+ANALYZE killmail_attackers;
+ANALYZE corporations;
@@ -0,0 +1,122 @@
+-- Declarative monthly range partitioning of killmails and killmail_attackers on kill_datetime.
+-- killmail_attackers gets a denormalized kill_datetime so both tables split on the same months,
+-- report windows prune to the partitions they need and a month can be detached as a whole
+-- (manage_partitions.py). The existing rows are copied into the new tables in this transaction.
+-- Unlike 001-004 this one is not re-runnable: it relies on schema_version to be applied once.
+
+DROP VIEW IF EXISTS kill_details;
+
+ALTER TABLE killmails RENAME TO killmails_unpartitioned;
+ALTER TABLE killmail_attackers RENAME TO killmail_attackers_unpartitioned;
+-- Keep the attacker id sequence when the old table is dropped
+ALTER SEQUENCE killmail_attackers_killmail_attacker_id_seq OWNED BY NONE;
+
+-- The partition key has to be part of every unique constraint. A killmail always has the same
+-- date, so (killmail_id, kill_datetime) still rejects the duplicates ON CONFLICT relies on.
+CREATE TABLE killmails (
+    killmail_id BIGINT NOT NULL,
+    kill_hash VARCHAR(64) NOT NULL,
+    kill_datetime TIMESTAMP NOT NULL,
+    system_id INTEGER REFERENCES systems(system_id),
+    pilot_id INTEGER REFERENCES pilots(pilot_id),
+    ship_id INTEGER REFERENCES ships(ship_id),
+    value DECIMAL(20, 2) NOT NULL,
+    kill_type kill_type NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    victim_corporation_id INTEGER REFERENCES corporations(corporation_id),
+    PRIMARY KEY (killmail_id, kill_datetime),
+    UNIQUE (kill_hash, kill_datetime)
+) PARTITION BY RANGE (kill_datetime);
+
+CREATE TABLE killmail_attackers (
+    killmail_attacker_id INTEGER NOT NULL DEFAULT nextval('killmail_attackers_killmail_attacker_id_seq'),
+    killmail_id BIGINT NOT NULL,
+    kill_datetime TIMESTAMP NOT NULL,
+    pilot_id INTEGER,
+    pilot_name VARCHAR(100) NOT NULL,
+    attacker_corporation_id INTEGER REFERENCES corporations(corporation_id),
+    final_blow BOOLEAN,
+    damage_done DECIMAL(20,2),
+    PRIMARY KEY (killmail_attacker_id, kill_datetime),
+    FOREIGN KEY (killmail_id, kill_datetime) REFERENCES killmails (killmail_id, kill_datetime) ON DELETE CASCADE
+) PARTITION BY RANGE (kill_datetime);
+
+ALTER SEQUENCE killmail_attackers_killmail_attacker_id_seq OWNED BY killmail_attackers.killmail_attacker_id;
+
+-- Rows outside every monthly partition (clock skew, far-future dates) land here instead of failing
+CREATE TABLE killmails_default PARTITION OF killmails DEFAULT;
+CREATE TABLE killmail_attackers_default PARTITION OF killmail_attackers DEFAULT;
+
+-- Creates the killmails_yYYYYmMM / killmail_attackers_yYYYYmMM pair of every month in the range
+CREATE OR REPLACE FUNCTION create_killmail_partitions(from_month DATE, to_month DATE) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month);
+    suffix TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= date_trunc('month', to_month) LOOP
+        suffix := to_char(month_start, '"y"YYYY"m"MM');
+        IF to_regclass('killmails_' || suffix) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF killmails FOR VALUES FROM (%L) TO (%L)',
+                           'killmails_' || suffix, month_start, (month_start + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        IF to_regclass('killmail_attackers_' || suffix) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF killmail_attackers FOR VALUES FROM (%L) TO (%L)',
+                           'killmail_attackers_' || suffix, month_start, (month_start + INTERVAL '1 month')::date);
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql;
+
+SELECT create_killmail_partitions(
+    COALESCE((SELECT MIN(kill_datetime) FROM killmails_unpartitioned), CURRENT_DATE)::date,
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO killmails (killmail_id, kill_hash, kill_datetime, system_id, pilot_id, ship_id, value, kill_type,
+                       created_at, victim_corporation_id)
+SELECT killmail_id, kill_hash, kill_datetime, system_id, pilot_id, ship_id, value, kill_type,
+       created_at, victim_corporation_id
+FROM killmails_unpartitioned;
+
+-- Attackers without a killmail cannot be placed in a month and are dropped
+INSERT INTO killmail_attackers (killmail_attacker_id, killmail_id, kill_datetime, pilot_id, pilot_name,
+                                attacker_corporation_id, final_blow, damage_done)
+SELECT a.killmail_attacker_id, a.killmail_id, k.kill_datetime, a.pilot_id, a.pilot_name,
+       a.attacker_corporation_id, a.final_blow, a.damage_done
+FROM killmail_attackers_unpartitioned a
+JOIN killmails_unpartitioned k ON k.killmail_id = a.killmail_id;
+
+DROP TABLE killmail_attackers_unpartitioned;
+DROP TABLE killmails_unpartitioned;
+
+-- Indexes of migrations 001 and 004, now created on every partition
+CREATE INDEX idx_killmails_datetime ON killmails(kill_datetime);
+CREATE INDEX idx_killmails_value ON killmails(value);
+CREATE INDEX idx_killmails_corp_ship_datetime ON killmails(victim_corporation_id, ship_id, kill_datetime);
+CREATE INDEX idx_killmails_pilot ON killmails(pilot_id);
+CREATE INDEX idx_killmails_missing_corporation ON killmails(killmail_id) WHERE victim_corporation_id IS NULL;
+CREATE INDEX idx_killmail_attackers_killmail ON killmail_attackers(killmail_id);
+CREATE INDEX idx_killmail_attackers_corporation ON killmail_attackers(attacker_corporation_id);
+
+CREATE VIEW kill_details AS
+SELECT
+    k.killmail_id,
+    k.kill_datetime,
+    s.system_name,
+    p.pilot_name,
+    sh.ship_name,
+    st.type_name as ship_type,
+    k.value,
+    k.kill_type
+FROM killmails k
+JOIN systems s ON k.system_id = s.system_id
+JOIN pilots p ON k.pilot_id = p.pilot_id
+JOIN ships sh ON k.ship_id = sh.ship_id
+JOIN ship_types st ON sh.ship_type_id = st.ship_type_id;
+
+ANALYZE killmails;
+ANALYZE killmail_attackers;
@@ -0,0 +1,32 @@
+-- Daily rollup of killmails at (day, pilot, ship, victim corporation, kill type) grain.
+-- Kept up to date by KillmailBatchWriter in the transaction that inserts the kills and rebuilt
+-- from killmails by rebuild_rollups.py. NULL ids of killmails are stored as 0 (no matching row
+-- in the dimension tables, so inner joins drop them exactly as they drop NULLs).
+
+CREATE TABLE IF NOT EXISTS killmail_daily_rollup (
+    day DATE NOT NULL,
+    pilot_id INTEGER NOT NULL,
+    ship_id INTEGER NOT NULL,
+    victim_corporation_id INTEGER NOT NULL,
+    kill_type kill_type NOT NULL,
+    kill_count INTEGER NOT NULL,
+    total_value DECIMAL(24, 2) NOT NULL,
+    first_kill_at TIMESTAMP NOT NULL,
+    last_kill_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (day, pilot_id, ship_id, victim_corporation_id, kill_type)
+);
+
+-- Rankings: one corporation, one hull, a window of days
+CREATE INDEX IF NOT EXISTS idx_killmail_daily_rollup_corp_ship_day
+    ON killmail_daily_rollup(victim_corporation_id, ship_id, day);
+
+TRUNCATE killmail_daily_rollup;
+
+INSERT INTO killmail_daily_rollup (day, pilot_id, ship_id, victim_corporation_id, kill_type,
+                                   kill_count, total_value, first_kill_at, last_kill_at)
+SELECT kill_datetime::date, COALESCE(pilot_id, 0), COALESCE(ship_id, 0), COALESCE(victim_corporation_id, 0),
+       kill_type, COUNT(*), SUM(value), MIN(kill_datetime), MAX(kill_datetime)
+FROM killmails
+GROUP BY 1, 2, 3, 4, 5;
+
+ANALYZE killmail_daily_rollup;
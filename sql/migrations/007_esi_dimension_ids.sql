@@ -0,0 +1,68 @@
+-- ESI ids as the natural key of systems, ships, pilots and corporations.
+-- esi_id holds the solar_system_id / type_id / character_id / corporation_id of ESI payloads, so
+-- killmails can be written from raw ids and a renamed character or corporation keeps its row.
+-- Names become nullable (an id whose name is not known yet) and are only unique among the
+-- legacy rows that have no esi_id. Systems and ships are matched with the SDE here;
+-- pilots and corporations are filled by backfill_dimension_ids.py through ESI.
+
+ALTER TABLE systems ADD COLUMN IF NOT EXISTS esi_id BIGINT;
+ALTER TABLE ships ADD COLUMN IF NOT EXISTS esi_id BIGINT;
+ALTER TABLE pilots ADD COLUMN IF NOT EXISTS esi_id BIGINT;
+ALTER TABLE corporations ADD COLUMN IF NOT EXISTS esi_id BIGINT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_systems_esi_id ON systems(esi_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ships_esi_id ON ships(esi_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pilots_esi_id ON pilots(esi_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_corporations_esi_id ON corporations(esi_id);
+
+ALTER TABLE systems ALTER COLUMN system_name DROP NOT NULL;
+ALTER TABLE ships ALTER COLUMN ship_name DROP NOT NULL;
+ALTER TABLE pilots ALTER COLUMN pilot_name DROP NOT NULL;
+ALTER TABLE corporations ALTER COLUMN corporation_name DROP NOT NULL;
+
+ALTER TABLE systems DROP CONSTRAINT IF EXISTS systems_system_name_key;
+ALTER TABLE ships DROP CONSTRAINT IF EXISTS ships_ship_name_key;
+ALTER TABLE pilots DROP CONSTRAINT IF EXISTS pilots_pilot_name_key;
+ALTER TABLE corporations DROP CONSTRAINT IF EXISTS corporations_corporation_name_key;
+
+-- Rows without an ESI id are still looked up and upserted by name
+CREATE UNIQUE INDEX IF NOT EXISTS uq_systems_legacy_name ON systems(system_name) WHERE esi_id IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ships_legacy_name ON ships(ship_name) WHERE esi_id IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pilots_legacy_name ON pilots(pilot_name) WHERE esi_id IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_corporations_legacy_name ON corporations(corporation_name) WHERE esi_id IS NULL;
+
+-- Name lookups of the reports and backfill scripts
+CREATE INDEX IF NOT EXISTS idx_systems_name ON systems(system_name);
+CREATE INDEX IF NOT EXISTS idx_ships_name ON ships(ship_name);
+CREATE INDEX IF NOT EXISTS idx_pilots_name ON pilots(pilot_name);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ck_systems_name_or_esi_id') THEN
+        ALTER TABLE systems ADD CONSTRAINT ck_systems_name_or_esi_id
+            CHECK (system_name IS NOT NULL OR esi_id IS NOT NULL);
+        ALTER TABLE ships ADD CONSTRAINT ck_ships_name_or_esi_id
+            CHECK (ship_name IS NOT NULL OR esi_id IS NOT NULL);
+        ALTER TABLE pilots ADD CONSTRAINT ck_pilots_name_or_esi_id
+            CHECK (pilot_name IS NOT NULL OR esi_id IS NOT NULL);
+        ALTER TABLE corporations ADD CONSTRAINT ck_corporations_name_or_esi_id
+            CHECK (corporation_name IS NOT NULL OR esi_id IS NOT NULL);
+    END IF;
+END
+$$;
+
+-- Backfill from the SDE (empty until import_sde.py has run, which adopts the rows itself)
+UPDATE systems s
+SET esi_id = sde.system_id
+FROM sde_solar_systems sde
+WHERE s.system_name = sde.system_name AND s.esi_id IS NULL;
+
+UPDATE ships s
+SET esi_id = t.type_id
+FROM (
+    SELECT type_name, MIN(type_id) AS type_id
+    FROM sde_types
+    GROUP BY type_name
+    HAVING COUNT(*) = 1
+) t
+WHERE s.ship_name = t.type_name AND s.esi_id IS NULL;
@@ -0,0 +1,30 @@
+-- Deferred name resolution: killmails are stored with raw ESI ids, and rows whose name is not known
+-- yet are picked up in bulk by resolve_names.py. Attacker rows carry the placeholder 'pending' in
+-- pilot_name until their pilot is resolved. The partial indexes only hold the unresolved rows.
+
+CREATE INDEX IF NOT EXISTS idx_systems_unnamed ON systems(esi_id) WHERE system_name IS NULL;
+CREATE INDEX IF NOT EXISTS idx_ships_unnamed ON ships(esi_id) WHERE ship_name IS NULL;
+CREATE INDEX IF NOT EXISTS idx_ships_unclassified ON ships(esi_id) WHERE ship_type_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_pilots_unnamed ON pilots(esi_id) WHERE pilot_name IS NULL;
+CREATE INDEX IF NOT EXISTS idx_corporations_unnamed ON corporations(esi_id) WHERE corporation_name IS NULL;
+CREATE INDEX IF NOT EXISTS idx_killmail_attackers_pending_name
+    ON killmail_attackers(pilot_id) WHERE pilot_name = 'pending';
+
+-- Unresolved names show as 'pending'; ships without a class yet are kept.
+-- Dropped first: the COALESCE columns lose the varchar(100) typmod, which REPLACE refuses
+DROP VIEW IF EXISTS kill_details;
+CREATE VIEW kill_details AS
+SELECT
+    k.killmail_id,
+    k.kill_datetime,
+    COALESCE(s.system_name, 'pending') as system_name,
+    COALESCE(p.pilot_name, 'pending') as pilot_name,
+    COALESCE(sh.ship_name, 'pending') as ship_name,
+    COALESCE(st.type_name, 'pending') as ship_type,
+    k.value,
+    k.kill_type
+FROM killmails k
+JOIN systems s ON k.system_id = s.system_id
+JOIN pilots p ON k.pilot_id = p.pilot_id
+JOIN ships sh ON k.ship_id = sh.ship_id
+LEFT JOIN ship_types st ON sh.ship_type_id = st.ship_type_id;
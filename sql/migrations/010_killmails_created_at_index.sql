@@ -0,0 +1,4 @@
+-- The known-killmails filter (src/database/known_killmails.py) is saved with the latest created_at
+-- it has seen; on startup it only reads the killmails created since then. Without this index that
+-- catch-up scan would read every partition.
+CREATE INDEX IF NOT EXISTS idx_killmails_created_at ON killmails(created_at);
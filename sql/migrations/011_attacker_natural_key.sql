@@ -0,0 +1,68 @@
+-- Natural key for killmail_attackers: an attacker is its position in the ESI attackers array of
+-- its killmail (attacker_index). Until now only the serial id was unique, so re-running
+-- backfill_killmail_attackers.py or reprocessing a kill inserted the same attackers again.
+-- The partition key has to be part of the unique constraint, like the killmails primary key.
+-- This migration was first numbered 009 and databases that applied it under that number already
+-- have the column and the constraint, so every step is guarded and the file can run again on them.
+
+ALTER TABLE killmail_attackers ADD COLUMN IF NOT EXISTS attacker_index SMALLINT;
+
+-- Numbers the attacker rows of one table per killmail in insertion order, which is the ESI order.
+-- Nothing is deleted: identical rows can be distinct NPC attackers, so they get their own index.
+-- Rows numbered by an earlier run are left alone.
+CREATE OR REPLACE FUNCTION number_killmail_attackers(target REGCLASS) RETURNS VOID AS $$
+BEGIN
+    EXECUTE format($sql$
+        UPDATE %1$s a SET attacker_index = numbered.attacker_index
+        FROM (
+            SELECT killmail_attacker_id, kill_datetime,
+                   row_number() OVER (PARTITION BY killmail_id ORDER BY killmail_attacker_id) - 1 AS attacker_index
+            FROM %1$s
+        ) numbered
+        WHERE a.killmail_attacker_id = numbered.killmail_attacker_id
+          AND a.kill_datetime = numbered.kill_datetime
+          AND a.attacker_index IS NULL
+    $sql$, target);
+    EXECUTE format('ALTER TABLE %s ALTER COLUMN attacker_index SET NOT NULL', target);
+END
+$$ LANGUAGE plpgsql;
+
+SELECT number_killmail_attackers('killmail_attackers');
+
+-- Months detached into the archive schema (manage_partitions.py) get the same column and numbering,
+-- otherwise they could not be attached back
+DO $$
+DECLARE
+    archived REGCLASS;
+BEGIN
+    FOR archived IN
+        SELECT c.oid::regclass
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'archive' AND c.relkind = 'r' AND c.relname LIKE 'killmail\_attackers\_%'
+    LOOP
+        EXECUTE format('ALTER TABLE %s ADD COLUMN IF NOT EXISTS attacker_index SMALLINT', archived);
+        PERFORM number_killmail_attackers(archived);
+    END LOOP;
+END
+$$;
+
+DROP FUNCTION number_killmail_attackers(REGCLASS);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'killmail_attackers'::regclass AND conname = 'killmail_attackers_natural_key'
+    ) THEN
+        ALTER TABLE killmail_attackers
+            ADD CONSTRAINT killmail_attackers_natural_key UNIQUE (killmail_id, attacker_index, kill_datetime);
+    END IF;
+END
+$$;
+
+-- The natural key index leads with killmail_id and serves the NOT EXISTS of the attacker
+-- backfill and the ON DELETE CASCADE from killmails
+DROP INDEX IF EXISTS idx_killmail_attackers_killmail;
+
+ANALYZE killmail_attackers;
@@ -1,4 +1 @@
-"""Package database."""
-from .connection import DatabaseConnection
-
-__all__ = ['DatabaseConnection']
\ No newline at end of file
+"""EVE Online killmail processing package."""
@@ -1,4 +1,4 @@
 """Database package."""
-from .connection import DatabaseConnection, get_db_connection
+from .connection import DatabaseConnection
 
-__all__ = ['DatabaseConnection', 'get_db_connection']
\ No newline at end of file
+__all__ = ['DatabaseConnection']
@@ -0,0 +1,173 @@
+"""Buffered, transactional writer for killmails and their attackers."""
+import csv
+import io
+import logging
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from src.database.rollups import rollup_upsert
+
+KILLMAIL_COLUMNS = ('killmail_id', 'kill_hash', 'kill_datetime', 'system_id', 'pilot_id', 'ship_id',
+                    'value', 'kill_type', 'victim_corporation_id')
+# kill_datetime is denormalized on attackers so both tables share the monthly partitions;
+# (killmail_id, attacker_index, kill_datetime) is their natural key (migration 011)
+ATTACKER_COLUMNS = ('killmail_id', 'kill_datetime', 'attacker_index', 'pilot_id', 'pilot_name',
+                    'attacker_corporation_id', 'final_blow', 'damage_done')
+
+
+class KillmailBatchWriter:
+    """
+    Buffer killmails with their attacker rows and write them in one transaction per flush.
+
+    Killmails go through execute_values (ON CONFLICT DO NOTHING ... RETURNING,
+    so attackers and the daily rollup only count kills that were actually
+    inserted) and attackers through COPY FROM STDIN; the attackers of a kill
+    inserted by the same transaction cannot already be stored, so they need no
+    ON CONFLICT (KillmailRepository.insert_attackers() has it). If a flush
+    fails, it is replayed kill by kill, each under its own savepoint, so one
+    bad row only rejects its kill.
+    """
+
+    def __init__(self, db, max_kills: Optional[int] = None, max_rows: Optional[int] = None, known=None):
+        """
+        Args:
+            db: Connected DatabaseConnection (anything exposing conn and cur)
+            max_kills (Optional[int]): Buffered kills triggering a flush (BATCH_FLUSH_KILLS, default 50)
+            max_rows (Optional[int]): Buffered killmail + attacker rows triggering a flush
+                (BATCH_FLUSH_ROWS, default 5000)
+            known (Optional[KnownKillmails]): Filter of stored killmails, told about each committed insert
+        """
+        self.db = db
+        self.known = known
+        self.max_kills = max_kills or int(os.getenv('BATCH_FLUSH_KILLS', 50))
+        self.max_rows = max_rows or int(os.getenv('BATCH_FLUSH_ROWS', 5000))
+        self._buffer: List[Tuple[tuple, List[tuple]]] = []
+        self._rows = 0
+        self.kills_written = 0
+        self.attackers_written = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.rejected: Set[int] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, killmail_data: Dict, attackers: List[Dict]):
+        """
+        Queue a killmail and its attackers, flushing when a threshold is reached.
+
+        Args:
+            killmail_data (Dict): Values of KILLMAIL_COLUMNS ('datetime' is accepted for kill_datetime)
+            attackers (List[Dict]): Values of ATTACKER_COLUMNS except killmail_id, kill_datetime and
+                attacker_index, in the order of the ESI attackers array
+        """
+        killmail_id = killmail_data['killmail_id']
+        killmail_row = tuple(
+            killmail_data['datetime'] if column == 'kill_datetime' and 'datetime' in killmail_data
+            else killmail_data[column]
+            for column in KILLMAIL_COLUMNS
+        )
+        attacker_rows = [
+            (killmail_id, killmail_row[2], attacker_index, attacker['pilot_id'], attacker['pilot_name'],
+             attacker['attacker_corporation_id'], attacker['final_blow'], attacker['damage_done'])
+            for attacker_index, attacker in enumerate(attackers)
+        ]
+        self._buffer.append((killmail_row, attacker_rows))
+        self._rows += 1 + len(attacker_rows)
+        if len(self._buffer) >= self.max_kills or self._rows >= self.max_rows:
+            self.flush()
+
+    def _copy_attackers(self, rows: List[tuple]):
+        if not rows:
+            return
+        # Unquoted empty fields are NULLs, except for pilot_name (FORCE_NOT_NULL)
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+        data.seek(0)
+        self.db.cur.copy_expert(
+            f"COPY killmail_attackers ({', '.join(ATTACKER_COLUMNS)}) FROM STDIN "
+            "WITH (FORMAT csv, FORCE_NOT_NULL (pilot_name))", data
+        )
+
+    def _write(self, batch: List[Tuple[tuple, List[tuple]]]) -> Tuple[Set[int], int]:
+        # The daily rollup is fed from the rows actually inserted, in the same statement
+        inserted = execute_values(self.db.cur, f"""
+            WITH inserted AS (
+                INSERT INTO killmails ({', '.join(KILLMAIL_COLUMNS)})
+                VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING *
+            ), rollup AS (
+                {rollup_upsert('inserted')}
+            )
+            SELECT killmail_id FROM inserted
+        """, [killmail_row for killmail_row, _ in batch], page_size=len(batch), fetch=True)
+        inserted_ids = {row[0] for row in inserted}
+        attacker_rows = [row for killmail_row, rows in batch if killmail_row[0] in inserted_ids for row in rows]
+        self._copy_attackers(attacker_rows)
+        return inserted_ids, len(attacker_rows)
+
+    def flush(self) -> int:
+        """
+        Write the buffered kills and commit.
+
+        Returns:
+            int: Number of killmails inserted (duplicates and rejected kills excluded)
+        """
+        if not self._buffer:
+            return 0
+        batch, self._buffer, self._rows = self._buffer, [], 0
+        cur = self.db.cur
+        inserted_ids: Set[int] = set()
+        attackers = 0
+        try:
+            cur.execute("SAVEPOINT killmail_batch")
+            try:
+                inserted_ids, attackers = self._write(batch)
+                cur.execute("RELEASE SAVEPOINT killmail_batch")
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT killmail_batch")
+                logging.warning(f"Batch of {len(batch)} kills failed ({e}), retrying kill by kill")
+                for item in batch:
+                    cur.execute("SAVEPOINT killmail_row")
+                    try:
+                        written = self._write([item])
+                        cur.execute("RELEASE SAVEPOINT killmail_row")
+                        inserted_ids |= written[0]
+                        attackers += written[1]
+                    except psycopg2.Error as row_error:
+                        cur.execute("ROLLBACK TO SAVEPOINT killmail_row")
+                        self.rejected.add(item[0][0])
+                        logging.error(f"Rejected killmail {item[0][0]}: {row_error}")
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error flushing {len(batch)} killmails: {e}")
+            raise
+
+        if self.known is not None:
+            self.known.add(inserted_ids)
+        kills = len(inserted_ids)
+        self.flushes += 1
+        self.kills_written += kills
+        self.attackers_written += attackers
+        self.duplicates += len(batch) - kills - len({item[0][0] for item in batch} & self.rejected)
+        logging.info(f"Flushed {kills} killmails and {attackers} attackers in one transaction")
+        return kills
+
+    def log_stats(self):
+        """Log write counters for the current run."""
+        logging.info(f"Batch writer: {self.kills_written} killmails and {self.attackers_written} attackers "
+                     f"in {self.flushes} transactions, {self.duplicates} duplicates, {len(self.rejected)} rejected")
@@ -1,6 +1,13 @@
 """Database connection module."""
+import atexit
+import itertools
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
 import psycopg2
+from psycopg2.extensions import connection as PgConnection
 from psycopg2.extras import DictCursor
+from psycopg2.pool import ThreadedConnectionPool
 import logging
 import os
 from dotenv import load_dotenv
@@ -8,26 +15,71 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Rows fetched per round trip by server-side cursors, and rows per keyset page
+DEFAULT_ITERSIZE = 2000
+DEFAULT_PAGE_SIZE = 1000
+
+_cursor_ids = itertools.count(1)
+
+
+class PreparingConnection(PgConnection):
+    """psycopg2 connection remembering which statements were prepared in its session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Return the process-wide connection pool, created on first use.
+
+    Sized by DB_POOL_MIN / DB_POOL_MAX (default 1 / 5); every thread checks
+    out its own connection, so concurrent workers share it safely.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(
+                int(os.getenv('DB_POOL_MIN', 1)),
+                int(os.getenv('DB_POOL_MAX', 5)),
+                dbname=os.getenv('DB_NAME'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASSWORD'),
+                host=os.getenv('DB_HOST'),
+                port=os.getenv('DB_PORT'),
+                connection_factory=PreparingConnection
+            )
+            logging.info("Database connection pool created")
+        return _pool
+
+
+@atexit.register
+def close_pool():
+    """Close every pooled connection."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
 class DatabaseConnection:
-    """Handle database connection."""
+    """Handle a database connection checked out from the shared pool."""
 
     def __init__(self):
-        """Initialize connection parameters."""
+        """Initialize connection state."""
         self.conn = None
         self.cur = None
-        self._conn_params = {
-            'dbname': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASSWORD'),
-            'host': os.getenv('DB_HOST'),
-            'port': os.getenv('DB_PORT')
-        }
 
     def connect(self):
-        """Establish database connection."""
+        """Check out a connection from the pool."""
         try:
-            # Create connection
-            self.conn = psycopg2.connect(**self._conn_params)
+            self.conn = get_pool().getconn()
             # Create cursor with dictionary factory
             self.cur = self.conn.cursor(cursor_factory=DictCursor)
             logging.info("Database connection established")
@@ -36,17 +88,121 @@ class DatabaseConnection:
             raise
 
     def disconnect(self):
-        """Close database connection."""
+        """Return the connection to the pool (an open transaction is rolled back)."""
         try:
             if self.cur:
                 self.cur.close()
             if self.conn:
-                self.conn.close()
+                get_pool().putconn(self.conn)
+                self.conn = None
                 logging.info("Database connection closed")
         except Exception as e:
             logging.error(f"Error closing database connection: {e}")
             raise
 
+    def execute_prepared(self, name: str, query: str, params: Optional[Sequence[Any]] = None):
+        """
+        Execute a hot statement through a server-side prepared statement.
+
+        The statement is prepared once per pooled session, later calls only
+        send EXECUTE with the parameters and reuse the cached plan.
+
+        Args:
+            name (str): Statement name, unique per query
+            query (str): SQL using $1, $2, ... placeholders
+            params (Optional[Sequence[Any]]): Parameter values
+        """
+        if name not in self.conn.prepared:
+            self.cur.execute(f"PREPARE {name} AS {query}")
+            self.conn.prepared.add(name)
+        if params:
+            self.cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            self.cur.execute(f"EXECUTE {name}")
+
+    def stream(self, query: str, params: Optional[Sequence[Any]] = None,
+               itersize: Optional[int] = None, row_type: Optional[Callable] = None) -> Iterator:
+        """
+        Iterate over the rows of a query through a named server-side cursor.
+
+        Only itersize rows (STREAM_ITERSIZE, default 2000) are held in memory
+        at a time, whatever the size of the result. The cursor lives in the
+        current transaction: do not commit while iterating (use iter_keyset
+        for loops that write), and end the transaction once done.
+
+        Args:
+            query (str): SQL query
+            params (Optional[Sequence[Any]]): Query parameters
+            itersize (Optional[int]): Rows fetched per round trip
+            row_type (Optional[Callable]): NamedTuple class built from each plain tuple row
+                (see src.models.rows); DictRow rows when omitted
+
+        Yields:
+            Result rows
+        """
+        cursor = self.conn.cursor(name=f"stream_{next(_cursor_ids)}",
+                                  cursor_factory=None if row_type else DictCursor)
+        cursor.itersize = itersize or int(os.getenv('STREAM_ITERSIZE', DEFAULT_ITERSIZE))
+        try:
+            cursor.execute(query, params)
+            yield from (map(row_type._make, cursor) if row_type else cursor)
+        except Exception as e:
+            self.conn.rollback()
+            logging.error(f"Error streaming query: {e}")
+            raise
+        finally:
+            if not cursor.closed and not self.conn.closed:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass  # Already gone with its transaction
+
+    def iter_keyset(self, query: str, key: str, params: Optional[Dict[str, Any]] = None,
+                    page_size: Optional[int] = None, after: Any = 0,
+                    row_type: Optional[Callable] = None) -> Iterator:
+        """
+        Iterate over a query page by page, resuming each page after the last key seen.
+
+        The query must filter on "key > %(after)s", be ordered by key and end
+        with "LIMIT %(limit)s". Every page is a short statement of its own and
+        its transaction is ended before the rows are handed out, so the caller
+        may write and commit while iterating; a row deleted or modified meanwhile
+        is simply seen (or not) by the next page.
+
+        Args:
+            query (str): SQL query with the %(after)s and %(limit)s placeholders
+            key (str): Unique, ordered column the pages are keyed on
+            params (Optional[Dict[str, Any]]): Other named parameters
+            page_size (Optional[int]): Rows per page (KEYSET_PAGE_SIZE, default 1000)
+            after (Any): Start after this key value
+            row_type (Optional[Callable]): NamedTuple class built from each row, which must
+                have a field named key; DictRow rows when omitted
+
+        Yields:
+            Result rows, in key order
+        """
+        page_size = page_size or int(os.getenv('KEYSET_PAGE_SIZE', DEFAULT_PAGE_SIZE))
+        while True:
+            try:
+                if row_type:
+                    with self.conn.cursor() as cursor:
+                        cursor.execute(query, {**(params or {}), 'after': after, 'limit': page_size})
+                        rows = [row_type._make(row) for row in cursor.fetchall()]
+                else:
+                    self.cur.execute(query, {**(params or {}), 'after': after, 'limit': page_size})
+                    rows = self.cur.fetchall()
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logging.error(f"Error fetching keyset page after {key} {after}: {e}")
+                raise
+            if not rows:
+                return
+            after = getattr(rows[-1], key) if row_type else rows[-1][key]
+            yield from rows
+            if len(rows) < page_size:
+                return
+
     def __enter__(self):
         """Context manager entry point."""
         self.connect()
@@ -54,4 +210,4 @@ class DatabaseConnection:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit point."""
-        self.disconnect()
\ No newline at end of file
+        self.disconnect()
@@ -0,0 +1,251 @@
+"""In-process name -> id cache of the dimension tables."""
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from src.services.name_cache import UNKNOWN_NAME
+
+# Dimension -> (table, id column, name column)
+DIMENSIONS = {
+    'systems': ('systems', 'system_id', 'system_name'),
+    'ship_types': ('ship_types', 'ship_type_id', 'type_name'),
+    'ships': ('ships', 'ship_id', 'ship_name'),
+    'pilots': ('pilots', 'pilot_id', 'pilot_name'),
+    'corporations': ('corporations', 'corporation_id', 'corporation_name'),
+}
+# Dimensions carrying the ESI id (solar_system_id, type_id, character_id, corporation_id) in esi_id
+ESI_DIMENSIONS = ('systems', 'ships', 'pilots', 'corporations')
+
+
+class DimensionCache:
+    """
+    Name -> id and ESI id -> id maps of systems, ship_types, ships, pilots and corporations.
+
+    The maps are loaded once, hits are answered from memory and misses are
+    upserted (one statement per dimension when given in bulk through
+    ensure() / ensure_esi()) and written through to the maps. Ships also
+    remember their ship_type_id, so a ship whose class changed is still
+    updated. ESI-keyed rows may be created before their name is known, the
+    name is filled in by a later upsert that knows it. The "Unknown"
+    placeholder counts as no name: it is never stored on an ESI-keyed row
+    nor used to adopt a legacy row.
+    """
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Connected src.database.DatabaseConnection
+        """
+        self.db = db
+        self.ids: Dict[str, Dict[str, int]] = {dimension: {} for dimension in DIMENSIONS}
+        self.ship_type_ids: Dict[str, int] = {}
+        # ESI id -> (row id, name, ship_type_id) of the ESI-keyed dimensions
+        self.esi_ids: Dict[str, Dict[int, Tuple[int, Optional[str], Optional[int]]]] = {
+            dimension: {} for dimension in ESI_DIMENSIONS
+        }
+        self.hits = {dimension: 0 for dimension in DIMENSIONS}
+        self.misses = {dimension: 0 for dimension in DIMENSIONS}
+
+    def load(self) -> 'DimensionCache':
+        """
+        Load every dimension table into memory.
+
+        Returns:
+            DimensionCache: self
+        """
+        for dimension, (table, id_column, name_column) in DIMENSIONS.items():
+            self.db.cur.execute(f"SELECT {name_column}, {id_column} FROM {table} WHERE {name_column} IS NOT NULL")
+            self.ids[dimension] = {row[0]: row[1] for row in self.db.cur.fetchall()}
+        self.db.cur.execute("SELECT ship_name, ship_type_id FROM ships WHERE ship_name IS NOT NULL")
+        self.ship_type_ids = {row[0]: row[1] for row in self.db.cur.fetchall()}
+        for dimension in ESI_DIMENSIONS:
+            table, id_column, name_column = DIMENSIONS[dimension]
+            ship_type = 'ship_type_id' if dimension == 'ships' else 'NULL'
+            self.db.cur.execute(
+                f"SELECT esi_id, {id_column}, {name_column}, {ship_type} FROM {table} WHERE esi_id IS NOT NULL"
+            )
+            self.esi_ids[dimension] = {row[0]: (row[1], row[2], row[3]) for row in self.db.cur.fetchall()}
+        self.db.conn.commit()
+        logging.info("Dimension cache loaded: " + ", ".join(
+            f"{len(ids)} {dimension}" for dimension, ids in self.ids.items()))
+        return self
+
+    def _is_cached(self, dimension: str, name: str, ship_type_id: Optional[int] = None) -> bool:
+        if name not in self.ids[dimension]:
+            return False
+        return dimension != 'ships' or self.ship_type_ids.get(name) == ship_type_id
+
+    def _upsert(self, dimension: str, rows: list):
+        table, id_column, name_column = DIMENSIONS[dimension]
+        # Only rows without an ESI id are unique by name
+        legacy = " WHERE esi_id IS NULL" if dimension in ESI_DIMENSIONS else ""
+        if dimension == 'ships':
+            query = f"""
+                INSERT INTO ships (ship_name, ship_type_id) VALUES %s
+                ON CONFLICT (ship_name){legacy} DO UPDATE SET ship_type_id = EXCLUDED.ship_type_id
+                RETURNING ship_name, ship_id, ship_type_id
+            """
+        else:
+            query = f"""
+                INSERT INTO {table} ({name_column}) VALUES %s
+                ON CONFLICT ({name_column}){legacy} DO UPDATE SET {name_column} = EXCLUDED.{name_column}
+                RETURNING {name_column}, {id_column}
+            """
+        try:
+            if len(rows) == 1:
+                # Single misses are the hot path: reuse a prepared plan
+                placeholders = ', '.join(f"${i + 1}" for i in range(len(rows[0])))
+                self.db.execute_prepared(f"upsert_{dimension}", query.replace('%s', f"({placeholders})"), rows[0])
+                returned = self.db.cur.fetchall()
+            else:
+                returned = execute_values(self.db.cur, query, rows, page_size=1000, fetch=True)
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error upserting {len(rows)} {dimension}: {e}")
+            raise
+        for row in returned:
+            self.ids[dimension][row[0]] = row[1]
+            if dimension == 'ships':
+                self.ship_type_ids[row[0]] = row[2]
+
+    def ensure(self, dimension: str, names: Iterable[str], ship_type_ids: Optional[Dict[str, int]] = None):
+        """
+        Create the missing names of a dimension in one batched upsert.
+
+        Args:
+            dimension (str): Key of DIMENSIONS
+            names (Iterable[str]): Names that will be looked up next
+            ship_type_ids (Optional[Dict[str, int]]): ship_name -> ship_type_id, for 'ships'
+        """
+        ship_type_ids = ship_type_ids or {}
+        missing = {name for name in names if not self._is_cached(dimension, name, ship_type_ids.get(name))}
+        if not missing:
+            return
+        self.misses[dimension] += len(missing)
+        if dimension == 'ships':
+            rows = [(name, ship_type_ids.get(name)) for name in missing]
+        else:
+            rows = [(name,) for name in missing]
+        self._upsert(dimension, rows)
+
+    def get_or_create(self, dimension: str, name: str, ship_type_id: Optional[int] = None) -> int:
+        """
+        Return the id of a name, creating the row if needed.
+
+        Args:
+            dimension (str): Key of DIMENSIONS
+            name (str): Name to look up
+            ship_type_id (Optional[int]): Class of the ship, for 'ships'
+
+        Returns:
+            int: Row id
+        """
+        if self._is_cached(dimension, name, ship_type_id):
+            self.hits[dimension] += 1
+            return self.ids[dimension][name]
+        self.misses[dimension] += 1
+        self._upsert(dimension, [(name, ship_type_id) if dimension == 'ships' else (name,)])
+        return self.ids[dimension][name]
+
+    def _is_esi_cached(self, dimension: str, esi_id: int, name: Optional[str], ship_type_id: Optional[int]) -> bool:
+        entry = self.esi_ids[dimension].get(esi_id)
+        if entry is None:
+            return False
+        _, cached_name, cached_ship_type_id = entry
+        return (name is None or name == cached_name) and (ship_type_id is None or ship_type_id == cached_ship_type_id)
+
+    def _upsert_esi(self, dimension: str, rows: list):
+        table, id_column, name_column = DIMENSIONS[dimension]
+        columns = ['esi_id', name_column] + (['ship_type_id'] if dimension == 'ships' else [])
+        updates = [f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})" for column in columns[1:]]
+        try:
+            # Adopt the legacy name-only rows first, so they keep their id and their killmails; the legacy
+            # "Unknown" catch-all row stands for many entities and is never adopted
+            named = [(row[0], row[1]) for row in rows if row[1] is not None and row[1] != UNKNOWN_NAME]
+            if named:
+                execute_values(self.db.cur, f"""
+                    UPDATE {table} SET esi_id = v.esi_id
+                    FROM (VALUES %s) AS v (esi_id, name)
+                    WHERE {table}.{name_column} = v.name AND {table}.esi_id IS NULL
+                      AND {table}.{name_column} <> '{UNKNOWN_NAME}'
+                      AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.esi_id = v.esi_id)
+                """, named, template="(%s::bigint, %s)", page_size=1000)
+            returned = execute_values(self.db.cur, f"""
+                INSERT INTO {table} ({', '.join(columns)}) VALUES %s
+                ON CONFLICT (esi_id) DO UPDATE SET {', '.join(updates)}
+                RETURNING esi_id, {id_column}, {', '.join(columns[1:])}
+            """, rows, page_size=1000, fetch=True)
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error upserting {len(rows)} {dimension} by ESI id: {e}")
+            raise
+        for row in returned:
+            ship_type_id = row[3] if dimension == 'ships' else None
+            self.esi_ids[dimension][row[0]] = (row[1], row[2], ship_type_id)
+            if row[2] is not None:
+                self.ids[dimension][row[2]] = row[1]
+                if dimension == 'ships':
+                    self.ship_type_ids[row[2]] = ship_type_id
+
+    def ensure_esi(self, dimension: str, entities: Dict[int, Optional[str]],
+                   ship_type_ids: Optional[Dict[int, Optional[int]]] = None):
+        """
+        Create or update the rows of a set of ESI ids in one batched upsert.
+
+        A None (or "Unknown") name creates the row without a name, or leaves a known name untouched.
+
+        Args:
+            dimension (str): One of ESI_DIMENSIONS
+            entities (Dict[int, Optional[str]]): ESI id -> name, when known
+            ship_type_ids (Optional[Dict[int, Optional[int]]]): ESI type id -> ship_type_id, for 'ships'
+        """
+        ship_type_ids = ship_type_ids or {}
+        entities = {esi_id: None if name == UNKNOWN_NAME else name for esi_id, name in entities.items()}
+        missing = {
+            esi_id: name for esi_id, name in entities.items()
+            if esi_id and not self._is_esi_cached(dimension, esi_id, name, ship_type_ids.get(esi_id))
+        }
+        if not missing:
+            return
+        self.misses[dimension] += len(missing)
+        if dimension == 'ships':
+            rows = [(esi_id, name, ship_type_ids.get(esi_id)) for esi_id, name in missing.items()]
+        else:
+            rows = [(esi_id, name) for esi_id, name in missing.items()]
+        self._upsert_esi(dimension, rows)
+
+    def get_by_esi_id(self, dimension: str, esi_id: Optional[int], name: Optional[str] = None,
+                      ship_type_id: Optional[int] = None) -> Optional[int]:
+        """
+        Return the row id of an ESI id, creating or updating the row if needed.
+
+        Args:
+            dimension (str): One of ESI_DIMENSIONS
+            esi_id (Optional[int]): ESI identifier (None for NPCs without a character, returns None)
+            name (Optional[str]): Name, when known
+            ship_type_id (Optional[int]): Class of the ship, for 'ships'
+
+        Returns:
+            Optional[int]: Row id
+        """
+        if not esi_id:
+            return None
+        if name == UNKNOWN_NAME:
+            name = None
+        if self._is_esi_cached(dimension, esi_id, name, ship_type_id):
+            self.hits[dimension] += 1
+        else:
+            self.ensure_esi(dimension, {esi_id: name}, {esi_id: ship_type_id} if dimension == 'ships' else None)
+        return self.esi_ids[dimension][esi_id][0]
+
+    def log_stats(self):
+        """Log hit/miss counters for the current run."""
+        lookups = sum(self.hits.values()) + sum(self.misses.values())
+        if not lookups:
+            return
+        logging.info("Dimension cache: " + ", ".join(
+            f"{dimension} {self.hits[dimension]} hits / {self.misses[dimension]} misses" for dimension in DIMENSIONS
+        ) + f" ({sum(self.hits.values()) / lookups * 100:.1f}% hit rate)")
@@ -0,0 +1,291 @@
+"""In-memory Bloom filter of the stored killmail ids, persisted between runs."""
+import logging
+import math
+import os
+import struct
+import tempfile
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set, Tuple
+
+from src.database.repositories import KillmailRepository
+from src.models.rows import StoredKillmail
+
+DEFAULT_PATH = os.path.join("cache", "known_killmails.bin")
+DEFAULT_MAX_MB = 4
+# Sizing target of a new filter, and the estimated rate above which a loaded one is rebuilt bigger
+TARGET_FALSE_POSITIVE_RATE = 0.01
+REBUILD_FALSE_POSITIVE_RATE = 0.05
+# Room left for the kills stored after the build, and the smallest filter built
+GROWTH_FACTOR = 2
+MIN_CAPACITY = 100000
+# created_at is the start of the inserting transaction: rows committed shortly after the previous
+# scan can carry an older timestamp, so the catch-up scan starts a little before the watermark
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+# File header: magic, version, bits, hashes, ids added, database name, watermark (ISO created_at)
+FILE_HEADER = struct.Struct('<4sIQIQ64s32s')
+FILE_MAGIC = b'KMBF'
+FILE_VERSION = 1
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(killmail_id: int) -> int:
+    # splitmix64 finalizer: consecutive ids spread over the whole 64-bit range
+    z = (killmail_id + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class KnownKillmails:
+    """
+    Bloom filter answering "is this killmail already stored?" without a database round trip.
+
+    A miss means the killmail is definitely not stored; a hit only means it
+    may be, and is checked against the database. The filter is built with one
+    streaming scan of killmails.killmail_id, saved with the largest created_at
+    seen (the watermark), and on the next start only the rows created since
+    the watermark are scanned. Its size is fixed at build time and never
+    exceeds KNOWN_KILLMAILS_MAX_MB; as kills accumulate the false positive
+    rate rises, and the filter is rebuilt bigger once it passes
+    REBUILD_FALSE_POSITIVE_RATE while the budget allows it.
+
+    Membership is by killmail_id only: ESI gives each killmail a single hash,
+    so a new id never comes with a stored hash. Ids leaving the table
+    (detached partitions) stay in the filter and only cost a database check.
+    """
+
+    def __init__(self, db, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            db: Connected src.database.DatabaseConnection
+            path (Optional[str]): File the filter is saved to (KNOWN_KILLMAILS_PATH)
+            max_bytes (Optional[int]): Memory budget of the bit array
+                (KNOWN_KILLMAILS_MAX_MB, default 4 MB)
+        """
+        self.db = db
+        self.path = path or os.getenv('KNOWN_KILLMAILS_PATH', DEFAULT_PATH)
+        self.max_bytes = max_bytes or int(float(os.getenv('KNOWN_KILLMAILS_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.bits = 0
+        self.hashes = 0
+        self.count = 0
+        self.watermark: Optional[datetime] = None
+        self.database: Optional[str] = None
+        self._array = bytearray()
+        self._dirty = False
+        self.definitely_new = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+
+    def _size(self, capacity: int):
+        bits = math.ceil(-capacity * math.log(TARGET_FALSE_POSITIVE_RATE) / math.log(2) ** 2)
+        self.bits = max(8, min(bits, self.max_bytes * 8)) // 8 * 8
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray(self.bits // 8)
+        self.count = 0
+        self.watermark = None
+
+    def _positions(self, killmail_id: int) -> range:
+        # Double hashing: the k bit positions are h1 + i * h2 for i < k, modulo the size
+        h = _mix(killmail_id)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return range(h1, h1 + self.hashes * h2, h2)
+
+    def __contains__(self, killmail_id: int) -> bool:
+        array, bits = self._array, self.bits
+        for position in self._positions(killmail_id):
+            position %= bits
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, killmail_ids: Iterable[int]):
+        """
+        Record stored killmails.
+
+        Args:
+            killmail_ids (Iterable[int]): Ids just written to killmails
+        """
+        array, bits = self._array, self.bits
+        for killmail_id in killmail_ids:
+            # Only ids that set a bit are counted: the overlap of a catch-up scan re-adds known ids
+            added = False
+            for position in self._positions(killmail_id):
+                position %= bits
+                mask = 1 << (position & 7)
+                if not array[position >> 3] & mask:
+                    array[position >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+                self._dirty = True
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._array)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimated probability that a new killmail is reported as possibly stored."""
+        if not self.bits:
+            return 1.0
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def _current_database(self) -> str:
+        self.db.cur.execute("SELECT current_database()")
+        name = self.db.cur.fetchone()[0]
+        self.db.conn.commit()
+        return name
+
+    def _estimated_rows(self) -> int:
+        # Planner statistics of the partitions: no extra scan before the streaming one, unless a
+        # partition was never analyzed (reltuples -1), in which case the rows are counted
+        try:
+            self.db.cur.execute("""
+                SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint, COALESCE(BOOL_OR(c.reltuples < 0), false)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'killmails'::regclass
+            """)
+            rows, unanalyzed = self.db.cur.fetchone()
+            if unanalyzed:
+                self.db.cur.execute("SELECT COUNT(*) FROM killmails")
+                rows = self.db.cur.fetchone()[0]
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error estimating the stored killmails: {e}")
+            raise
+        return rows
+
+    def _scan(self, since: Optional[datetime] = None) -> int:
+        where = "WHERE created_at >= %s" if since else ""
+        params = (since - WATERMARK_OVERLAP,) if since else None
+        scanned = 0
+        try:
+            for row in self.db.stream(f"SELECT killmail_id, created_at FROM killmails {where}", params,
+                                      row_type=StoredKillmail):
+                self.add((row.killmail_id,))
+                scanned += 1
+                if row.created_at and (self.watermark is None or row.created_at > self.watermark):
+                    self.watermark = row.created_at
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error scanning killmail ids: {e}")
+            raise
+        return scanned
+
+    def _read(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                magic, version, bits, hashes, count, saved_database, watermark = FILE_HEADER.unpack(
+                    f.read(FILE_HEADER.size))
+                array = bytearray(f.read())
+        except (OSError, struct.error) as e:
+            logging.warning(f"Known killmails file {self.path} unreadable ({e}), rebuilding")
+            return False
+        if magic != FILE_MAGIC or version != FILE_VERSION or len(array) != bits // 8:
+            logging.warning(f"Known killmails file {self.path} has an unknown format, rebuilding")
+            return False
+        if saved_database.rstrip(b'\0').decode() != self.database:
+            logging.info(f"Known killmails file {self.path} belongs to another database, rebuilding")
+            return False
+        if bits > self.max_bytes * 8:
+            logging.info("Known killmails file is larger than KNOWN_KILLMAILS_MAX_MB, rebuilding")
+            return False
+        watermark = watermark.rstrip(b'\0').decode()
+        self.bits, self.hashes, self.count, self._array = bits, hashes, count, array
+        self.watermark = datetime.fromisoformat(watermark) if watermark else None
+        return True
+
+    def load(self) -> 'KnownKillmails':
+        """
+        Load the saved filter and add the killmails created since its watermark, or build it from scratch.
+
+        Returns:
+            KnownKillmails: self
+        """
+        self.database = self._current_database()
+        if self._read() and (self.false_positive_rate <= REBUILD_FALSE_POSITIVE_RATE
+                                     or self.bits >= self.max_bytes * 8):
+            added = self._scan(self.watermark) if self.watermark else self._scan()
+            logging.info(f"Known killmails loaded from {self.path}, {added} ids scanned since the watermark")
+        else:
+            # The saved count is a floor when the statistics lag behind the table
+            self._size(max(max(self.count, self._estimated_rows()) * GROWTH_FACTOR, MIN_CAPACITY))
+            scanned = self._scan()
+            logging.info(f"Known killmails built from {scanned} stored killmails")
+        self._dirty = True
+        self.save()
+        self.log_stats()
+        if self.false_positive_rate > REBUILD_FALSE_POSITIVE_RATE:
+            logging.warning(f"Known killmails filter is saturated ({self.false_positive_rate:.1%} false positives "
+                            f"at {self.memory_bytes / 1e6:.1f} MB): raise KNOWN_KILLMAILS_MAX_MB to save lookups")
+        return self
+
+    def save(self):
+        """
+        Write the filter and its watermark, replacing the previous file atomically.
+
+        Each save writes its own temporary file next to the target, so concurrent
+        runs never write into the same file; the last os.replace() wins.
+        """
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f"{os.path.basename(self.path)}.",
+                                         suffix='.tmp', delete=False) as f:
+            try:
+                f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, self.bits, self.hashes, self.count,
+                                         self.database.encode()[:64],
+                                         self.watermark.isoformat().encode() if self.watermark else b''))
+                f.write(self._array)
+            except Exception:
+                f.close()
+                os.remove(f.name)
+                raise
+        try:
+            os.replace(f.name, self.path)
+        except OSError:
+            os.remove(f.name)
+            raise
+        self._dirty = False
+
+    def filter_new_killmails(self, kills: Iterable[Tuple[int, str]]) -> Set[int]:
+        """
+        Return the killmails of a page that are not stored yet, like KillmailRepository.filter_new_killmails.
+
+        Filter misses are new without any query; only the possible hits are
+        checked by the database, in one round trip.
+
+        Args:
+            kills (Iterable[Tuple[int, str]]): (killmail_id, kill_hash) pairs
+
+        Returns:
+            Set[int]: Ids of the kills missing from the killmails table
+        """
+        new_ids = set()
+        possible = []
+        for killmail_id, kill_hash in kills:
+            if killmail_id in self:
+                possible.append((killmail_id, kill_hash))
+            else:
+                new_ids.add(killmail_id)
+        self.definitely_new += len(new_ids)
+        self.possible_hits += len(possible)
+        if possible:
+            unknown = KillmailRepository(self.db).filter_new_killmails(possible)
+            self.false_positives += len(unknown)
+            new_ids |= unknown
+        return new_ids
+
+    def log_stats(self):
+        """Log the size and lookup counters of the filter."""
+        logging.info(f"Known killmails: {self.count} ids in {self.memory_bytes / 1e6:.2f} MB "
+                     f"(budget {self.max_bytes / 1e6:.2f} MB, {self.hashes} hashes, "
+                     f"~{self.false_positive_rate:.3%} false positives), {self.definitely_new} definitely new, "
+                     f"{self.possible_hits} checked in the database, {self.false_positives} false positives")
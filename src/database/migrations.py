@@ -0,0 +1,110 @@
+"""Versioned schema migrations (sql/migrations/NNN_name.sql)."""
+import logging
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                              "sql", "migrations")
+
+_MIGRATION_FILE = re.compile(r'^(\d{3})_(\w+)\.sql$')
+
+
+class Migration(NamedTuple):
+    """One numbered SQL file."""
+    version: int
+    name: str
+    path: str
+
+    def read(self) -> str:
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Return the migrations of a directory sorted by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration numbers in {directory}")
+    return migrations
+
+
+class MigrationRunner:
+    """
+    Apply pending migrations in order, each in its own transaction, and record them in schema_version.
+
+    schema_version is what guarantees that each migration runs once: they
+    are not all re-runnable (005 rebuilds the tables, for one). 001-004 use
+    IF NOT EXISTS, so a database created from sql/eve_killmails.sql can be
+    brought under version control by simply running them.
+    """
+
+    def __init__(self, db, directory: str = MIGRATIONS_DIR):
+        """
+        Args:
+            db: Connected src.database.DatabaseConnection
+            directory (str): Folder holding the NNN_name.sql files
+        """
+        self.db = db
+        self.migrations = discover_migrations(directory)
+
+    def _ensure_version_table(self):
+        self.db.cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(200) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.db.conn.commit()
+
+    def applied_versions(self) -> List[int]:
+        """Return the versions recorded in schema_version."""
+        self._ensure_version_table()
+        self.db.cur.execute("SELECT version FROM schema_version ORDER BY version")
+        versions = [row[0] for row in self.db.cur.fetchall()]
+        self.db.conn.commit()
+        return versions
+
+    def pending(self, target: Optional[int] = None) -> List[Migration]:
+        """Return the migrations not applied yet, up to target."""
+        applied = set(self.applied_versions())
+        return [migration for migration in self.migrations
+                if migration.version not in applied and (target is None or migration.version <= target)]
+
+    def migrate(self, target: Optional[int] = None) -> int:
+        """
+        Apply the pending migrations.
+
+        Args:
+            target (Optional[int]): Last version to apply (default: all)
+
+        Returns:
+            int: Number of migrations applied
+        """
+        pending = self.pending(target)
+        for migration in pending:
+            logging.info(f"Applying migration {migration.version:03d}_{migration.name}")
+            try:
+                self.db.cur.execute(migration.read())
+                self.db.cur.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                                    (migration.version, migration.name))
+                self.db.conn.commit()
+            except Exception as e:
+                self.db.conn.rollback()
+                logging.error(f"Migration {migration.version:03d}_{migration.name} failed: {e}")
+                raise
+        if not pending:
+            logging.info("Schema is up to date")
+        return len(pending)
+
+    def status(self) -> List[tuple]:
+        """Return (version, name, applied) for every known migration."""
+        applied = set(self.applied_versions())
+        return [(migration.version, migration.name, migration.version in applied) for migration in self.migrations]
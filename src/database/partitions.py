@@ -0,0 +1,145 @@
+"""Maintenance of the monthly killmails / killmail_attackers partitions (migration 005)."""
+import logging
+import os
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+ARCHIVE_SCHEMA = "archive"
+PARTITIONED_TABLES = ('killmails', 'killmail_attackers')
+
+_MONTH = re.compile(r'^(\d{4})-(\d{2})$')
+
+
+def parse_month(value: str) -> date:
+    """Parse 'YYYY-MM' into the first day of that month."""
+    match = _MONTH.match(value)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f"Expected a month as YYYY-MM, got {value!r}")
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Return the name of the partition of table holding month."""
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def ensure_partitions(db, months_ahead: Optional[int] = None) -> int:
+    """
+    Create the partitions of the current month and the next ones if they are missing.
+
+    Does nothing on a database where migration 005 has not been applied.
+
+    Args:
+        db: Connected src.database.DatabaseConnection
+        months_ahead (Optional[int]): Months created past the current one (PARTITION_MONTHS_AHEAD, default 3)
+
+    Returns:
+        int: Number of months created
+    """
+    if months_ahead is None:
+        months_ahead = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+    try:
+        db.cur.execute("SELECT to_regproc('create_killmail_partitions') IS NOT NULL")
+        if not db.cur.fetchone()[0]:
+            db.conn.commit()
+            logging.info("killmails is not partitioned yet, run migrate.py")
+            return 0
+        db.cur.execute("""
+            SELECT create_killmail_partitions(
+                date_trunc('month', CURRENT_DATE)::date,
+                (date_trunc('month', CURRENT_DATE) + make_interval(months => %s))::date
+            )
+        """, (months_ahead,))
+        created = db.cur.fetchone()[0]
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        logging.error(f"Error creating killmail partitions: {e}")
+        raise
+    if created:
+        logging.info(f"Created {created} monthly killmail partition(s)")
+    return created
+
+
+def list_partitions(db) -> List[Tuple[str, str, int]]:
+    """
+    Return (partition, bounds, estimated rows) of every attached killmails partition, oldest first.
+    """
+    db.cur.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'killmails'::regclass
+        ORDER BY c.relname
+    """)
+    rows = [tuple(row) for row in db.cur.fetchall()]
+    db.conn.commit()
+    return rows
+
+
+def detach_month(db, month: date):
+    """
+    Detach one month of killmails and attackers and move it to the archive schema.
+
+    Both statements only touch the catalog, the rows stay where they are and can
+    be dumped (pg_dump -t archive.killmails_yYYYYmMM), dropped or attached back.
+    The detached attackers keep a copy of the foreign key to killmails, which
+    would still reference the month being detached: it is dropped, and
+    attach_month() restores it when the attackers are attached again.
+
+    Args:
+        db: Connected src.database.DatabaseConnection
+        month (date): Any day of the month
+    """
+    month = month.replace(day=1)
+    try:
+        db.cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+        # Attackers first, then their standalone foreign key: the killmails partition cannot
+        # leave while a constraint still references its rows
+        for table in reversed(PARTITIONED_TABLES):
+            partition = partition_name(table, month)
+            db.cur.execute(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+            db.cur.execute("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = %s::regclass AND contype = 'f' AND confrelid = 'killmails'::regclass
+            """, (partition,))
+            for (constraint,) in db.cur.fetchall():
+                db.cur.execute(f'ALTER TABLE {partition} DROP CONSTRAINT "{constraint}"')
+            db.cur.execute(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA}")
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        logging.error(f"Error detaching {month:%Y-%m}: {e}")
+        raise
+    logging.info(f"Detached {month:%Y-%m} into schema {ARCHIVE_SCHEMA}")
+
+
+def attach_month(db, month: date):
+    """
+    Move an archived month back from the archive schema and attach it again.
+
+    Killmails are attached first, so attaching the attackers clones and
+    validates their foreign key again.
+
+    Args:
+        db: Connected src.database.DatabaseConnection
+        month (date): Any day of the month
+    """
+    month = month.replace(day=1)
+    try:
+        for table in PARTITIONED_TABLES:
+            partition = partition_name(table, month)
+            db.cur.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{partition} SET SCHEMA public")
+            db.cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {partition} "
+                           f"FOR VALUES FROM (%s) TO (%s)", (month, _next_month(month)))
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        logging.error(f"Error attaching {month:%Y-%m}: {e}")
+        raise
+    logging.info(f"Attached {month:%Y-%m} back")
@@ -1,5 +1,8 @@
 """Repository package."""
 from .base_repository import BaseRepository
+from .killmail_repository import KillmailRepository
+from .ranking_repository import RankingRepository
 from .system_repository import SystemRepository
+from .tracker_repository import TrackerRepository
 
-__all__ = ['BaseRepository', 'SystemRepository']
\ No newline at end of file
+__all__ = ['BaseRepository', 'KillmailRepository', 'RankingRepository', 'SystemRepository', 'TrackerRepository']
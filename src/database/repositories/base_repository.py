@@ -0,0 +1,92 @@
+"""Base repository module."""
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+import logging
+
+T = TypeVar('T')
+
+
+class BaseRepository(Generic[T]):
+    """Common query helpers shared by the repositories."""
+
+    def __init__(self, db):
+        """
+        Initialize the repository.
+
+        Args:
+            db: Connected src.database.DatabaseConnection
+        """
+        self.db = db
+
+    @property
+    def conn(self):
+        return self.db.conn
+
+    @property
+    def cur(self):
+        return self.db.cur
+
+    def execute_query(self, query: str, params: Optional[Sequence[Any]] = None) -> List:
+        """
+        Execute a query and return all rows.
+
+        Args:
+            query (str): SQL query
+            params (Optional[Sequence[Any]]): Query parameters
+
+        Returns:
+            List: Result rows
+        """
+        try:
+            self.cur.execute(query, params)
+            return self.cur.fetchall()
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error executing query: {e}")
+            raise
+
+    def execute_query_single(self, query: str, params: Optional[Sequence[Any]] = None):
+        """
+        Execute a query and return the first row.
+
+        Args:
+            query (str): SQL query
+            params (Optional[Sequence[Any]]): Query parameters
+
+        Returns:
+            The first row, or None
+        """
+        try:
+            self.cur.execute(query, params)
+            return self.cur.fetchone()
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error executing query: {e}")
+            raise
+
+    def execute_prepared(self, name: str, query: str, params: Optional[Sequence[Any]] = None) -> List:
+        """
+        Execute a hot query as a server-side prepared statement and return all rows.
+
+        Args:
+            name (str): Statement name
+            query (str): SQL using $1, $2, ... placeholders
+            params (Optional[Sequence[Any]]): Query parameters
+
+        Returns:
+            List: Result rows
+        """
+        try:
+            self.db.execute_prepared(name, query, params)
+            return self.cur.fetchall()
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error executing prepared statement {name}: {e}")
+            raise
+
+    def commit(self):
+        """Commit the current transaction."""
+        self.conn.commit()
+
+    def rollback(self):
+        """Roll back the current transaction."""
+        self.conn.rollback()
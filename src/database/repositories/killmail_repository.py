@@ -0,0 +1,115 @@
+"""Killmail repository module."""
+import logging
+from typing import Iterable, Iterator, Optional, Sequence, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from src.database.batch_writer import ATTACKER_COLUMNS
+from src.database.repositories.base_repository import BaseRepository
+from src.models.rows import KillmailRef
+
+
+class KillmailRepository(BaseRepository[dict]):
+    """Repository for set-based queries on stored killmails."""
+
+    def filter_new_killmails(self, kills: Iterable[Tuple[int, str]]) -> Set[int]:
+        """
+        Return the killmails of a page that are not stored yet, in one round trip.
+
+        A kill counts as stored when its id or its hash is already present,
+        like DatabaseConnection.kill_exists. Each condition is an anti-join on
+        its own unique index (primary key and UNIQUE(kill_hash)).
+
+        Args:
+            kills (Iterable[Tuple[int, str]]): (killmail_id, kill_hash) pairs
+
+        Returns:
+            Set[int]: Ids of the kills missing from the killmails table
+        """
+        pairs = list(kills)
+        if not pairs:
+            return set()
+        rows = self.execute_prepared("filter_new_killmails", """
+            SELECT p.killmail_id
+            FROM unnest($1::bigint[], $2::varchar[]) AS p (killmail_id, kill_hash)
+            WHERE NOT EXISTS (SELECT 1 FROM killmails k WHERE k.killmail_id = p.killmail_id)
+              AND NOT EXISTS (SELECT 1 FROM killmails k WHERE k.kill_hash = p.kill_hash)
+        """, ([killmail_id for killmail_id, _ in pairs], [kill_hash for _, kill_hash in pairs]))
+        return {row[0] for row in rows}
+
+    def insert_attackers(self, rows: Sequence[tuple]) -> int:
+        """
+        Insert attacker rows in one statement and commit, skipping the ones already stored.
+
+        Rows are matched on the natural key (killmail_id, attacker_index, kill_datetime),
+        so writing the attackers of a killmail again is a no-op.
+
+        Args:
+            rows (Sequence[tuple]): Values of ATTACKER_COLUMNS
+
+        Returns:
+            int: Number of attacker rows actually inserted
+        """
+        if not rows:
+            return 0
+        try:
+            inserted = execute_values(self.cur, f"""
+                INSERT INTO killmail_attackers ({', '.join(ATTACKER_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (killmail_id, attacker_index, kill_datetime) DO NOTHING
+                RETURNING killmail_id
+            """, rows, page_size=len(rows), fetch=True)
+            self.commit()
+            return len(inserted)
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error inserting {len(rows)} attacker rows: {e}")
+            raise
+
+    def iter_killmails_without_attackers(self, page_size: Optional[int] = None) -> Iterator:
+        """
+        Iterate over the killmails that have no attacker row, by keyset pages on killmail_id.
+
+        Args:
+            page_size (Optional[int]): Killmails per page
+
+        Yields:
+            KillmailRef: Killmails in killmail_id order
+        """
+        return self.db.iter_keyset("""
+            SELECT k.killmail_id, k.kill_hash, k.kill_datetime
+            FROM killmails k
+            WHERE k.killmail_id > %(after)s
+              AND NOT EXISTS (SELECT 1 FROM killmail_attackers ka WHERE ka.killmail_id = k.killmail_id)
+            ORDER BY k.killmail_id
+            LIMIT %(limit)s
+        """, 'killmail_id', page_size=page_size, row_type=KillmailRef)
+
+    def iter_killmails_without_corporation(self, page_size: Optional[int] = None) -> Iterator:
+        """
+        Iterate over the killmails whose victim corporation is missing, by keyset pages on killmail_id.
+
+        Args:
+            page_size (Optional[int]): Killmails per page
+
+        Yields:
+            KillmailRef: Killmails in killmail_id order
+        """
+        return self.db.iter_keyset("""
+            SELECT killmail_id, kill_hash, kill_datetime
+            FROM killmails
+            WHERE killmail_id > %(after)s AND victim_corporation_id IS NULL
+            ORDER BY killmail_id
+            LIMIT %(limit)s
+        """, 'killmail_id', page_size=page_size, row_type=KillmailRef)
+
+    def count_killmails_without_attackers(self) -> int:
+        """Return the number of killmails that have no attacker row."""
+        return self.execute_query_single("""
+            SELECT COUNT(*) FROM killmails k
+            WHERE NOT EXISTS (SELECT 1 FROM killmail_attackers ka WHERE ka.killmail_id = k.killmail_id)
+        """)[0]
+
+    def count_killmails_without_corporation(self) -> int:
+        """Return the number of killmails whose victim corporation is missing."""
+        return self.execute_query_single("SELECT COUNT(*) FROM killmails WHERE victim_corporation_id IS NULL")[0]
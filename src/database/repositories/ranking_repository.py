@@ -0,0 +1,183 @@
+"""Ranking repository module."""
+import logging
+from typing import Iterator, List, Optional, Sequence, Union
+
+from src.database.repositories.base_repository import BaseRepository
+from src.models.rows import MonthlyPilotLosses, PilotLosses
+
+
+class RankingRepository(BaseRepository[PilotLosses]):
+    """Per-pilot losses of some hulls by one corporation, read from killmail_daily_rollup."""
+
+    def __init__(self, db, corporation_ids: Sequence[int], ship_ids: Sequence[int],
+                 corporation_name: Optional[str] = None):
+        """
+        Initialize the repository.
+
+        Args:
+            db: Connected src.database.DatabaseConnection
+            corporation_ids (Sequence[int]): corporations.corporation_id of the victim corporation
+            ship_ids (Sequence[int]): ships.ship_id of the ranked hulls
+            corporation_name (Optional[str]): Stored name of the victim corporation, for display
+        """
+        super().__init__(db)
+        self.corporation_ids = list(corporation_ids)
+        self.ship_ids = list(ship_ids)
+        self.corporation_name = corporation_name
+        self.params = {'corporation_ids': self.corporation_ids, 'ship_ids': self.ship_ids}
+
+    @classmethod
+    def for_targets(cls, db, corporation: Union[int, str], ships: Sequence[Union[int, str]]) -> 'RankingRepository':
+        """
+        Resolve the ranked corporation and hulls to row ids once, and return a repository filtering on them.
+
+        Args:
+            db: Connected src.database.DatabaseConnection
+            corporation (Union[int, str]): ESI corporation id, or corporation name (any case)
+            ships (Sequence[Union[int, str]]): ESI type ids or hull names
+
+        Returns:
+            RankingRepository: Repository whose queries filter on the resolved ids (and carrying the
+                stored corporation name, None while it is unresolved)
+        """
+        corporation_ids = cls._resolve(db, 'corporations', 'corporation_id', 'LOWER(corporation_name)',
+                                       [corporation if _is_esi_id(corporation) else str(corporation).lower()])
+        ship_ids = cls._resolve(db, 'ships', 'ship_id', 'ship_name', list(ships))
+        if not corporation_ids:
+            logging.warning(f"Corporation {corporation!r} not found, the rankings will be empty")
+        if not ship_ids:
+            logging.warning(f"Hulls {list(ships)!r} not found, the rankings will be empty")
+        return cls(db, corporation_ids, ship_ids, cls._corporation_name(db, corporation_ids))
+
+    @staticmethod
+    def _resolve(db, table: str, id_column: str, name_expression: str, targets: list) -> List[int]:
+        esi_ids = [int(target) for target in targets if _is_esi_id(target)]
+        names = [target for target in targets if not _is_esi_id(target)]
+        try:
+            db.cur.execute(f"""
+                SELECT {id_column} FROM {table}
+                WHERE esi_id = ANY(%s::bigint[]) OR {name_expression} = ANY(%s::text[])
+                ORDER BY {id_column}
+            """, (esi_ids, names))
+            ids = [row[0] for row in db.cur.fetchall()]
+            db.conn.commit()
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"Error resolving {table} {targets}: {e}")
+            raise
+        return ids
+
+    @staticmethod
+    def _corporation_name(db, corporation_ids: List[int]) -> Optional[str]:
+        if not corporation_ids:
+            return None
+        try:
+            db.cur.execute("""
+                SELECT corporation_name FROM corporations
+                WHERE corporation_id = ANY(%s::int[]) AND corporation_name IS NOT NULL
+                ORDER BY corporation_id
+                LIMIT 1
+            """, (corporation_ids,))
+            row = db.cur.fetchone()
+            db.conn.commit()
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"Error reading the name of corporations {corporation_ids}: {e}")
+            raise
+        return row[0] if row else None
+
+    def losses_since(self, days: Optional[int] = None) -> Iterator[PilotLosses]:
+        """
+        Stream the losses of each pilot over the last days (all time when None), most losses first.
+
+        Args:
+            days (Optional[int]): Length of the period in days
+
+        Yields:
+            PilotLosses: One row per pilot
+        """
+        period = "AND r.day >= CURRENT_DATE - %(days)s * INTERVAL '1 day'" if days is not None else ""
+        return self.db.stream(f"""
+            SELECT
+                COALESCE(p.pilot_name, 'pending') as pilot_name,
+                SUM(r.kill_count) as losses,
+                SUM(r.total_value) as total_value,
+                SUM(r.total_value) / SUM(r.kill_count) as average_value,
+                MIN(r.first_kill_at) as first_loss,
+                MAX(r.last_kill_at) as last_loss
+            FROM killmail_daily_rollup r
+            JOIN pilots p ON r.pilot_id = p.pilot_id
+            WHERE
+                r.victim_corporation_id = ANY(%(corporation_ids)s::int[])
+                AND r.ship_id = ANY(%(ship_ids)s::int[])
+                {period}
+            GROUP BY
+                p.pilot_id,
+                p.pilot_name
+            ORDER BY
+                losses DESC,
+                total_value DESC
+        """, {**self.params, 'days': days}, row_type=PilotLosses)
+
+    def losses_by_month(self, months: int = 12) -> Iterator[MonthlyPilotLosses]:
+        """
+        Stream the losses of each pilot per month over the last months, latest month first.
+
+        Args:
+            months (int): Number of months
+
+        Yields:
+            MonthlyPilotLosses: One row per month and pilot
+        """
+        return self.db.stream("""
+            SELECT
+                TO_CHAR(r.day, 'YYYY-MM') as month,
+                COALESCE(p.pilot_name, 'pending') as pilot_name,
+                SUM(r.kill_count) as losses,
+                SUM(r.total_value) as total_value
+            FROM killmail_daily_rollup r
+            JOIN pilots p ON r.pilot_id = p.pilot_id
+            WHERE
+                r.victim_corporation_id = ANY(%(corporation_ids)s::int[])
+                AND r.ship_id = ANY(%(ship_ids)s::int[])
+                AND r.day >= CURRENT_DATE - %(months)s * INTERVAL '1 month'
+            GROUP BY
+                TO_CHAR(r.day, 'YYYY-MM'),
+                p.pilot_id,
+                p.pilot_name
+            ORDER BY
+                month DESC,
+                losses DESC
+        """, {**self.params, 'months': months}, row_type=MonthlyPilotLosses)
+
+    def recent_losses(self, days: int = 30) -> List:
+        """
+        Return the individual losses of the last days, latest first.
+
+        Args:
+            days (int): Length of the period in days
+
+        Returns:
+            List: Rows with kill_datetime, pilot_name, system_name, value and kill_hash
+        """
+        return self.execute_query("""
+            SELECT
+                k.kill_datetime,
+                COALESCE(p.pilot_name, 'pending') as pilot_name,
+                COALESCE(sys.system_name, 'pending') as system_name,
+                k.value,
+                k.kill_hash
+            FROM killmails k
+            JOIN pilots p ON k.pilot_id = p.pilot_id
+            LEFT JOIN systems sys ON k.system_id = sys.system_id
+            WHERE
+                k.victim_corporation_id = ANY(%(corporation_ids)s::int[])
+                AND k.ship_id = ANY(%(ship_ids)s::int[])
+                AND k.kill_datetime >= CURRENT_DATE - %(days)s * INTERVAL '1 day'
+            ORDER BY
+                k.kill_datetime DESC
+        """, {**self.params, 'days': days})
+
+
+def _is_esi_id(value) -> bool:
+    return isinstance(value, int) or (isinstance(value, str) and value.isdigit())
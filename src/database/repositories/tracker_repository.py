@@ -0,0 +1,138 @@
+"""Killmail tracker repository module."""
+from datetime import datetime
+from typing import Iterable, List, Tuple
+import logging
+
+from psycopg2.extras import execute_values
+
+from src.database.repositories.base_repository import BaseRepository
+
+# Retry schedule of failed rows: RETRY_BASE_SECONDS * 2^attempts, capped
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 24 * 3600
+MAX_ATTEMPTS = 10
+
+
+def retry_delay(attempts: int) -> int:
+    """
+    Return the wait in seconds before retrying a row that already failed `attempts` times.
+
+    Args:
+        attempts (int): Failures recorded before this one
+
+    Returns:
+        int: RETRY_BASE_SECONDS * 2^attempts, capped at RETRY_MAX_SECONDS
+    """
+    return min(RETRY_BASE_SECONDS * 2 ** attempts, RETRY_MAX_SECONDS)
+
+
+class TrackerRepository(BaseRepository[dict]):
+    """Resumable discovery -> enrichment queue stored in killmail_tracker."""
+
+    def enqueue(self, kills: Iterable[Tuple[int, str, float]]) -> int:
+        """
+        Record discovered killmails, ignoring the ones already tracked.
+
+        Args:
+            kills (Iterable[Tuple[int, str, float]]): (killmail_id, kill_hash, total_value) rows
+
+        Returns:
+            int: Number of newly tracked killmails
+        """
+        rows = list(kills)
+        if not rows:
+            return 0
+        try:
+            inserted = execute_values(self.cur, """
+                INSERT INTO killmail_tracker (killmail_id, kill_hash, total_value)
+                VALUES %s
+                ON CONFLICT (killmail_id) DO NOTHING
+                RETURNING killmail_id
+            """, rows, fetch=True)
+            self.commit()
+            return len(inserted)
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error enqueuing killmails: {e}")
+            raise
+
+    def get_pending(self, limit: int) -> List:
+        """
+        Return pending rows whose retry time has come, oldest failures first.
+
+        Args:
+            limit (int): Maximum number of rows
+
+        Returns:
+            List: Rows with killmail_id, kill_hash, total_value and attempts
+        """
+        return self.execute_prepared("tracker_get_pending", """
+            SELECT killmail_id, kill_hash, total_value, attempts
+            FROM killmail_tracker
+            WHERE NOT is_processed
+              AND attempts < $1
+              AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)
+            ORDER BY next_attempt_at NULLS FIRST, killmail_id
+            LIMIT $2
+        """, (MAX_ATTEMPTS, limit))
+
+    def mark_processed(self, processed: Iterable[Tuple[int, datetime]]):
+        """
+        Mark rows as done in one statement.
+
+        Args:
+            processed (Iterable[Tuple[int, datetime]]): (killmail_id, kill_datetime) pairs
+        """
+        rows = list(processed)
+        if not rows:
+            return
+        try:
+            execute_values(self.cur, """
+                UPDATE killmail_tracker t
+                SET is_processed = TRUE,
+                    processed_at = CURRENT_TIMESTAMP,
+                    kill_datetime = COALESCE(v.kill_datetime::timestamp, t.kill_datetime),
+                    error_message = NULL,
+                    next_attempt_at = NULL
+                FROM (VALUES %s) AS v (killmail_id, kill_datetime)
+                WHERE t.killmail_id = v.killmail_id
+            """, rows)
+            self.commit()
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error marking killmails as processed: {e}")
+            raise
+
+    def mark_failed(self, killmail_id: int, error_message: str):
+        """
+        Record a failure and schedule the next attempt with exponential backoff.
+
+        The delays come from retry_delay(), indexed in SQL by the row's attempts.
+
+        Args:
+            killmail_id (int): Failed killmail
+            error_message (str): Reason stored for inspection
+        """
+        try:
+            self.db.execute_prepared("tracker_mark_failed", """
+                UPDATE killmail_tracker
+                SET attempts = attempts + 1,
+                    error_message = $1,
+                    next_attempt_at = CURRENT_TIMESTAMP
+                        + COALESCE(($2::integer[])[attempts + 1], $3) * INTERVAL '1 second'
+                WHERE killmail_id = $4
+            """, (error_message[:1000], [retry_delay(attempts) for attempts in range(MAX_ATTEMPTS)],
+                  RETRY_MAX_SECONDS, killmail_id))
+            self.commit()
+        except Exception as e:
+            self.rollback()
+            logging.error(f"Error marking killmail {killmail_id} as failed: {e}")
+            raise
+
+    def count_pending(self) -> int:
+        """Return the number of rows still waiting for enrichment (including scheduled retries)."""
+        rows = self.execute_prepared(
+            "tracker_count_pending",
+            "SELECT COUNT(*) FROM killmail_tracker WHERE NOT is_processed AND attempts < $1", (MAX_ATTEMPTS,)
+        )
+        return rows[0][0]
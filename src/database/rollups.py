@@ -0,0 +1,80 @@
+"""Daily killmail rollup (migration 006): one row per day, pilot, ship, victim corporation and kill type."""
+import logging
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+ROLLUP_TABLE = "killmail_daily_rollup"
+# Grain of the rollup; a NULL id of killmails is stored as 0 so the key can be a primary key
+ROLLUP_KEY = ('day', 'pilot_id', 'ship_id', 'victim_corporation_id', 'kill_type')
+ROLLUP_COLUMNS = ROLLUP_KEY + ('kill_count', 'total_value', 'first_kill_at', 'last_kill_at')
+
+
+def rollup_upsert(source: str, where: str = "") -> str:
+    """
+    Return the statement aggregating killmail rows of source into the rollup.
+
+    Existing rollup rows are merged (counts and values added, first/last kill
+    widened), so the statement can be applied to new kills only.
+
+    Args:
+        source (str): Table or CTE exposing the killmails columns
+        where (str): Optional WHERE clause restricting source
+    """
+    return f"""
+        INSERT INTO {ROLLUP_TABLE} ({', '.join(ROLLUP_COLUMNS)})
+        SELECT kill_datetime::date, COALESCE(pilot_id, 0), COALESCE(ship_id, 0), COALESCE(victim_corporation_id, 0),
+               kill_type, COUNT(*), SUM(value), MIN(kill_datetime), MAX(kill_datetime)
+        FROM {source}
+        {where}
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET
+            kill_count = {ROLLUP_TABLE}.kill_count + EXCLUDED.kill_count,
+            total_value = {ROLLUP_TABLE}.total_value + EXCLUDED.total_value,
+            first_kill_at = LEAST({ROLLUP_TABLE}.first_kill_at, EXCLUDED.first_kill_at),
+            last_kill_at = GREATEST({ROLLUP_TABLE}.last_kill_at, EXCLUDED.last_kill_at)
+    """
+
+
+def refresh_days(db, days: Iterable[date]):
+    """
+    Recompute the rollup of some days from killmails, in the caller's transaction.
+
+    Used when existing killmails change (e.g. a victim corporation is backfilled).
+
+    Args:
+        db: Connected src.database.DatabaseConnection
+        days (Iterable[date]): Days to recompute
+    """
+    for day in sorted(set(days)):
+        db.cur.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE day = %s", (day,))
+        db.cur.execute(rollup_upsert("killmails", "WHERE kill_datetime >= %s AND kill_datetime < %s"),
+                       (day, day + timedelta(days=1)))
+
+
+def rebuild_rollups(db, since: Optional[date] = None) -> int:
+    """
+    Recompute the rollup from scratch, or from a given day onwards.
+
+    Args:
+        db: Connected src.database.DatabaseConnection
+        since (Optional[date]): First day to recompute (default: everything)
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    try:
+        if since is None:
+            db.cur.execute(f"TRUNCATE {ROLLUP_TABLE}")
+            db.cur.execute(rollup_upsert("killmails"))
+        else:
+            db.cur.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE day >= %s", (since,))
+            db.cur.execute(rollup_upsert("killmails", "WHERE kill_datetime >= %s"), (since,))
+        written = db.cur.rowcount
+        db.cur.execute(f"ANALYZE {ROLLUP_TABLE}")
+        db.conn.commit()
+    except Exception as e:
+        db.conn.rollback()
+        logging.error(f"Error rebuilding {ROLLUP_TABLE}: {e}")
+        raise
+    logging.info(f"Rebuilt {written} rollup rows" + (f" since {since}" if since else ""))
+    return written
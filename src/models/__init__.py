@@ -0,0 +1,5 @@
+"""Domain models."""
+from .rows import KillmailRef, MonthlyPilotLosses, PilotLosses, StoredKillmail
+from .system import System
+
+__all__ = ['KillmailRef', 'MonthlyPilotLosses', 'PilotLosses', 'StoredKillmail', 'System']
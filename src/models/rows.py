@@ -0,0 +1,41 @@
+"""Compact row types for large query results.
+
+NamedTuple rows are plain tuples with attribute access: no per-row dict
+and no column map, unlike psycopg2 DictRow. Their fields follow the
+column order of the queries that produce them (see RankingRepository and
+KillmailRepository).
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+
+class KillmailRef(NamedTuple):
+    """Killmail to (re)process: id, hash and date."""
+    killmail_id: int
+    kill_hash: str
+    kill_datetime: Optional[datetime] = None
+
+
+class StoredKillmail(NamedTuple):
+    """Stored killmail id and the time its row was written."""
+    killmail_id: int
+    created_at: Optional[datetime]
+
+
+class PilotLosses(NamedTuple):
+    """Losses of one pilot over a period, as aggregated by the ranking queries."""
+    pilot_name: str
+    losses: int
+    total_value: Decimal
+    average_value: Decimal
+    first_loss: datetime
+    last_loss: datetime
+
+
+class MonthlyPilotLosses(NamedTuple):
+    """Losses of one pilot during one month ('YYYY-MM')."""
+    month: str
+    pilot_name: str
+    losses: int
+    total_value: Decimal
@@ -0,0 +1,15 @@
+"""System model module."""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class System:
+    """Solar system row of the systems table."""
+    system_name: str
+    system_id: Optional[int] = None
+
+    @classmethod
+    def create(cls, system_name: str) -> 'System':
+        """Build a system that is not stored yet."""
+        return cls(system_name=system_name)
@@ -0,0 +1,231 @@
+"""Shared HTTP client for zKillboard and ESI."""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.http_cache import DEFAULT_CACHE_PATH, HttpCache
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode br responses)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': os.getenv('ZKILL_USER_AGENT', 'EVE Corp Killmail Tracker - telynor@gmail.com'),
+    'Accept': 'application/json',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Status codes worth retrying (420 is ESI's "error limited")
+RETRY_STATUSES = {420, 429, 500, 502, 503, 504}
+
+
+class ErrorLimitThrottle:
+    """
+    Pace requests to one host from ESI's error-limit and Retry-After headers.
+
+    Above soft_limit remaining errors no delay is added. Below it the
+    remaining error budget is spread over what is left of the reset window,
+    so the pace slows down gradually instead of stopping dead, and at or
+    below hard_limit requests wait for the window to reset.
+    """
+
+    def __init__(self, soft_limit: int = 50, hard_limit: int = 10):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self._lock = threading.Lock()
+        self._remain = None
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+
+    def update(self, headers, status_code: int):
+        """Record the limits announced by a response."""
+        now = time.monotonic()
+        with self._lock:
+            if 'X-Esi-Error-Limit-Remain' in headers:
+                self._remain = int(headers['X-Esi-Error-Limit-Remain'])
+                self._reset_at = now + int(headers.get('X-Esi-Error-Limit-Reset', 60))
+            retry_after = headers.get('Retry-After')
+            if status_code in (420, 429) and retry_after and retry_after.isdigit():
+                self._blocked_until = max(self._blocked_until, now + min(int(retry_after), 300))
+
+    def delay(self) -> float:
+        """Return how long the next request should wait, in seconds."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self._blocked_until - now)
+            if self._remain is None or self._remain >= self.soft_limit or now >= self._reset_at:
+                return wait
+            window = self._reset_at - now
+            if self._remain <= self.hard_limit:
+                return max(wait, window + 1)
+            return max(wait, window / (self._remain - self.hard_limit))
+
+
+class ApiClient:
+    """requests.Session with per-host connection pools, retries with jittered backoff and ESI throttling."""
+
+    def __init__(self, max_retries: int = 3, timeout: int = 30, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, pool_maxsize: int = 10, cache: Optional[HttpCache] = None):
+        """
+        Args:
+            max_retries (int): Attempts per request
+            timeout (int): Socket timeout in seconds
+            backoff_base (float): First retry delay ceiling in seconds, doubled per attempt
+            backoff_max (float): Upper bound of a retry delay
+            pool_maxsize (int): Keep-alive connections kept per host
+            cache (Optional[HttpCache]): Response cache used for conditional GET requests
+        """
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._throttles: Dict[str, ErrorLimitThrottle] = {}
+        self._throttles_lock = threading.Lock()
+        self.requests = 0
+
+    def throttle_for(self, url: str) -> ErrorLimitThrottle:
+        """Return the throttle of the URL's host."""
+        host = urlparse(url).hostname
+        with self._throttles_lock:
+            if host not in self._throttles:
+                self._throttles[host] = ErrorLimitThrottle()
+            return self._throttles[host]
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request_json(self, method: str, url: str, headers: Optional[dict] = None, payload=None,
+                     max_retries: Optional[int] = None, timeout: Optional[int] = None, use_cache: bool = True):
+        """
+        Perform a request and decode its JSON body.
+
+        Args:
+            method (str): HTTP method
+            url (str): Target URL
+            headers (Optional[dict]): Extra headers for this request
+            payload: JSON body for POST requests
+            max_retries (Optional[int]): Overrides the client default
+            timeout (Optional[int]): Overrides the client default
+            use_cache (bool): Set to False for endpoints that must never be replayed (push feeds)
+
+        Returns:
+            The decoded JSON body, an empty dict when the resource does not
+            exist (404) or None when every attempt failed
+        """
+        max_retries = max_retries or self.max_retries
+        use_cache = use_cache and self.cache is not None and method == 'GET'
+        cached = self.cache.get(url) if use_cache else None
+        if cached is not None and cached.is_fresh():
+            self.cache.fresh_hits += 1
+            self.cache.bytes_saved += len(cached.body)
+            return json.loads(cached.body)
+        if cached is not None:
+            headers = {**(headers or {}), **cached.conditional_headers()}
+
+        throttle = self.throttle_for(url)
+        for attempt in range(max_retries):
+            wait_time = throttle.delay()
+            if wait_time > 0:
+                logging.warning(f"Throttling {urlparse(url).hostname} for {wait_time:.1f} seconds")
+                time.sleep(wait_time)
+            try:
+                logging.debug(f"{method} {url} (attempt {attempt + 1}/{max_retries})")
+                self.requests += 1
+                response = self.session.request(method, url, headers=headers, json=payload,
+                                                timeout=timeout or self.timeout)
+                throttle.update(response.headers, response.status_code)
+
+                if response.status_code == 304 and cached is not None:
+                    self.cache.revalidated += 1
+                    self.cache.bytes_saved += len(cached.body)
+                    self.cache.refresh(url, response.headers)
+                    return json.loads(cached.body)
+                if response.status_code == 200:
+                    if use_cache:
+                        self.cache.misses += 1
+                        self.cache.store(url, response.headers, response.content)
+                    return response.json()
+                if response.status_code == 404:
+                    logging.warning(f"Resource not found at URL: {url}")
+                    return {}
+                if response.status_code not in RETRY_STATUSES:
+                    logging.error(f"API request failed for URL: {url} (status {response.status_code})")
+                    logging.error(f"Response content: {response.text[:500]}")
+                    return None
+                logging.warning(f"Retryable status {response.status_code} for URL: {url}")
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Request failed for URL: {url}: {type(e).__name__}: {e}")
+
+            if attempt < max_retries - 1:
+                wait_time = self.backoff(attempt)
+                logging.info(f"Retrying in {wait_time:.1f} seconds...")
+                time.sleep(wait_time)
+
+        logging.error(f"All {max_retries} attempts failed for URL: {url}")
+        return None
+
+    def log_stats(self):
+        """Log request and cache counters for the current run."""
+        logging.info(f"HTTP client: {self.requests} network requests")
+        if self.cache:
+            self.cache.log_stats()
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ApiClient:
+    """
+    Return the process-wide client.
+
+    Configured from HTTP_MAX_RETRIES, HTTP_TIMEOUT, HTTP_CACHE_PATH and
+    HTTP_CACHE_MAX_MB (0 disables the response cache).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            cache_max_mb = int(os.getenv('HTTP_CACHE_MAX_MB', 64))
+            cache = HttpCache(os.getenv('HTTP_CACHE_PATH', DEFAULT_CACHE_PATH),
+                              cache_max_mb * 1024 * 1024) if cache_max_mb > 0 else None
+            _client = ApiClient(
+                max_retries=int(os.getenv('HTTP_MAX_RETRIES', 3)),
+                timeout=int(os.getenv('HTTP_TIMEOUT', 30)),
+                cache=cache
+            )
+        return _client
+
+
+def get_url(url: str, headers: Optional[dict] = None, max_retries: Optional[int] = None,
+            timeout: Optional[int] = None, use_cache: bool = True):
+    """GET a JSON resource through the shared client (see ApiClient.request_json)."""
+    return get_client().request_json('GET', url, headers=headers, max_retries=max_retries, timeout=timeout,
+                                     use_cache=use_cache)
+
+
+def post_url(url: str, payload, headers: Optional[dict] = None, max_retries: Optional[int] = None,
+             timeout: Optional[int] = None):
+    """POST a JSON payload through the shared client (see ApiClient.request_json)."""
+    return get_client().request_json('POST', url, headers=headers, payload=payload,
+                                     max_retries=max_retries, timeout=timeout)
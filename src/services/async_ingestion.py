@@ -0,0 +1,282 @@
+"""Concurrent killmail ingestion pipeline (optional, requires aiohttp)."""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from src.services.api_client import DEFAULT_HEADERS, RETRY_STATUSES, ErrorLimitThrottle
+from src.services.eve_data_provider import cached_names, killmail_url
+from src.services.killmail_archive import get_killmail_archive
+
+# Per-host limits: (max concurrent requests, sustained requests/second, burst)
+HOST_LIMITS = {
+    'zkillboard.com': (2, 1.0, 2),
+    'esi.evetech.net': (20, 20.0, 40),
+}
+DEFAULT_HOST_LIMIT = (4, 5.0, 5)
+
+
+class TokenBucket:
+    """Asynchronous token bucket limiting the request rate to one host."""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncHttpClient:
+    """aiohttp session with a concurrency limit and a token bucket per host."""
+
+    def __init__(self, headers: dict, max_retries: int = 3, timeout: int = 30):
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise ImportError("Async mode requires aiohttp (pip install aiohttp)") from e
+        self._aiohttp = aiohttp
+        self.headers = {**DEFAULT_HEADERS, **headers}
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self._semaphores = {}
+        self._buckets = {}
+        self._throttles = {}
+        self.requests = 0
+
+    async def __aenter__(self):
+        self.session = self._aiohttp.ClientSession(headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.session.close()
+
+    def _limits(self, url: str) -> Tuple[asyncio.Semaphore, TokenBucket, ErrorLimitThrottle]:
+        host = urlparse(url).hostname
+        if host not in self._semaphores:
+            concurrency, rate, burst = HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+            self._semaphores[host] = asyncio.Semaphore(concurrency)
+            self._buckets[host] = TokenBucket(rate, burst)
+            self._throttles[host] = ErrorLimitThrottle()
+        return self._semaphores[host], self._buckets[host], self._throttles[host]
+
+    async def request_json(self, method: str, url: str, payload=None):
+        """
+        Perform a request with per-host limits and retries.
+
+        Returns:
+            The JSON body, an empty dict for a 404 or None when every attempt failed
+        """
+        semaphore, bucket, throttle = self._limits(url)
+        for attempt in range(self.max_retries):
+            try:
+                async with semaphore:
+                    wait_time = throttle.delay()
+                    if wait_time > 0:
+                        logging.warning(f"Throttling {urlparse(url).hostname} for {wait_time:.1f} seconds")
+                        await asyncio.sleep(wait_time)
+                    await bucket.acquire()
+                    self.requests += 1
+                    async with self.session.request(method, url, json=payload) as response:
+                        throttle.update(response.headers, response.status)
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+                        if response.status == 404:
+                            return {}
+                        if response.status not in RETRY_STATUSES:
+                            logging.error(f"API request failed for URL: {url} (status {response.status})")
+                            return None
+                        logging.warning(f"Retryable status {response.status} for URL: {url}")
+            except (self._aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Request failed for URL: {url}: {type(e).__name__}: {e}")
+
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(random.uniform(0, 2 ** attempt))
+
+        logging.error(f"All {self.max_retries} attempts failed for URL: {url}")
+        return None
+
+
+class AsyncKillmailPipeline:
+    """
+    Fetch zKillboard pages and ESI details concurrently and feed a DB writer stage.
+
+    Database access goes through a single worker thread, so the synchronous
+    psycopg2 connection is never shared between threads.
+    """
+
+    def __init__(self, headers: dict, corporation_id: str,
+                 filter_new_kills: Callable[[Iterable[Tuple[int, str]]], Set[int]],
+                 store_kill: Callable[[dict, dict, Dict[int, str]], bool],
+                 newest_kill_date: Optional[datetime] = None,
+                 max_pages: int = 10, queue_size: int = 100,
+                 prepare_page: Optional[Callable[[List[dict], Dict[int, str]], None]] = None,
+                 flush: Optional[Callable[[], int]] = None):
+        """
+        Args:
+            headers (dict): HTTP headers sent to zKillboard and ESI
+            corporation_id (str): Corporation whose kills are ingested
+            filter_new_kills (Callable): (killmail_id, kill_hash) pairs -> ids not stored yet, runs in the DB thread
+            store_kill (Callable): (kill, kill_detail, names) -> bool (kill accepted), runs in the DB thread
+            newest_kill_date (Optional[datetime]): Kills at or before this date are skipped
+            max_pages (int): Maximum number of zKillboard pages to scan
+            queue_size (int): Capacity of the queue feeding the DB writer
+            prepare_page (Optional[Callable]): (kill_details, names) -> None, called once per page
+                before its kills are queued (e.g. dimension prefetch), runs in the DB thread
+            flush (Optional[Callable]): () -> number of kills written, called once every kill has been
+                handed to store_kill (e.g. a final batch writer flush), runs in the DB thread
+        """
+        self.headers = headers
+        self.corporation_id = corporation_id
+        self.filter_new_kills = filter_new_kills
+        self.store_kill = store_kill
+        self.prepare_page = prepare_page
+        self.flush = flush
+        self.newest_kill_date = newest_kill_date
+        self.max_pages = max_pages
+        self.queue_size = queue_size
+        self.http = None
+        self.queue = None
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.accepted = 0
+        self.failed = 0
+
+    async def _in_db_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    @staticmethod
+    async def _in_thread(func, *args):
+        # Blocking local I/O (archive, name cache) kept off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _split_page(self, kills: List) -> Tuple[List[dict], int]:
+        valid_kills = []
+        for kill in kills:
+            if not isinstance(kill, dict) or 'error' in kill:
+                logging.warning(f"Invalid kill data: {kill}")
+                continue
+            if not kill.get('killmail_id') or not kill.get('zkb', {}).get('hash'):
+                logging.warning("Missing killmail_id or hash")
+                continue
+            valid_kills.append(kill)
+        new_ids = self.filter_new_kills((kill['killmail_id'], kill['zkb']['hash']) for kill in valid_kills)
+        new_kills = [kill for kill in valid_kills if kill['killmail_id'] in new_ids]
+        return new_kills, len(valid_kills) - len(new_kills)
+
+    async def _get_killmail(self, killmail_id: int, kill_hash: str) -> Optional[dict]:
+        archive = get_killmail_archive()
+        kill_detail = await self._in_thread(archive.get, killmail_id)
+        if kill_detail is None:
+            kill_detail = await self.http.request_json('GET', killmail_url(killmail_id, kill_hash))
+            if kill_detail:
+                await self._in_thread(archive.put, killmail_id, kill_detail)
+        return kill_detail
+
+    async def _process_page(self, page: int, kills: List[dict]):
+        details = await asyncio.gather(*(
+            self._get_killmail(kill['killmail_id'], kill['zkb']['hash'])
+            for kill in kills
+        ))
+
+        ready = []
+        for kill, kill_detail in zip(kills, details):
+            if not kill_detail:
+                logging.warning(f"Could not get details for kill {kill['killmail_id']}")
+                self.failed += 1
+                continue
+            kill_date = datetime.strptime(kill_detail['killmail_time'], "%Y-%m-%dT%H:%M:%SZ")
+            if self.newest_kill_date and kill_date <= self.newest_kill_date:
+                continue
+            ready.append((kill, kill_detail))
+
+        if not ready:
+            return
+        # Names not known locally are left to the name resolver (resolve_names.py)
+        names = await self._in_thread(cached_names, [kill_detail for _, kill_detail in ready])
+        if self.prepare_page:
+            # Queued in the DB thread ahead of this page's kills, so they find their dimensions cached
+            await self._in_db_thread(self.prepare_page, [kill_detail for _, kill_detail in ready], names)
+        for kill, kill_detail in ready:
+            await self.queue.put((kill, kill_detail, names))
+        logging.info(f"Page {page}: {len(ready)} kills queued for writing")
+
+    async def _writer(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            kill, kill_detail, names = item
+            try:
+                if await self._in_db_thread(self.store_kill, kill, kill_detail, names):
+                    self.accepted += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error storing kill {kill.get('killmail_id')}: {e}")
+
+    async def run(self) -> int:
+        """
+        Run the pipeline until no new kills are found or max_pages is reached.
+
+        Returns:
+            int: Number of kills written (flush result, or the kills accepted by store_kill without flush)
+        """
+        started = time.monotonic()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        async with AsyncHttpClient(self.headers) as http:
+            self.http = http
+            writer = asyncio.create_task(self._writer())
+            page_tasks = []
+            try:
+                for page in range(1, self.max_pages + 1):
+                    url = f"https://zkillboard.com/api/corporationID/{self.corporation_id}/page/{page}/"
+                    kills = await http.request_json('GET', url)
+                    if not kills:
+                        logging.info("No more kills available")
+                        break
+
+                    new_kills, existing = await self._in_db_thread(self._split_page, kills)
+                    logging.info(f"Page {page}: {len(new_kills)} new kills, {existing} already stored")
+                    if new_kills:
+                        # Details of this page are fetched while the next page is requested
+                        page_tasks.append(asyncio.create_task(self._process_page(page, new_kills)))
+                    elif existing:
+                        logging.info("No new kills found on this page, stopping update")
+                        break
+                await asyncio.gather(*page_tasks)
+            finally:
+                await self.queue.put(None)
+                await writer
+                try:
+                    written = await self._in_db_thread(self.flush) if self.flush else self.accepted
+                finally:
+                    self._db_executor.shutdown(wait=True)
+
+        elapsed = time.monotonic() - started
+        rate = written / elapsed if elapsed > 0 else 0.0
+        logging.info(f"Async batch complete: {written} kills written ({self.accepted} accepted), "
+                     f"{self.failed} failed, {http.requests} HTTP requests in {elapsed:.1f}s ({rate:.2f} kills/s)")
+        return written
@@ -0,0 +1,207 @@
+"""Helpers shared by the ESI enrichment paths."""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.services.api_client import get_url, post_url
+from src.services.killmail_archive import get_killmail_archive
+from src.services.name_cache import UNKNOWN_NAME, get_name_cache
+from src.services.static_data import get_static_data
+
+ESI_BASE_URL = "https://esi.evetech.net/latest"
+ESI_NAMES_URL = f"{ESI_BASE_URL}/universe/names/?datasource=tranquility"
+NAMES_BATCH_SIZE = 1000  # ESI limit for /universe/names/
+
+
+def killmail_url(killmail_id: int, kill_hash: str) -> str:
+    """Return the ESI URL of a killmail."""
+    return f"{ESI_BASE_URL}/killmails/{killmail_id}/{kill_hash}/?datasource=tranquility"
+
+
+def get_killmail(killmail_id: int, kill_hash: str, headers: Optional[dict] = None) -> Optional[dict]:
+    """
+    Return the ESI body of a killmail, from the local archive when it was fetched before.
+
+    Args:
+        killmail_id (int): Killmail identifier
+        kill_hash (str): zKillboard hash of the killmail
+        headers (Optional[dict]): Extra HTTP headers
+
+    Returns:
+        Optional[dict]: Killmail body, or a falsy value when ESI could not provide it
+    """
+    archive = get_killmail_archive()
+    kill_detail = archive.get(killmail_id)
+    if kill_detail is not None:
+        return kill_detail
+    kill_detail = get_url(killmail_url(killmail_id, kill_hash), headers, use_cache=False)
+    if kill_detail:
+        archive.put(killmail_id, kill_detail)
+    return kill_detail
+
+
+def collect_entity_ids(kill_details: List[Dict]) -> Dict[int, str]:
+    """
+    Map every ESI id referenced by killmails to the entity type used by the name cache.
+
+    Args:
+        kill_details (List[Dict]): ESI killmail bodies
+
+    Returns:
+        Dict[int, str]: entity id -> entity type ('characters', 'universe/systems', ...)
+    """
+    entity_ids = {}
+    for kill_detail in kill_details:
+        victim = kill_detail.get('victim', {})
+        entity_ids[kill_detail.get('solar_system_id')] = 'universe/systems'
+        entity_ids[victim.get('ship_type_id')] = 'universe/types'
+        entity_ids[victim.get('character_id')] = 'characters'
+        entity_ids[victim.get('corporation_id')] = 'corporations'
+        for attacker in kill_detail.get('attackers', []):
+            entity_ids[attacker.get('character_id')] = 'characters'
+            entity_ids[attacker.get('corporation_id')] = 'corporations'
+    entity_ids.pop(None, None)
+    return entity_ids
+
+
+def get_entity_info(entity_id, entity_type: str, headers: Optional[dict] = None) -> str:
+    """
+    Return the name of an ESI entity, through the persistent name cache.
+
+    Args:
+        entity_id: ESI identifier (falsy ids resolve to "Unknown")
+        entity_type (str): ESI path such as 'characters', 'corporations' or 'universe/systems'
+        headers (Optional[dict]): Extra HTTP headers
+
+    Returns:
+        str: Entity name or "Unknown"
+    """
+    if not entity_id:
+        return UNKNOWN_NAME
+    static_name = get_static_data().name(entity_id, entity_type)
+    if static_name:
+        return static_name
+    url = f"{ESI_BASE_URL}/{entity_type}/{entity_id}/?datasource=tranquility"
+    try:
+        return get_name_cache().resolve(entity_type, entity_id, lambda: get_url(url, headers))
+    except Exception as e:
+        logging.error(f"Error resolving {entity_type} {entity_id}: {e}")
+        return UNKNOWN_NAME
+
+
+def get_ship_type(ship_type_id, headers: Optional[dict] = None) -> str:
+    """Return the group name (ship class) of a type, cached per type id."""
+    group_name = get_static_data().group_name(ship_type_id)
+    if group_name:
+        return group_name
+
+    def fetch_group():
+        response = get_url(f"{ESI_BASE_URL}/universe/types/{ship_type_id}/?datasource=tranquility", headers)
+        group_id = response.get('group_id') if response else None
+        if group_id:
+            return get_url(f"{ESI_BASE_URL}/universe/groups/{group_id}/?datasource=tranquility", headers)
+        return response if response is None else {}
+
+    try:
+        return get_name_cache().resolve('ship_groups', ship_type_id, fetch_group)
+    except Exception as e:
+        logging.error(f"Error resolving ship group of type {ship_type_id}: {e}")
+        return UNKNOWN_NAME
+
+
+def known_ship_type(ship_type_id) -> Optional[str]:
+    """Return the group name of a type from the SDE or the name cache, without any HTTP call."""
+    group_name = get_static_data().group_name(ship_type_id)
+    if group_name:
+        return group_name
+    cached, group_name = get_name_cache().get('ship_groups', ship_type_id)
+    return group_name if cached else None
+
+
+def _post_names_batch(ids: List[int], entity_ids: Dict[int, str], headers: Optional[dict]) -> Dict[int, str]:
+    response = post_url(ESI_NAMES_URL, ids, headers)
+    if response is None:
+        return {}  # Left unresolved, get_entity_info retries them one by one
+
+    cache = get_name_cache()
+    if not response:
+        # ESI rejects the whole batch when one id is invalid: split until it is isolated
+        if len(ids) == 1:
+            cache.set_not_found(entity_ids[ids[0]], ids)
+            return {ids[0]: UNKNOWN_NAME}
+        middle = len(ids) // 2
+        names = _post_names_batch(ids[:middle], entity_ids, headers)
+        names.update(_post_names_batch(ids[middle:], entity_ids, headers))
+        return names
+
+    names = {}
+    by_type = {}
+    for entry in response:
+        names[entry['id']] = entry['name']
+        by_type.setdefault(entity_ids.get(entry['id'], entry.get('category')), {})[entry['id']] = entry['name']
+    for entity_type, type_names in by_type.items():
+        cache.set_many(entity_type, type_names)
+    return names
+
+
+def known_names(entity_ids: Dict[int, str]) -> Tuple[Dict[int, Optional[str]], List[int]]:
+    """
+    Split entity ids into names known locally (SDE, name cache) and ids still to resolve.
+
+    Args:
+        entity_ids (Dict[int, str]): entity id -> entity type
+
+    Returns:
+        Tuple[Dict[int, Optional[str]], List[int]]: (entity id -> name, None for ids cached
+        as unknown to ESI, unresolved ids)
+    """
+    cache = get_name_cache()
+    static_data = get_static_data()
+
+    names = {}
+    unresolved = []
+    for entity_id, entity_type in entity_ids.items():
+        static_name = static_data.name(entity_id, entity_type)
+        if static_name:
+            names[entity_id] = static_name
+            continue
+        cached, name = cache.get(entity_type, entity_id)
+        if cached:
+            names[entity_id] = name
+        else:
+            unresolved.append(entity_id)
+    return names, unresolved
+
+
+def resolve_entity_names(entity_ids: Dict[int, str], headers: Optional[dict] = None) -> Dict[int, str]:
+    """
+    Resolve a set of ESI ids of any type.
+
+    SDE and cached names are served locally, the rest goes through
+    POST /universe/names/ in batches of NAMES_BATCH_SIZE. Ids ESI does not
+    know resolve to "Unknown"; ids left out after an HTTP failure are missing
+    from the result.
+
+    Args:
+        entity_ids (Dict[int, str]): entity id -> entity type ('characters', 'universe/systems', ...)
+        headers (Optional[dict]): Extra HTTP headers
+
+    Returns:
+        Dict[int, str]: entity id -> name
+    """
+    names, unresolved = known_names(entity_ids)
+    names = {entity_id: UNKNOWN_NAME if name is None else name for entity_id, name in names.items()}
+    for start in range(0, len(unresolved), NAMES_BATCH_SIZE):
+        names.update(_post_names_batch(unresolved[start:start + NAMES_BATCH_SIZE], entity_ids, headers))
+    logging.info(f"Resolved {len(names)}/{len(entity_ids)} names "
+                 f"({len(unresolved)} through /universe/names/)")
+    return names
+
+
+def cached_names(kill_details: List[Dict]) -> Dict[int, Optional[str]]:
+    """
+    Return the names of the ids referenced by killmails that are known without any HTTP call.
+
+    Ids cached as unknown to ESI map to None, so they are stored without a name.
+    """
+    return known_names(collect_entity_ids(kill_details))[0]
+
@@ -0,0 +1,155 @@
+"""Persistent HTTP response cache with ETag / Last-Modified revalidation."""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "http.sqlite3")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class CachedResponse(NamedTuple):
+    """Stored response body and validators."""
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: Optional[float]
+
+    def is_fresh(self) -> bool:
+        """True when the response may be served without contacting the server."""
+        return self.expires_at is not None and self.expires_at > time.time()
+
+    def conditional_headers(self) -> dict:
+        """Headers turning the next request into a conditional one."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def expiry_from_headers(headers) -> Optional[float]:
+    """Return the absolute expiry time announced by Cache-Control or Expires, if any."""
+    cache_control = headers.get('Cache-Control', '')
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return None
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return time.time() + int(match.group(1))
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+class HttpCache:
+    """SQLite store of GET responses keyed by URL, evicted least recently used beyond max_bytes."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path (str): Path of the SQLite file
+            max_bytes (int): Upper bound of the compressed bodies kept on disk
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_responses_accessed ON http_responses(accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_responses").fetchone()[0]
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the stored response for a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM http_responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE http_responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            return CachedResponse(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def store(self, url: str, headers, body: bytes):
+        """Store a 200 response if it carries a validator or an expiry."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        expires_at = expiry_from_headers(headers)
+        if not (etag or last_modified or expires_at):
+            return
+        compressed = zlib.compress(body)
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM http_responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_responses (url, body, size, etag, last_modified, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, compressed, len(compressed), etag, last_modified, expires_at, time.time())
+            )
+            self._total_bytes += len(compressed) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url: str, headers):
+        """Extend the expiry of an entry after a 304 Not Modified."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_responses SET expires_at = ?, etag = COALESCE(?, etag) WHERE url = ?",
+                (expiry_from_headers(headers), headers.get('ETag'), url)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM http_responses ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for url, size in rows:
+                self._conn.execute("DELETE FROM http_responses WHERE url = ?", (url,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def log_stats(self):
+        """Log hit/304/miss counters for the current run."""
+        lookups = self.fresh_hits + self.revalidated + self.misses
+        logging.info(
+            f"HTTP cache: {lookups} cacheable requests, {self.fresh_hits} served fresh, "
+            f"{self.revalidated} revalidated (304), {self.misses} misses, "
+            f"{self.bytes_saved / 1024:.0f} KiB not downloaded, {self._total_bytes / 1024:.0f} KiB stored"
+        )
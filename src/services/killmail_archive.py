@@ -0,0 +1,300 @@
+"""Append-only local archive of raw ESI killmail bodies."""
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_ARCHIVE_PATH = os.path.join("cache", "killmails")
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Segment record: killmail_id, codec, payload length, then the compressed JSON
+RECORD_HEADER = struct.Struct('<QBI')
+# Index file header: magic, version, slot capacity, entries, current segment, committed end of that segment
+INDEX_HEADER = struct.Struct('<4sIQQQQ')
+INDEX_MAGIC = b'KMIX'
+INDEX_VERSION = 1
+# Index slot (open addressing, linear probing, killmail_id 0 marks an empty slot)
+INDEX_SLOT = struct.Struct('<QQII')
+INITIAL_CAPACITY = 1 << 16
+MAX_LOAD = 0.6
+_FIBONACCI = 0x9E3779B97F4A7C15
+
+
+class KillmailArchive:
+    """
+    Compressed segment files plus a memory-mapped hash index killmail_id -> (segment, offset).
+
+    Killmails are immutable, so each body is appended once and never rewritten.
+    A lookup hashes the id into the mapped index and reads the record with a
+    single pread, whatever the size of the archive. The index header records
+    how far the current segment was indexed; on open, records written after
+    that point by an interrupted run are indexed again and a torn tail is cut.
+
+    Several processes may share an archive (the cron fetch, the listener, the
+    backfill scripts): writers hold an exclusive flock on index.lock, readers
+    a shared one, and after locking each process re-reads the index header,
+    remapping index.bin if another process grew it and following the current
+    segment, so appends never interleave.
+    """
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_PATH, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        """
+        Args:
+            path (str): Directory holding the segments and index.bin
+            segment_bytes (int): Size after which a new segment is started
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._readers: Dict[int, int] = {}
+        self._compressor = zstandard.ZstdCompressor(level=9) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self._lock_file = open(os.path.join(path, "index.lock"), 'a+b')
+        with self._locked(fcntl.LOCK_EX):
+            index_path = os.path.join(path, "index.bin")
+            if not os.path.exists(index_path):
+                self._create_index(index_path, INITIAL_CAPACITY)
+            self._open_index()
+            self._writer = open(self._segment_path(self._segment), 'ab')
+            self._recover()
+
+    # Index
+
+    @contextmanager
+    def _locked(self, operation: int):
+        """Hold the inter-process lock of the archive (fcntl.LOCK_SH or LOCK_EX)."""
+        fcntl.flock(self._lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open_index(self):
+        self._index_file = open(os.path.join(self.path, "index.bin"), 'r+b')
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+        self._read_header()
+
+    def _sync(self):
+        """Catch up with the writes of other processes; called with the flock held."""
+        if os.stat(os.path.join(self.path, "index.bin")).st_ino != os.fstat(self._index_file.fileno()).st_ino:
+            # Grown by another process: the old mapping is an unlinked copy
+            self._index.close()
+            self._index_file.close()
+            self._open_index()
+        else:
+            self._read_header()
+        if self._writer.name != self._segment_path(self._segment):
+            self._writer.close()
+            self._writer = open(self._segment_path(self._segment), 'ab')
+
+    @staticmethod
+    def _create_index(index_path: str, capacity: int, segment: int = 0, end: int = 0):
+        with open(index_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, capacity, 0, segment, end))
+            f.truncate(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+
+    def _read_header(self):
+        magic, version, self._capacity, self._count, self._segment, self._end = \
+            INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{self.path}/index.bin is not a killmail archive index")
+        self._shift = 64 - (self._capacity.bit_length() - 1)
+
+    def _write_header(self):
+        INDEX_HEADER.pack_into(self._index, 0, INDEX_MAGIC, INDEX_VERSION,
+                               self._capacity, self._count, self._segment, self._end)
+
+    def _find_slot(self, killmail_id: int):
+        """Return (slot offset, stored entry or None) for a killmail id."""
+        slot = ((killmail_id * _FIBONACCI) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        mask = self._capacity - 1
+        while True:
+            position = INDEX_HEADER.size + slot * INDEX_SLOT.size
+            entry = INDEX_SLOT.unpack_from(self._index, position)
+            if entry[0] == killmail_id:
+                return position, entry
+            if entry[0] == 0:
+                return position, None
+            slot = (slot + 1) & mask
+
+    def _index_put(self, killmail_id: int, segment: int, offset: int, length: int):
+        if (self._count + 1) > self._capacity * MAX_LOAD:
+            self._grow()
+        position, entry = self._find_slot(killmail_id)
+        INDEX_SLOT.pack_into(self._index, position, killmail_id, offset, segment, length)
+        if entry is None:
+            self._count += 1
+
+    def _grow(self):
+        """Rehash into an index twice as large, swapped in atomically."""
+        index_path = os.path.join(self.path, "index.bin")
+        tmp_path = index_path + ".tmp"
+        entries = []
+        for slot in range(self._capacity):
+            entry = INDEX_SLOT.unpack_from(self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+            if entry[0]:
+                entries.append(entry)
+        self._create_index(tmp_path, self._capacity * 2, self._segment, self._end)
+        self._index.close()
+        self._index_file.close()
+        os.replace(tmp_path, index_path)
+        self._open_index()
+        for killmail_id, offset, segment, length in entries:
+            position, _ = self._find_slot(killmail_id)
+            INDEX_SLOT.pack_into(self._index, position, killmail_id, offset, segment, length)
+        self._count = len(entries)
+        self._write_header()
+        logging.info(f"Killmail archive index grown to {self._capacity} slots")
+
+    # Segments
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment_{segment:06d}.dat")
+
+    def _reader(self, segment: int) -> int:
+        if segment not in self._readers:
+            self._readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        return self._readers[segment]
+
+    def _recover(self):
+        """Index the records appended after the last committed position, cut a partial tail."""
+        self._writer.flush()
+        size = os.path.getsize(self._segment_path(self._segment))
+        if size == self._end:
+            return
+        recovered = 0
+        with open(self._segment_path(self._segment), 'rb') as f:
+            f.seek(self._end)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                killmail_id, _, length = RECORD_HEADER.unpack(header)
+                offset = f.tell()
+                if len(f.read(length)) < length:
+                    break
+                self._index_put(killmail_id, self._segment, offset, length)
+                self._end = offset + length
+                recovered += 1
+        if self._end < size:
+            self._writer.truncate(self._end)
+        self._write_header()
+        self._index.flush()
+        logging.warning(f"Killmail archive recovered {recovered} records, "
+                        f"dropped {size - self._end} bytes of incomplete tail")
+
+    def _compress(self, data: bytes):
+        if self._compressor:
+            return CODEC_ZSTD, self._compressor.compress(data)
+        return CODEC_ZLIB, zlib.compress(data, 9)
+
+    def _decompress(self, codec: int, payload: bytes) -> bytes:
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload)
+        if codec == CODEC_ZSTD and self._decompressor:
+            return self._decompressor.decompress(payload)
+        raise ValueError(f"Killmail archive record uses codec {codec}, install zstandard to read it")
+
+    # Public API
+
+    def get(self, killmail_id: int) -> Optional[dict]:
+        """Return the archived ESI body of a killmail, or None."""
+        with self._lock, self._locked(fcntl.LOCK_SH):
+            self._sync()
+            _, entry = self._find_slot(int(killmail_id))
+            if entry is None:
+                self.misses += 1
+                return None
+            _, offset, segment, length = entry
+            record = os.pread(self._reader(segment), RECORD_HEADER.size + length, offset - RECORD_HEADER.size)
+        stored_id, codec, _ = RECORD_HEADER.unpack_from(record)
+        if stored_id != int(killmail_id):
+            logging.error(f"Killmail archive index points to the wrong record for {killmail_id}")
+            return None
+        self.hits += 1
+        return json.loads(self._decompress(codec, record[RECORD_HEADER.size:]))
+
+    def __contains__(self, killmail_id) -> bool:
+        with self._lock, self._locked(fcntl.LOCK_SH):
+            self._sync()
+            return self._find_slot(int(killmail_id))[1] is not None
+
+    def put(self, killmail_id: int, kill_detail: dict) -> bool:
+        """
+        Append a killmail body unless it is already archived.
+
+        Returns:
+            bool: True when the body was written
+        """
+        killmail_id = int(killmail_id)
+        codec, payload = self._compress(json.dumps(kill_detail, separators=(',', ':')).encode())
+        with self._lock, self._locked(fcntl.LOCK_EX):
+            self._sync()
+            if self._find_slot(killmail_id)[1] is not None:
+                return False
+            if self._end >= self.segment_bytes:
+                self._writer.close()
+                self._segment += 1
+                self._end = 0
+                self._writer = open(self._segment_path(self._segment), 'ab')
+            self._writer.write(RECORD_HEADER.pack(killmail_id, codec, len(payload)))
+            self._writer.write(payload)
+            self._writer.flush()
+            offset = self._end + RECORD_HEADER.size
+            self._index_put(killmail_id, self._segment, offset, len(payload))
+            self._end = offset + len(payload)
+            self._write_header()
+            self.stored += 1
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def log_stats(self):
+        """Log hit/miss counters for the current run."""
+        logging.info(f"Killmail archive: {self._count} killmails archived, {self.hits} served locally, "
+                     f"{self.misses} misses, {self.stored} added this run")
+
+    def close(self):
+        """Flush the index and close every file."""
+        with self._lock:
+            self._writer.close()
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers.clear()
+            self._index.flush()
+            self._index.close()
+            self._index_file.close()
+            self._lock_file.close()
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_killmail_archive() -> KillmailArchive:
+    """Return the process-wide archive, opened on first use from KILLMAIL_ARCHIVE_PATH."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = KillmailArchive(os.getenv('KILLMAIL_ARCHIVE_PATH', DEFAULT_ARCHIVE_PATH))
+        return _archive
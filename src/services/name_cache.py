@@ -0,0 +1,181 @@
+"""Persistent name-resolution cache for ESI entities."""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+UNKNOWN_NAME = "Unknown"
+# Shown in place of a name the resolver has not filled in yet
+PENDING_NAME = "pending"
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "names.sqlite3")
+
+# Time to live (seconds) per ESI entity type, None means the entry never expires
+ENTITY_TTLS = {
+    'universe/systems': None,
+    'universe/types': None,
+    'universe/groups': None,
+    'ship_groups': None,
+    'corporations': 3 * 24 * 3600,
+    'alliances': 3 * 24 * 3600,
+    'characters': 6 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# How long a 404 is remembered before ESI is asked again
+NEGATIVE_TTL = 24 * 3600
+
+
+class NameCache:
+    """SQLite backed cache of (entity_type, entity_id) -> name with TTL and negative entries."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path (str): Path of the SQLite file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entity_names (
+                entity_type TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                name TEXT,
+                expires_at REAL,
+                PRIMARY KEY (entity_type, entity_id)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _expiry(entity_type: str, negative: bool = False) -> Optional[float]:
+        ttl = ENTITY_TTLS.get(entity_type, DEFAULT_TTL)
+        if negative:
+            ttl = NEGATIVE_TTL if ttl is None else min(ttl, NEGATIVE_TTL)
+        return None if ttl is None else time.time() + ttl
+
+    def get(self, entity_type: str, entity_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a cached name.
+
+        Args:
+            entity_type (str): ESI entity path (e.g. 'characters', 'universe/systems')
+            entity_id (int): ESI identifier
+
+        Returns:
+            Tuple[bool, Optional[str]]: (True, name) on a hit, (True, None) for a cached 404,
+            (False, None) on a miss or an expired entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, expires_at FROM entity_names WHERE entity_type = ? AND entity_id = ?",
+                (entity_type, int(entity_id))
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                self.misses += 1
+                return False, None
+            if row[0] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, row[0]
+
+    def set(self, entity_type: str, entity_id: int, name: str):
+        """Store a resolved name."""
+        self.set_many(entity_type, {entity_id: name})
+
+    def set_many(self, entity_type: str, names: Dict[int, str]):
+        """Store several resolved names of the same entity type in one transaction."""
+        expires_at = self._expiry(entity_type)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entity_names (entity_type, entity_id, name, expires_at) VALUES (?, ?, ?, ?)",
+                [(entity_type, int(entity_id), name, expires_at) for entity_id, name in names.items()]
+            )
+            self._conn.commit()
+
+    def set_not_found(self, entity_type: str, entity_ids: Iterable[int]):
+        """Remember that ESI answered 404 for these identifiers."""
+        expires_at = self._expiry(entity_type, negative=True)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entity_names (entity_type, entity_id, name, expires_at) VALUES (?, ?, NULL, ?)",
+                [(entity_type, int(entity_id), expires_at) for entity_id in entity_ids]
+            )
+            self._conn.commit()
+
+    def resolve(self, entity_type: str, entity_id: int, fetch: Callable[[], Optional[dict]]) -> str:
+        """
+        Return the cached name or fetch it from ESI and cache the answer.
+
+        Args:
+            entity_type (str): ESI entity path
+            entity_id (int): ESI identifier
+            fetch (Callable): Performs the ESI request, returns the JSON body,
+                an empty dict for a 404 or None when the request failed
+
+        Returns:
+            str: Entity name, or "Unknown" when it could not be resolved
+        """
+        cached, name = self.get(entity_type, entity_id)
+        if cached:
+            return name if name is not None else UNKNOWN_NAME
+
+        response = fetch()
+        if response:
+            name = response.get('name', UNKNOWN_NAME)
+            self.set(entity_type, entity_id, name)
+            return name
+        if response is not None:
+            # Empty body means ESI answered 404, transient failures are not cached
+            self.set_not_found(entity_type, [entity_id])
+        return UNKNOWN_NAME
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entity_names WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def log_stats(self):
+        """Log hit/miss counters for the current run."""
+        lookups = self.hits + self.negative_hits + self.misses
+        ratio = (self.hits + self.negative_hits) / lookups * 100 if lookups else 0.0
+        logging.info(
+            f"Name cache: {lookups} lookups, {self.hits} hits, {self.negative_hits} negative hits, "
+            f"{self.misses} misses ({ratio:.1f}% hit rate)"
+        )
+
+    def close(self):
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_name_cache = None
+
+
+def get_name_cache() -> NameCache:
+    """Return the process-wide cache, opened on first use from NAME_CACHE_PATH."""
+    global _name_cache
+    if _name_cache is None:
+        _name_cache = NameCache(os.getenv('NAME_CACHE_PATH', DEFAULT_CACHE_PATH))
+        _name_cache.purge_expired()
+    return _name_cache
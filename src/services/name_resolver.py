@@ -0,0 +1,177 @@
+"""Background resolution of the dimension names left empty by the insert path."""
+import logging
+import time
+from typing import Dict, Optional
+
+from psycopg2.extras import execute_values
+
+from src.database.dimension_cache import DIMENSIONS
+from src.services.eve_data_provider import NAMES_BATCH_SIZE, get_ship_type, resolve_entity_names
+from src.services.name_cache import PENDING_NAME, UNKNOWN_NAME
+
+# Dimension -> entity type of its esi_id in the name cache
+ENTITY_TYPES = {
+    'systems': 'universe/systems',
+    'ships': 'universe/types',
+    'pilots': 'characters',
+    'corporations': 'corporations',
+}
+# Ship classes are resolved one type at a time (two ESI calls each), so in smaller passes
+SHIP_CLASS_BATCH_SIZE = 100
+
+
+class NameResolver:
+    """
+    Fill in the names of systems, ships, pilots and corporations stored by ESI id only.
+
+    Each pass picks up to batch_size unnamed rows per dimension, resolves
+    them with POST /universe/names/ (through the name cache), writes the
+    names back and replaces the 'pending' placeholder of the attacker rows
+    whose pilot got a name. Ships without a class get one from
+    get_ship_type(). Ids that fail to resolve stay pending for the next pass.
+    """
+
+    def __init__(self, db, headers: Optional[dict] = None, batch_size: int = NAMES_BATCH_SIZE):
+        """
+        Args:
+            db: Connected src.database.DatabaseConnection
+            headers (Optional[dict]): Extra HTTP headers sent to ESI
+            batch_size (int): Rows picked up per dimension and pass
+        """
+        self.db = db
+        self.headers = headers
+        self.batch_size = batch_size
+        self.resolved = 0
+        self.attackers_updated = 0
+
+    def backlog(self) -> Dict[str, int]:
+        """
+        Return the number of unresolved rows per dimension.
+
+        Returns:
+            Dict[str, int]: dimension -> rows without a name ('ship_classes' and 'attackers' included)
+        """
+        counts = {}
+        try:
+            for dimension in ENTITY_TYPES:
+                table, _, name_column = DIMENSIONS[dimension]
+                self.db.cur.execute(f"SELECT COUNT(*) FROM {table} WHERE {name_column} IS NULL")
+                counts[dimension] = self.db.cur.fetchone()[0]
+            self.db.cur.execute("SELECT COUNT(*) FROM ships WHERE ship_type_id IS NULL AND esi_id IS NOT NULL")
+            counts['ship_classes'] = self.db.cur.fetchone()[0]
+            self.db.cur.execute("SELECT COUNT(*) FROM killmail_attackers WHERE pilot_name = %s", (PENDING_NAME,))
+            counts['attackers'] = self.db.cur.fetchone()[0]
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error counting unresolved names: {e}")
+            raise
+        return counts
+
+    def log_backlog(self) -> int:
+        """Log the unresolved backlog and return its total size."""
+        counts = self.backlog()
+        total = sum(counts.values())
+        logging.info(f"Unresolved names backlog: {total} (" +
+                     ", ".join(f"{count} {dimension}" for dimension, count in counts.items()) + ")")
+        return total
+
+    def _resolve_names(self) -> int:
+        pending = {}
+        for dimension in ENTITY_TYPES:
+            table, _, name_column = DIMENSIONS[dimension]
+            self.db.cur.execute(
+                f"SELECT esi_id FROM {table} WHERE {name_column} IS NULL ORDER BY esi_id LIMIT %s",
+                (self.batch_size,)
+            )
+            pending[dimension] = [row[0] for row in self.db.cur.fetchall()]
+        self.db.conn.commit()
+
+        entity_ids = {esi_id: ENTITY_TYPES[dimension] for dimension, ids in pending.items() for esi_id in ids}
+        if not entity_ids:
+            return 0
+        names = resolve_entity_names(entity_ids, self.headers)
+
+        resolved = 0
+        for dimension, ids in pending.items():
+            rows = [(esi_id, names[esi_id]) for esi_id in ids if esi_id in names]
+            if not rows:
+                continue
+            table, _, name_column = DIMENSIONS[dimension]
+            updated = execute_values(self.db.cur, f"""
+                UPDATE {table} SET {name_column} = v.name
+                FROM (VALUES %s) AS v (esi_id, name)
+                WHERE {table}.esi_id = v.esi_id AND {table}.{name_column} IS NULL
+                RETURNING {table}.esi_id
+            """, rows, template="(%s::bigint, %s)", page_size=1000, fetch=True)
+            resolved += len(updated)
+        return resolved
+
+    def _resolve_ship_classes(self) -> int:
+        self.db.cur.execute(
+            "SELECT esi_id FROM ships WHERE ship_type_id IS NULL AND esi_id IS NOT NULL ORDER BY esi_id LIMIT %s",
+            (min(self.batch_size, SHIP_CLASS_BATCH_SIZE),)
+        )
+        type_ids = [row[0] for row in self.db.cur.fetchall()]
+        self.db.conn.commit()
+        classes = {type_id: get_ship_type(type_id, self.headers) for type_id in type_ids}
+        classes = {type_id: name for type_id, name in classes.items() if name and name != UNKNOWN_NAME}
+        if not classes:
+            return 0
+        execute_values(self.db.cur, """
+            INSERT INTO ship_types (type_name) VALUES %s
+            ON CONFLICT (type_name) DO NOTHING
+        """, [(name,) for name in set(classes.values())])
+        updated = execute_values(self.db.cur, """
+            UPDATE ships SET ship_type_id = st.ship_type_id
+            FROM (VALUES %s) AS v (esi_id, type_name)
+            JOIN ship_types st ON st.type_name = v.type_name
+            WHERE ships.esi_id = v.esi_id AND ships.ship_type_id IS NULL
+            RETURNING ships.esi_id
+        """, list(classes.items()), template="(%s::bigint, %s)", page_size=1000, fetch=True)
+        return len(updated)
+
+    def _fill_attacker_names(self) -> int:
+        self.db.cur.execute("""
+            UPDATE killmail_attackers ka SET pilot_name = p.pilot_name
+            FROM pilots p
+            WHERE ka.pilot_id = p.pilot_id AND ka.pilot_name = %s AND p.pilot_name IS NOT NULL
+        """, (PENDING_NAME,))
+        return self.db.cur.rowcount
+
+    def run_once(self) -> int:
+        """
+        Run one resolution pass and commit it.
+
+        Returns:
+            int: Number of dimension rows that got a name or a ship class
+        """
+        try:
+            resolved = self._resolve_names() + self._resolve_ship_classes()
+            attackers = self._fill_attacker_names()
+            self.db.conn.commit()
+        except Exception as e:
+            self.db.conn.rollback()
+            logging.error(f"Error writing resolved names: {e}")
+            raise
+        self.resolved += resolved
+        self.attackers_updated += attackers
+        logging.info(f"Name resolver pass: {resolved} rows named, {attackers} attacker rows updated")
+        return resolved
+
+    def run(self, interval: Optional[float] = None):
+        """
+        Resolve the backlog until a pass makes no progress, then stop or, with an interval, wait and start over.
+
+        Args:
+            interval (Optional[float]): Seconds between rounds in worker mode (None: run once)
+        """
+        while True:
+            while self.run_once():
+                self.log_backlog()
+            remaining = self.log_backlog()
+            if interval is None:
+                logging.info(f"Name resolver: {self.resolved} rows named, {self.attackers_updated} attacker rows "
+                             f"updated, {remaining} still pending")
+                return
+            time.sleep(interval)
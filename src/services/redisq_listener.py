@@ -0,0 +1,147 @@
+"""Long-polling listener for the zKillboard RedisQ push feed."""
+import logging
+import random
+import time
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+from src.services.api_client import get_url
+from src.services.eve_data_provider import get_killmail
+
+DEFAULT_REDISQ_URL = "https://zkillredisq.stream/listen.php"
+
+
+def involved_corporations(kill_detail: dict) -> Set[int]:
+    """Return the victim and attacker corporation ids of an ESI killmail."""
+    corporations = {kill_detail.get('victim', {}).get('corporation_id')}
+    corporations.update(attacker.get('corporation_id') for attacker in kill_detail.get('attackers', []))
+    corporations.discard(None)
+    return corporations
+
+
+class RedisQListener:
+    """
+    Consume RedisQ packages, keep the ones involving our corporations and hand them to a callback.
+
+    Failed polls are retried with capped exponential backoff. When the feed
+    was unreachable for longer than gap_threshold seconds, on_gap is called
+    once the connection is back so the caller can backfill by page polling.
+    """
+
+    def __init__(self, queue_id: str, corporation_ids: Iterable[int],
+                 handle_kill: Callable[[dict, dict, int], None],
+                 on_gap: Optional[Callable[[], None]] = None,
+                 url: str = DEFAULT_REDISQ_URL, ttw: int = 10,
+                 max_backoff: float = 300.0, gap_threshold: float = 300.0):
+        """
+        Args:
+            queue_id (str): RedisQ queue identifier, unique per consumer
+            corporation_ids (Iterable[int]): Corporations whose kills and losses are kept
+            handle_kill (Callable): (kill, kill_detail, corporation_id) for every matching kill,
+                kill has the zKillboard page shape {'killmail_id', 'zkb'}
+            on_gap (Optional[Callable]): Called after an outage longer than gap_threshold
+            url (str): Feed URL, overridable to point at a local stand-in server
+            ttw (int): Seconds the server may hold a poll open when no kill is pending
+            max_backoff (float): Upper bound of the reconnect delay
+            gap_threshold (float): Outage duration triggering on_gap
+        """
+        self.queue_id = queue_id
+        self.corporation_ids = {int(corporation_id) for corporation_id in corporation_ids}
+        self.handle_kill = handle_kill
+        self.on_gap = on_gap
+        self.url = url
+        self.ttw = ttw
+        self.max_backoff = max_backoff
+        self.gap_threshold = gap_threshold
+        self.received = 0
+        self.matched = 0
+        self._running = False
+
+    def poll(self) -> Optional[dict]:
+        """
+        Perform one long poll.
+
+        Returns:
+            The response body ({'package': ...}), or a falsy value when the feed is unreachable
+        """
+        return get_url(f"{self.url}?queueID={self.queue_id}&ttw={self.ttw}",
+                       max_retries=1, timeout=self.ttw + 20, use_cache=False)
+
+    def match(self, package: dict) -> Optional[Tuple[dict, dict, int]]:
+        """
+        Turn a package into (kill, kill_detail, corporation_id) when it involves our corporations.
+
+        Packages that no longer embed the killmail are completed from ESI.
+        """
+        killmail_id = package.get('killID')
+        zkb = package.get('zkb', {})
+        kill_detail = package.get('killmail')
+        if not kill_detail and killmail_id and zkb.get('hash'):
+            kill_detail = get_killmail(killmail_id, zkb['hash'])
+        if not kill_detail:
+            logging.warning(f"Could not get details for feed kill {killmail_id}")
+            return None
+
+        victim_corporation = kill_detail.get('victim', {}).get('corporation_id')
+        if victim_corporation in self.corporation_ids:
+            corporation_id = victim_corporation
+        else:
+            matches = involved_corporations(kill_detail) & self.corporation_ids
+            if not matches:
+                return None
+            corporation_id = min(matches)
+        return {'killmail_id': killmail_id or kill_detail.get('killmail_id'), 'zkb': zkb}, kill_detail, corporation_id
+
+    def backoff(self, failures: int) -> float:
+        """Reconnect delay after consecutive failed polls: jittered over the upper half of min(max_backoff, 2^n)."""
+        ceiling = min(self.max_backoff, 2 ** failures)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def stop(self):
+        """Ask listen() to return after the current poll."""
+        self._running = False
+
+    def listen(self, max_packages: Optional[int] = None):
+        """
+        Poll the feed until stop() is called (or max_packages packages were received).
+
+        Args:
+            max_packages (Optional[int]): Stop after this many packages, mainly for testing
+        """
+        self._running = True
+        failures = 0
+        down_since = None
+        logging.info(f"Listening to {self.url} for corporations {sorted(self.corporation_ids)}")
+        while self._running:
+            response = self.poll()
+            if not response:
+                failures += 1
+                down_since = down_since or time.monotonic()
+                wait_time = self.backoff(failures)
+                logging.warning(f"Feed unreachable ({failures} consecutive failures), reconnecting in {wait_time:.1f}s")
+                time.sleep(wait_time)
+                continue
+
+            if down_since is not None:
+                outage = time.monotonic() - down_since
+                logging.info(f"Feed reachable again after {outage:.0f}s")
+                if outage >= self.gap_threshold and self.on_gap:
+                    self.on_gap()
+            failures = 0
+            down_since = None
+
+            package = response.get('package')
+            if not package:
+                continue
+            self.received += 1
+            try:
+                matched = self.match(package)
+                if matched:
+                    self.matched += 1
+                    self.handle_kill(*matched)
+            except Exception as e:
+                logging.error(f"Error handling feed kill {package.get('killID')}: {e}")
+
+            if max_packages is not None and self.received >= max_packages:
+                break
+
+        logging.info(f"Listener stopped: {self.received} packages received, {self.matched} matched")
@@ -0,0 +1,86 @@
+"""In-memory lookups over the SDE tables imported by import_sde.py."""
+import logging
+from typing import Dict, Optional, Tuple
+
+# SDE categories whose types can appear as a killmail victim
+VICTIM_CATEGORIES = (
+    6,   # Ship
+    22,  # Deployable
+    23,  # Starbase
+    40,  # Sovereignty Structures
+    46,  # Orbitals
+    65,  # Structure
+    87,  # Fighter
+)
+
+
+class StaticData:
+    """Type and solar system names resolved without any HTTP call."""
+
+    def __init__(self):
+        self.types: Dict[int, Tuple[str, str]] = {}
+        self.systems: Dict[int, str] = {}
+
+    def load(self, cur) -> 'StaticData':
+        """
+        Load the lookups from the database, leaving them empty if the SDE was never imported.
+
+        Args:
+            cur: psycopg2 cursor
+
+        Returns:
+            StaticData: self
+        """
+        cur.execute("SELECT to_regclass('sde_types') IS NOT NULL, to_regclass('sde_solar_systems') IS NOT NULL")
+        has_types, has_systems = cur.fetchone()
+        if has_types:
+            cur.execute(
+                "SELECT type_id, type_name, group_name FROM sde_types WHERE category_id = ANY(%s)",
+                (list(VICTIM_CATEGORIES),)
+            )
+            self.types = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+        if has_systems:
+            cur.execute("SELECT system_id, system_name FROM sde_solar_systems")
+            self.systems = {row[0]: row[1] for row in cur.fetchall()}
+        if not (has_types or has_systems):
+            logging.info("SDE tables not found, static data will be resolved through ESI (run import_sde.py)")
+        else:
+            logging.info(f"Static data loaded: {len(self.types)} types, {len(self.systems)} solar systems")
+        return self
+
+    def type_name(self, type_id) -> Optional[str]:
+        """Return the name of a type, or None when unknown."""
+        entry = self.types.get(type_id)
+        return entry[0] if entry else None
+
+    def group_name(self, type_id) -> Optional[str]:
+        """Return the group (ship class) name of a type, or None when unknown."""
+        entry = self.types.get(type_id)
+        return entry[1] if entry else None
+
+    def system_name(self, system_id) -> Optional[str]:
+        """Return the name of a solar system, or None when unknown."""
+        return self.systems.get(system_id)
+
+    def name(self, entity_id, entity_type: str) -> Optional[str]:
+        """Return a name for the name-cache entity types covered by the SDE."""
+        if entity_type == 'universe/types':
+            return self.type_name(entity_id)
+        if entity_type == 'universe/systems':
+            return self.system_name(entity_id)
+        return None
+
+
+_static_data = StaticData()
+
+
+def load_static_data(cur) -> StaticData:
+    """Load the process-wide static data from the database."""
+    global _static_data
+    _static_data = StaticData().load(cur)
+    return _static_data
+
+
+def get_static_data() -> StaticData:
+    """Return the process-wide static data (empty until load_static_data is called)."""
+    return _static_data
@@ -0,0 +1,34 @@
+"""Shared fixtures of the unit tests."""
+import pytest
+
+
+class FakeClock:
+    """Stands in for the time module of the code under test, each reading advances by tick seconds."""
+
+    def __init__(self, now: float = 1_000_000.0, tick: float = 1e-6):
+        self.now = now
+        self.tick = tick
+        self.sleeps = []
+
+    def time(self) -> float:
+        self.now += self.tick
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(request, monkeypatch):
+    """
+    FakeClock patched over the `time` global of a module.
+
+    Parametrize it indirectly with the module, e.g.
+    pytestmark = pytest.mark.parametrize('clock', [name_cache], indirect=True, ids=['name_cache'])
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(request.param, 'time', clock)
+    return clock
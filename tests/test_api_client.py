@@ -0,0 +1,47 @@
+"""Tests of the ESI error-limit throttle."""
+import pytest
+
+from src.services import api_client
+from src.services.api_client import ErrorLimitThrottle
+
+
+pytestmark = pytest.mark.parametrize('clock', [api_client], indirect=True, ids=['api_client'])
+
+
+def limit(remain, reset=60):
+    return {'X-Esi-Error-Limit-Remain': str(remain), 'X-Esi-Error-Limit-Reset': str(reset)}
+
+
+def test_no_delay_without_headers_or_above_the_soft_limit(clock):
+    throttle = ErrorLimitThrottle(soft_limit=50, hard_limit=10)
+    assert throttle.delay() == 0
+    throttle.update(limit(80), 200)
+    assert throttle.delay() == 0
+
+
+def test_remaining_budget_is_spread_over_the_window(clock):
+    throttle = ErrorLimitThrottle(soft_limit=50, hard_limit=10)
+    throttle.update(limit(30, reset=60), 200)
+    assert throttle.delay() == pytest.approx(60 / 20)
+    throttle.update(limit(15, reset=60), 200)
+    assert throttle.delay() == pytest.approx(60 / 5)
+
+
+def test_hard_limit_waits_for_the_reset(clock):
+    throttle = ErrorLimitThrottle(soft_limit=50, hard_limit=10)
+    throttle.update(limit(10, reset=30), 400)
+    assert throttle.delay() == pytest.approx(31)
+    clock.now += 30
+    assert throttle.delay() == 0
+
+
+def test_retry_after_blocks_rate_limited_responses(clock):
+    throttle = ErrorLimitThrottle()
+    throttle.update({'Retry-After': '20'}, 200)
+    assert throttle.delay() == 0
+    throttle.update({'Retry-After': '20'}, 429)
+    assert throttle.delay() == pytest.approx(20)
+    throttle.update({'Retry-After': '3600'}, 420)
+    assert throttle.delay() == pytest.approx(300)
+    clock.now += 300
+    assert throttle.delay() == 0
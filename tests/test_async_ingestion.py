@@ -0,0 +1,56 @@
+"""Tests of the async pipeline's per-host rate limiter."""
+import asyncio
+
+import pytest
+
+from src.services import async_ingestion
+from src.services.async_ingestion import TokenBucket
+
+
+pytestmark = pytest.mark.parametrize('clock', [async_ingestion], indirect=True, ids=['async_ingestion'])
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    """Delays passed to asyncio.sleep; each one advances the fake clock instead of waiting."""
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(async_ingestion.asyncio, 'sleep', sleep)
+    return clock.sleeps
+
+
+def test_burst_is_served_immediately(sleeps):
+    async def run():
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert sleeps == []
+
+
+def test_sustained_rate_is_enforced(sleeps):
+    async def run():
+        bucket = TokenBucket(rate=100.0, capacity=5)
+        await asyncio.gather(*(bucket.acquire() for _ in range(25)))
+
+    asyncio.run(run())
+    # 5 tokens of burst, then one wait of 1/100 s for each of the 20 others
+    assert sleeps == [pytest.approx(0.01, abs=1e-4)] * 20
+
+
+def test_tokens_refill_up_to_capacity(clock, sleeps):
+    async def run():
+        bucket = TokenBucket(rate=1000.0, capacity=3)
+        for _ in range(3):
+            await bucket.acquire()
+        clock.now += 0.05  # 50 tokens' worth, capped at 3
+        await bucket.acquire()
+        return bucket._tokens
+
+    assert asyncio.run(run()) == pytest.approx(2)
+    assert sleeps == []
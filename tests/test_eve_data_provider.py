@@ -0,0 +1,65 @@
+"""Tests of the local and bulk ESI name lookups."""
+import pytest
+
+from src.services import eve_data_provider
+from src.services.name_cache import UNKNOWN_NAME, NameCache
+
+
+class NoStaticData:
+    def name(self, entity_id, entity_type):
+        return None
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = NameCache(str(tmp_path / "names.sqlite3"))
+    monkeypatch.setattr(eve_data_provider, 'get_name_cache', lambda: cache)
+    monkeypatch.setattr(eve_data_provider, 'get_static_data', NoStaticData)
+    yield cache
+    cache.close()
+
+
+def test_known_names_leaves_ids_unknown_to_esi_without_a_name(cache):
+    cache.set('characters', 1, "Pilot")
+    cache.set_not_found('characters', [2])
+    names, unresolved = eve_data_provider.known_names({1: 'characters', 2: 'characters', 3: 'characters'})
+    assert names == {1: "Pilot", 2: None}
+    assert unresolved == [3]
+
+
+def test_resolve_entity_names_still_reports_unknown_ids(cache):
+    cache.set_not_found('corporations', [2])
+    assert eve_data_provider.resolve_entity_names({2: 'corporations'}) == {2: UNKNOWN_NAME}
+
+
+class NamesEndpoint:
+    """Stub of POST /universe/names/: rejects a whole batch (404) when it holds an id ESI does not know."""
+
+    def __init__(self, bad_ids):
+        self.bad_ids = set(bad_ids)
+        self.batches = []
+
+    def __call__(self, url, ids, headers=None):
+        self.batches.append(list(ids))
+        if self.bad_ids & set(ids):
+            return {}
+        return [{'id': entity_id, 'name': f"Pilot {entity_id}", 'category': 'character'} for entity_id in ids]
+
+
+def test_names_batch_is_split_until_the_bad_id_is_isolated(cache, monkeypatch):
+    endpoint = NamesEndpoint(bad_ids=[6])
+    monkeypatch.setattr(eve_data_provider, 'post_url', endpoint)
+    ids = list(range(1, 9))
+
+    names = eve_data_provider._post_names_batch(ids, {entity_id: 'characters' for entity_id in ids}, None)
+
+    assert names == {**{entity_id: f"Pilot {entity_id}" for entity_id in ids if entity_id != 6}, 6: UNKNOWN_NAME}
+    assert endpoint.batches == [ids, [1, 2, 3, 4], [5, 6, 7, 8], [5, 6], [5], [6], [7, 8]]
+    assert cache.get('characters', 6) == (True, None)
+    assert cache.get('characters', 5) == (True, "Pilot 5")
+
+
+def test_names_batch_failure_leaves_ids_unresolved(cache, monkeypatch):
+    monkeypatch.setattr(eve_data_provider, 'post_url', lambda url, ids, headers=None: None)
+    assert eve_data_provider._post_names_batch([1, 2], {1: 'characters', 2: 'characters'}, None) == {}
+    assert cache.get('characters', 1) == (False, None)
@@ -0,0 +1,114 @@
+"""Tests of the HTTP response cache and its use by ApiClient."""
+import json
+import os
+
+import pytest
+
+from src.services import http_cache
+from src.services.api_client import ApiClient
+from src.services.http_cache import HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.text = body.decode()
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """Replays canned responses and records the request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        self.sent_headers.append(headers or {})
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+pytestmark = pytest.mark.parametrize('clock', [http_cache], indirect=True, ids=['http_cache'])
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return HttpCache(str(tmp_path / "http.sqlite3"))
+
+
+def client_with(cache, *responses):
+    client = ApiClient(max_retries=1, cache=cache)
+    client.session = FakeSession(*responses)
+    return client
+
+
+URL = "https://esi.evetech.net/latest/universe/systems/30000142/"
+
+
+def test_responses_without_validator_are_not_stored(cache):
+    cache.store(URL, {}, b'{}')
+    assert cache.get(URL) is None
+
+
+def test_not_modified_is_served_from_the_cache(cache):
+    body = b'{"name": "Jita"}'
+    client = client_with(cache,
+                         FakeResponse(200, body, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+                         FakeResponse(304, headers={'Cache-Control': 'max-age=60'}))
+
+    assert client.request_json('GET', URL) == {'name': "Jita"}
+    assert client.request_json('GET', URL) == {'name': "Jita"}
+
+    assert client.session.sent_headers[1] == {'If-None-Match': '"v1"',
+                                              'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert (cache.misses, cache.revalidated, cache.bytes_saved) == (1, 1, len(body))
+    # The 304 carried a max-age: the next request is served without any network call
+    assert cache.get(URL).is_fresh()
+    assert client.request_json('GET', URL) == {'name': "Jita"}
+    assert (cache.fresh_hits, client.requests) == (1, 2)
+
+
+def test_fresh_entry_expires(cache, clock):
+    cache.store(URL, {'Cache-Control': 'max-age=60'}, b'{}')
+    assert cache.get(URL).is_fresh()
+    clock.now += 61
+    assert not cache.get(URL).is_fresh()
+
+
+def test_post_requests_bypass_the_cache(cache):
+    client = client_with(cache, FakeResponse(200, b'[]', {'ETag': '"v1"'}))
+    assert client.request_json('POST', URL, payload=[1]) == []
+    assert cache.get(URL) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    body = os.urandom(1000)
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), max_bytes=2500)
+    for name in ('a', 'b'):
+        cache.store(f"https://host/{name}", {'ETag': name}, body)
+    assert cache.get("https://host/a") is not None  # a becomes the most recently used
+
+    cache.store("https://host/c", {'ETag': 'c'}, body)
+
+    assert cache.get("https://host/b") is None
+    assert cache.get("https://host/a") is not None
+    assert cache.get("https://host/c") is not None
+
+
+def test_stored_size_survives_reopen(tmp_path, clock):
+    body = os.urandom(1000)
+    path = str(tmp_path / "http.sqlite3")
+    cache = HttpCache(path, max_bytes=2500)
+    cache.store("https://host/a", {'ETag': 'a'}, body)
+    cache.store("https://host/b", {'ETag': 'b'}, body)
+
+    reopened = HttpCache(path, max_bytes=2500)
+    reopened.store("https://host/c", {'ETag': 'c'}, body)
+    assert reopened.get("https://host/a") is None
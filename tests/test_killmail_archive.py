@@ -0,0 +1,113 @@
+"""Tests of the local killmail archive."""
+import multiprocessing
+import os
+
+import pytest
+
+from src.services import killmail_archive
+from src.services.killmail_archive import INDEX_HEADER, RECORD_HEADER, KillmailArchive
+
+
+def body(killmail_id):
+    return {'killmail_id': killmail_id, 'attackers': [{'character_id': killmail_id * 7}]}
+
+
+@pytest.fixture
+def small_index(monkeypatch):
+    monkeypatch.setattr(killmail_archive, 'INITIAL_CAPACITY', 16)
+
+
+def test_put_then_get(tmp_path):
+    archive = KillmailArchive(str(tmp_path))
+    assert archive.put(1, body(1))
+    assert not archive.put(1, {'killmail_id': 1, 'changed': True})
+    assert archive.get(1) == body(1)
+    assert archive.get(2) is None
+    assert 1 in archive and 2 not in archive
+    assert (archive.hits, archive.misses, archive.stored) == (1, 1, 1)
+    archive.close()
+
+
+def test_probing_with_colliding_ids(tmp_path, small_index):
+    archive = KillmailArchive(str(tmp_path))
+    # Multiples of the capacity share the low bits; the Fibonacci hash still has to spread or probe them
+    ids = [16 * i for i in range(1, 10)]
+    for killmail_id in ids:
+        archive.put(killmail_id, body(killmail_id))
+    assert archive._capacity == 16
+    assert all(archive.get(killmail_id) == body(killmail_id) for killmail_id in ids)
+    assert archive.get(16 * 11) is None
+    archive.close()
+
+
+def test_index_grows_and_is_reopened(tmp_path, small_index):
+    archive = KillmailArchive(str(tmp_path))
+    for killmail_id in range(1, 101):
+        archive.put(killmail_id, body(killmail_id))
+    assert archive._capacity >= 256
+    assert len(archive) == 100
+    archive.close()
+
+    reopened = KillmailArchive(str(tmp_path))
+    assert len(reopened) == 100
+    assert all(reopened.get(killmail_id) == body(killmail_id) for killmail_id in range(1, 101))
+    reopened.close()
+
+
+def test_segments_roll_over(tmp_path):
+    archive = KillmailArchive(str(tmp_path), segment_bytes=200)
+    for killmail_id in range(1, 21):
+        archive.put(killmail_id, body(killmail_id))
+    assert archive._segment > 0
+    assert all(archive.get(killmail_id) == body(killmail_id) for killmail_id in range(1, 21))
+    archive.close()
+
+
+def test_unindexed_records_are_recovered_and_torn_tail_cut(tmp_path):
+    archive = KillmailArchive(str(tmp_path))
+    archive.put(1, body(1))
+    committed_end = archive._end
+    archive.put(2, body(2))
+    # Simulate a crash after the append of 2 but before it was indexed, then a torn write
+    position, _ = archive._find_slot(2)
+    killmail_archive.INDEX_SLOT.pack_into(archive._index, position, 0, 0, 0, 0)
+    archive._end = committed_end
+    archive._count -= 1
+    archive._write_header()
+    segment = archive._segment_path(archive._segment)
+    archive.close()
+    with open(segment, 'ab') as f:
+        f.write(RECORD_HEADER.pack(3, killmail_archive.CODEC_ZLIB, 500) + b'partial')
+    torn_size = os.path.getsize(segment)
+
+    reopened = KillmailArchive(str(tmp_path))
+    assert reopened.get(2) == body(2)
+    assert reopened.get(3) is None
+    assert os.path.getsize(segment) == reopened._end < torn_size
+    _, _, _, count, _, end = INDEX_HEADER.unpack_from(reopened._index, 0)
+    assert (count, end) == (2, reopened._end)
+    assert reopened.put(3, body(3)) and reopened.get(3) == body(3)
+    reopened.close()
+
+
+def _write_range(path, start):
+    killmail_archive.INITIAL_CAPACITY = 16
+    archive = KillmailArchive(path, segment_bytes=4096)
+    for killmail_id in range(start, 400, 4):
+        archive.put(killmail_id, body(killmail_id))
+    archive.close()
+
+
+def test_concurrent_writer_processes(tmp_path):
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=_write_range, args=(str(tmp_path), start)) for start in range(1, 5)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+        assert writer.exitcode == 0
+
+    archive = KillmailArchive(str(tmp_path), segment_bytes=4096)
+    assert len(archive) == 399
+    assert all(archive.get(killmail_id) == body(killmail_id) for killmail_id in range(1, 400))
+    archive.close()
@@ -0,0 +1,159 @@
+"""Tests of the known-killmails Bloom filter."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.known_killmails import (MIN_CAPACITY, TARGET_FALSE_POSITIVE_RATE, WATERMARK_OVERLAP,
+                                          KnownKillmails)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = None
+
+    def execute(self, query, params=None):
+        self.db.queries.append(query)
+        if 'current_database()' in query:
+            self.result = ('killmails_test',)
+        elif 'reltuples' in query:
+            self.result = (self.db.reltuples, self.db.reltuples < 0)
+        elif 'COUNT(*)' in query:
+            self.result = (len(self.db.rows),)
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeDatabase:
+    """The statements KnownKillmails.load() runs, answered from an in-memory killmails table."""
+
+    def __init__(self, rows, reltuples=None):
+        self.rows = rows
+        self.reltuples = len(rows) if reltuples is None else reltuples
+        self.queries = []
+        self.scans = []
+        self.conn = FakeConnection()
+        self.cur = FakeCursor(self)
+
+    def stream(self, query, params=None, row_type=None):
+        since = params[0] if params else None
+        self.scans.append(since)
+        return (row_type._make(row) for row in self.rows if since is None or row[1] >= since)
+
+
+def stored_rows(count, start=datetime(2025, 1, 1)):
+    return [(killmail_id, start + timedelta(seconds=killmail_id)) for killmail_id in range(1, count + 1)]
+
+
+def filter_for(tmp_path, capacity=None, max_bytes=None):
+    known = KnownKillmails(None, path=str(tmp_path / "known.bin"), max_bytes=max_bytes)
+    known.database = 'killmails_test'
+    if capacity:
+        known._size(capacity)
+    return known
+
+
+def test_false_positive_rate_matches_the_target(tmp_path):
+    known = filter_for(tmp_path, capacity=50000)
+    known.add(range(1, 50001))
+
+    assert all(killmail_id in known for killmail_id in range(1, 50001))
+    false_positives = sum(killmail_id in known for killmail_id in range(10 ** 9, 10 ** 9 + 50000))
+    assert false_positives / 50000 == pytest.approx(TARGET_FALSE_POSITIVE_RATE, abs=0.005)
+    assert known.false_positive_rate == pytest.approx(TARGET_FALSE_POSITIVE_RATE, rel=0.2)
+
+
+def test_readding_ids_does_not_grow_the_count(tmp_path):
+    known = filter_for(tmp_path, capacity=1000)
+    known.add(range(1, 501))
+    known.add(range(1, 501))
+    assert known.count == 500
+
+
+def test_save_and_read_round_trip(tmp_path):
+    known = filter_for(tmp_path, capacity=1000)
+    known.add(range(1, 101))
+    known.watermark = datetime(2025, 1, 2, 3, 4, 5)
+    known._dirty = True
+    known.save()
+
+    loaded = filter_for(tmp_path)
+    assert loaded._read()
+    assert (loaded.bits, loaded.hashes, loaded.count, loaded.watermark) == \
+        (known.bits, known.hashes, 100, datetime(2025, 1, 2, 3, 4, 5))
+    assert loaded._array == known._array
+
+    other_database = filter_for(tmp_path)
+    other_database.database = 'elsewhere'
+    assert not other_database._read()
+    assert not filter_for(tmp_path, max_bytes=known.memory_bytes - 1)._read()
+
+
+def test_concurrent_saves_do_not_share_a_temporary_file(tmp_path, monkeypatch):
+    first, second = filter_for(tmp_path, capacity=1000), filter_for(tmp_path, capacity=1000)
+    first.add(range(1, 11))
+    second.add(range(1, 21))
+    temporaries = []
+    real_replace = os.replace
+
+    def replace(source, target):
+        temporaries.append(source)
+        if len(temporaries) == 1:
+            second.save()  # the other process saves while this one is about to rename
+        real_replace(source, target)
+
+    monkeypatch.setattr(os, 'replace', replace)
+    first.save()
+
+    assert len(set(temporaries)) == 2
+    assert os.listdir(tmp_path) == ["known.bin"]
+    loaded = filter_for(tmp_path)
+    assert loaded._read() and loaded.count == 10
+
+
+def test_load_builds_then_catches_up_from_the_watermark(tmp_path):
+    rows = stored_rows(1000)
+    db = FakeDatabase(rows)
+    known = KnownKillmails(db, path=str(tmp_path / "known.bin")).load()
+    assert db.scans == [None]
+    assert known.count == 1000 and known.watermark == rows[-1][1]
+    assert known.bits >= MIN_CAPACITY * 9
+
+    rows.append((1001, rows[-1][1] + timedelta(seconds=1)))
+    db = FakeDatabase(rows)
+    reloaded = KnownKillmails(db, path=str(tmp_path / "known.bin")).load()
+    assert db.scans == [known.watermark - WATERMARK_OVERLAP]
+    assert 1001 in reloaded
+    # The overlap re-reads stored ids: only the new one is counted
+    assert reloaded.count == 1001
+
+
+def test_unanalyzed_partitions_are_counted(tmp_path):
+    db = FakeDatabase(stored_rows(10), reltuples=-1)
+    KnownKillmails(db, path=str(tmp_path / "known.bin")).load()
+    assert any('COUNT(*)' in query for query in db.queries)
+
+
+def test_rebuild_is_sized_from_at_least_the_saved_count(tmp_path):
+    known = filter_for(tmp_path, capacity=1000)
+    known.add(range(1, 1001))
+    known.count = 300000
+    known.watermark = datetime(2025, 1, 1)
+    known._dirty = True
+    known.save()
+
+    # Saturated file, and statistics that lag behind: the saved count is the floor
+    db = FakeDatabase([], reltuples=0)
+    rebuilt = KnownKillmails(db, path=str(tmp_path / "known.bin")).load()
+    assert db.scans == [None]
+    assert rebuilt.bits >= 300000 * 2 * 9
@@ -0,0 +1,82 @@
+"""Tests of the persistent ESI name cache."""
+import pytest
+
+from src.services import name_cache
+from src.services.name_cache import NEGATIVE_TTL, UNKNOWN_NAME, NameCache
+
+
+pytestmark = pytest.mark.parametrize('clock', [name_cache], indirect=True, ids=['name_cache'])
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = NameCache(str(tmp_path / "names.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_hit_and_miss(cache):
+    assert cache.get('characters', 1) == (False, None)
+    cache.set('characters', 1, "Pilot")
+    assert cache.get('characters', 1) == (True, "Pilot")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_expires_after_its_ttl(cache, clock):
+    cache.set('characters', 1, "Pilot")
+    clock.now += name_cache.ENTITY_TTLS['characters'] - 1
+    assert cache.get('characters', 1) == (True, "Pilot")
+    clock.now += 2
+    assert cache.get('characters', 1) == (False, None)
+
+
+def test_static_entries_never_expire(cache, clock):
+    cache.set('universe/systems', 30000142, "Jita")
+    clock.now += 10 * 365 * 24 * 3600
+    assert cache.get('universe/systems', 30000142) == (True, "Jita")
+    assert cache.purge_expired() == 0
+
+
+def test_not_found_is_cached_for_the_negative_ttl(cache, clock):
+    cache.set_not_found('universe/systems', [1])
+    assert cache.get('universe/systems', 1) == (True, None)
+    assert cache.negative_hits == 1
+    clock.now += NEGATIVE_TTL + 1
+    assert cache.get('universe/systems', 1) == (False, None)
+
+
+def test_negative_ttl_is_capped_by_the_entity_ttl(cache, clock):
+    cache.set_not_found('characters', [1])
+    clock.now += name_cache.ENTITY_TTLS['characters'] + 1
+    assert cache.get('characters', 1) == (False, None)
+
+
+def test_resolve_caches_names_and_404_but_not_failures(cache):
+    calls = []
+
+    def fetch(body):
+        def call():
+            calls.append(body)
+            return body
+        return call
+
+    assert cache.resolve('corporations', 1, fetch({'name': "Corp"})) == "Corp"
+    assert cache.resolve('corporations', 1, fetch({'name': "Other"})) == "Corp"
+    assert cache.resolve('corporations', 2, fetch({})) == UNKNOWN_NAME
+    assert cache.resolve('corporations', 2, fetch({'name': "Late"})) == UNKNOWN_NAME
+    assert cache.resolve('corporations', 3, fetch(None)) == UNKNOWN_NAME
+    assert cache.resolve('corporations', 3, fetch({'name': "Retried"})) == "Retried"
+    assert len(calls) == 4
+
+
+def test_purge_expired_and_persistence(tmp_path, cache, clock):
+    cache.set('characters', 1, "Old")
+    cache.set('corporations', 2, "Kept")
+    clock.now += name_cache.ENTITY_TTLS['characters'] + 1
+    assert cache.purge_expired() == 1
+    cache.close()
+
+    reopened = NameCache(cache.path)
+    assert reopened.get('corporations', 2) == (True, "Kept")
+    assert reopened.get('characters', 1) == (False, None)
+    reopened.close()
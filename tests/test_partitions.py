@@ -0,0 +1,130 @@
+"""Tests of detaching and re-attaching killmail months."""
+import os
+from datetime import date, datetime
+
+import pytest
+
+from src.database.partitions import attach_month, detach_month
+
+MONTH = date(2024, 3, 1)
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self.statements.append(' '.join(query.split()))
+        # Only the attackers partitions carry a foreign key to killmails
+        self._rows = [('killmail_attackers_killmail_id_kill_datetime_fkey',)] \
+            if 'pg_constraint' in query and params[0].startswith('killmail_attackers') else []
+
+    def fetchall(self):
+        return self._rows
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.cur = RecordingCursor()
+        self.conn = self
+        self.committed = False
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def test_detach_drops_the_attackers_foreign_key_before_killmails():
+    db = RecordingConnection()
+    detach_month(db, MONTH)
+    statements = [statement for statement in db.cur.statements if not statement.startswith('SELECT')]
+    assert statements == [
+        'CREATE SCHEMA IF NOT EXISTS archive',
+        'ALTER TABLE killmail_attackers DETACH PARTITION killmail_attackers_y2024m03',
+        'ALTER TABLE killmail_attackers_y2024m03 DROP CONSTRAINT "killmail_attackers_killmail_id_kill_datetime_fkey"',
+        'ALTER TABLE killmail_attackers_y2024m03 SET SCHEMA archive',
+        'ALTER TABLE killmails DETACH PARTITION killmails_y2024m03',
+        'ALTER TABLE killmails_y2024m03 SET SCHEMA archive',
+    ]
+    assert db.committed
+
+
+def test_attach_restores_killmails_before_attackers():
+    db = RecordingConnection()
+    attach_month(db, MONTH)
+    assert [statement.split(' PARTITION ')[0] for statement in db.cur.statements if 'ATTACH' in statement] == [
+        'ALTER TABLE killmails ATTACH',
+        'ALTER TABLE killmail_attackers ATTACH',
+    ]
+
+
+# Round trip on a real server: TEST_DATABASE_URL must point to a disposable database without killmails
+# tables (the test creates them in public and drops them)
+@pytest.fixture
+def database():
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    import psycopg2
+
+    conn = psycopg2.connect(url)
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('killmails') IS NOT NULL OR to_regclass('killmail_attackers') IS NOT NULL")
+    if cur.fetchone()[0]:
+        conn.close()
+        pytest.skip("TEST_DATABASE_URL already holds killmails tables")
+    cur.execute("""
+        CREATE TABLE killmails (
+            killmail_id BIGINT NOT NULL,
+            kill_datetime TIMESTAMP NOT NULL,
+            PRIMARY KEY (killmail_id, kill_datetime)
+        ) PARTITION BY RANGE (kill_datetime);
+        CREATE TABLE killmail_attackers (
+            killmail_id BIGINT NOT NULL,
+            kill_datetime TIMESTAMP NOT NULL,
+            FOREIGN KEY (killmail_id, kill_datetime) REFERENCES killmails (killmail_id, kill_datetime)
+                ON DELETE CASCADE
+        ) PARTITION BY RANGE (kill_datetime);
+        CREATE TABLE killmails_y2024m03 PARTITION OF killmails FOR VALUES FROM ('2024-03-01') TO ('2024-04-01');
+        CREATE TABLE killmail_attackers_y2024m03 PARTITION OF killmail_attackers
+            FOR VALUES FROM ('2024-03-01') TO ('2024-04-01');
+    """)
+    cur.execute("INSERT INTO killmails VALUES (1, %s)", (datetime(2024, 3, 5),))
+    cur.execute("INSERT INTO killmail_attackers VALUES (1, %s), (1, %s)", (datetime(2024, 3, 5),) * 2)
+    conn.commit()
+
+    class Database:
+        pass
+
+    db = Database()
+    db.conn, db.cur = conn, cur
+    yield db
+    conn.rollback()
+    cur.execute("""
+        DROP TABLE IF EXISTS killmail_attackers, killmails, archive.killmail_attackers_y2024m03,
+            archive.killmails_y2024m03
+    """)
+    conn.commit()
+    conn.close()
+
+
+def test_detach_then_attach_a_month_with_attackers(database):
+    detach_month(database, MONTH)
+    database.cur.execute("SELECT COUNT(*) FROM archive.killmail_attackers_y2024m03")
+    assert database.cur.fetchone()[0] == 2
+    database.cur.execute("SELECT COUNT(*) FROM killmails")
+    assert database.cur.fetchone()[0] == 0
+    database.conn.commit()
+
+    attach_month(database, MONTH)
+    database.cur.execute("""
+        SELECT COUNT(*) FROM pg_constraint
+        WHERE conrelid = 'killmail_attackers_y2024m03'::regclass AND contype = 'f'
+    """)
+    assert database.cur.fetchone()[0] == 1
+    database.cur.execute("SELECT COUNT(*) FROM killmail_attackers JOIN killmails USING (killmail_id, kill_datetime)")
+    assert database.cur.fetchone()[0] == 2
+    database.conn.commit()
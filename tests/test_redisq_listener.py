@@ -0,0 +1,76 @@
+"""Tests of the RedisQ listener's corporation filter and reconnect loop."""
+import pytest
+
+from src.services import redisq_listener
+from src.services.redisq_listener import RedisQListener
+
+OURS = 98000001
+
+
+def listener(**kwargs):
+    return RedisQListener('test-queue', [OURS, 98000002], handle_kill=lambda *args: None, **kwargs)
+
+
+def package(victim_corporation, attacker_corporations=(), embedded=True):
+    kill_detail = {
+        'killmail_id': 1,
+        'victim': {'corporation_id': victim_corporation},
+        'attackers': [{'corporation_id': corporation_id} for corporation_id in attacker_corporations],
+    }
+    result = {'killID': 1, 'zkb': {'hash': 'abc', 'totalValue': 10.0}}
+    if embedded:
+        result['killmail'] = kill_detail
+    return result, kill_detail
+
+
+def test_match_keeps_our_losses():
+    feed_package, kill_detail = package(OURS, [123, 98000002])
+    assert listener().match(feed_package) == ({'killmail_id': 1, 'zkb': feed_package['zkb']}, kill_detail, OURS)
+
+
+def test_match_keeps_our_kills_by_attacker_corporation():
+    feed_package, kill_detail = package(123, [None, 98000002, OURS])
+    assert listener().match(feed_package)[2] == OURS  # lowest of our corporations on the killmail
+
+
+def test_match_drops_kills_without_our_corporations():
+    assert listener().match(package(123, [456, None])[0]) is None
+
+
+def test_match_completes_packages_without_killmail_from_esi(monkeypatch):
+    feed_package, kill_detail = package(OURS, embedded=False)
+    fetched = []
+    monkeypatch.setattr(redisq_listener, 'get_killmail',
+                        lambda killmail_id, kill_hash: fetched.append((killmail_id, kill_hash)) or kill_detail)
+    assert listener().match(feed_package)[1] == kill_detail
+    assert fetched == [(1, 'abc')]
+
+    monkeypatch.setattr(redisq_listener, 'get_killmail', lambda killmail_id, kill_hash: None)
+    assert listener().match(feed_package) is None
+
+
+def test_backoff_doubles_and_stops_at_the_cap(monkeypatch):
+    monkeypatch.setattr(redisq_listener.random, 'uniform', lambda low, high: high)
+    delays = [listener(max_backoff=60).backoff(failures) for failures in range(1, 9)]
+    assert delays == [2, 4, 8, 16, 32, 60, 60, 60]
+
+    monkeypatch.setattr(redisq_listener.random, 'uniform', lambda low, high: low)
+    assert listener(max_backoff=60).backoff(8) == 30
+
+
+@pytest.mark.parametrize('clock', [redisq_listener], indirect=True, ids=['redisq_listener'])
+def test_listen_backs_off_then_backfills_after_a_long_outage(clock, monkeypatch):
+    monkeypatch.setattr(redisq_listener.random, 'uniform', lambda low, high: high)
+    feed_package, kill_detail = package(OURS)
+    responses = [None] * 9 + [{'package': None}, {'package': feed_package}]
+    handled, gaps = [], []
+    feed = listener(max_backoff=60, gap_threshold=300, on_gap=lambda: gaps.append(clock.now))
+    feed.handle_kill = lambda *matched: handled.append(matched)
+    feed.poll = lambda: responses.pop(0)
+
+    feed.listen(max_packages=1)
+
+    assert clock.sleeps == [2, 4, 8, 16, 32, 60, 60, 60, 60]
+    assert len(gaps) == 1
+    assert handled == [({'killmail_id': 1, 'zkb': feed_package['zkb']}, kill_detail, OURS)]
+    assert (feed.received, feed.matched) == (1, 1)
@@ -0,0 +1,45 @@
+"""Tests of the tracker's retry schedule."""
+from src.database.repositories.tracker_repository import (
+    MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, TrackerRepository, retry_delay,
+)
+
+
+class RecordingDatabase:
+    """Applies tracker_mark_failed the way the SQL does, to one row's attempts counter."""
+
+    def __init__(self):
+        self.conn = self
+        self.cur = None
+        self.attempts = 0
+        self.delays = []
+
+    def execute_prepared(self, name, query, params=None):
+        assert name == 'tracker_mark_failed'
+        error_message, schedule, cap, killmail_id = params
+        # COALESCE((schedule)[attempts + 1], cap): Postgres arrays are 1-based and NULL past the end
+        self.delays.append(schedule[self.attempts] if self.attempts < len(schedule) else cap)
+        self.attempts += 1
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_retry_delay_doubles_then_stops_at_the_cap():
+    delays = [retry_delay(attempts) for attempts in range(MAX_ATTEMPTS)]
+    assert delays[:4] == [RETRY_BASE_SECONDS, 2 * RETRY_BASE_SECONDS, 4 * RETRY_BASE_SECONDS, 8 * RETRY_BASE_SECONDS]
+    assert all(later >= earlier for earlier, later in zip(delays, delays[1:]))
+    assert delays[-1] < RETRY_MAX_SECONDS
+    assert [retry_delay(attempts) for attempts in (11, 12, 50)] == [RETRY_MAX_SECONDS] * 3
+
+
+def test_mark_failed_pushes_the_next_attempt_back_until_the_cap():
+    db = RecordingDatabase()
+    tracker = TrackerRepository(db)
+    for _ in range(MAX_ATTEMPTS + 2):
+        tracker.mark_failed(1, "Could not get killmail details from ESI")
+    assert db.delays == [retry_delay(attempts) for attempts in range(MAX_ATTEMPTS)] + [RETRY_MAX_SECONDS] * 2
+    assert db.delays[1] > db.delays[0]
+    assert max(db.delays) == RETRY_MAX_SECONDS
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Fill a local database with a synthetic, reproducible killmail history for load and scale testing.
+
+Creates pilots (every character of PLAYER_DATA in our corporation, plus
+other pilots), corporations, systems and a ship mix including Ishtars and
+Mobile Tractor Units, then loads killmails and attackers with COPY, in
+chunks. Attacker counts follow a power law, kills are spread over several
+years with more recent activity, and the daily rollup is rebuilt at the end.
+The same --seed and --end always produce the same rows.
+
+Run it against a scratch database (DB_NAME=zkill_synthetic, migrations
+applied with migrate.py), never against production data:
+
+    python tools/generate_synthetic_data.py --kills 1000000 --seed 42 --end 2025-06-01
+"""
+import argparse
+import csv
+import io
+import itertools
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values  # noqa: E402
+
+from ishtar_ranking_generator import parse_player_data  # noqa: E402
+from src.database import DatabaseConnection  # noqa: E402
+from src.database.batch_writer import ATTACKER_COLUMNS, KILLMAIL_COLUMNS  # noqa: E402
+from src.database.rollups import rebuild_rollups  # noqa: E402
+from src.services.name_cache import UNKNOWN_NAME  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+OUR_CORPORATION_NAME = "Goat to Go"
+# Synthetic ids live far above the ESI ranges of real entities and kills
+FIRST_KILLMAIL_ID = 10 ** 12
+FIRST_SYSTEM_ID = 39000001
+FIRST_PILOT_ID = 3900000001
+FIRST_CORPORATION_ID = 3800000001
+
+# (type id, hull, ship class, weight among all kills, weight among our losses, median value in ISK)
+SHIP_MIX = [
+    (12005, 'Ishtar', 'Heavy Assault Cruiser', 3, 25, 250e6),
+    (33475, 'Mobile Tractor Unit', 'Mobile Tractor Unit', 2, 15, 1.5e6),
+    (670, 'Capsule', 'Capsule', 20, 20, 1e4),
+    (17843, 'Vexor Navy Issue', 'Cruiser', 5, 5, 80e6),
+    (17715, 'Gila', 'Cruiser', 3, 3, 300e6),
+    (587, 'Rifter', 'Frigate', 8, 2, 2e6),
+    (16240, 'Catalyst', 'Destroyer', 8, 1, 3e6),
+    (24698, 'Drake', 'Combat Battlecruiser', 6, 4, 60e6),
+    (29984, 'Tengu', 'Strategic Cruiser', 2, 2, 800e6),
+    (32880, 'Venture', 'Frigate', 6, 6, 1.5e6),
+    (17480, 'Procurer', 'Mining Barge', 3, 4, 40e6),
+    (33474, 'Mobile Depot', 'Mobile Depot', 3, 3, 2e6),
+    (638, 'Raven', 'Battleship', 2, 1, 250e6),
+    (657, 'Iteron Mark V', 'Industrial', 4, 3, 10e6),
+    (28606, 'Orca', 'Industrial Command Ship', 1, 1, 1.5e9),
+]
+NPC_ATTACKER_SHARE = 0.05
+
+
+def zipf_weights(count: int, exponent: float = 1.1):
+    """Cumulative weights of a Zipf law over count ranks (a few very active pilots, a long tail)."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def upsert_dimension(db, table, id_column, columns, rows):
+    """Insert rows keyed by esi_id (first column) and return esi_id -> row id."""
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns[1:])
+    result = execute_values(db.cur, f"""
+        INSERT INTO {table} ({', '.join(columns)}) VALUES %s
+        ON CONFLICT (esi_id) DO UPDATE SET {updates}
+        RETURNING esi_id, {id_column}
+    """, rows, page_size=1000, fetch=True)
+    return {esi_id: row_id for esi_id, row_id in result}
+
+
+class SyntheticHistory:
+    """Deterministic generator of dimension rows, killmails and attackers for one seed."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.end = datetime.combine(args.end, datetime.min.time())
+        self.start = self.end - timedelta(days=round(365.25 * args.years))
+
+    def load_dimensions(self, db):
+        """Create the reference rows and keep their database ids."""
+        rng = self.rng
+        corporation_esi_id = int(os.getenv('CORPORATION_ID', 98730717))
+        corporations = [(corporation_esi_id, OUR_CORPORATION_NAME)] + [
+            (FIRST_CORPORATION_ID + i, f"Synthetic Corporation {i}") for i in range(self.args.corporations)]
+
+        _, player_info = parse_player_data()
+        our_names = [name for info in player_info.values() for name in info['all_characters']]
+        other_names = [f"Synthetic Pilot {i}" for i in range(self.args.pilots)]
+        pilots = [(FIRST_PILOT_ID + i, name) for i, name in enumerate(our_names + other_names)]
+
+        systems = [(FIRST_SYSTEM_ID + i, f"SYN-{i:04d}") for i in range(self.args.systems)]
+
+        try:
+            execute_values(db.cur, "INSERT INTO ship_types (type_name) VALUES %s ON CONFLICT (type_name) DO NOTHING",
+                           sorted({(ship_class,) for _, _, ship_class, _, _, _ in SHIP_MIX}))
+            db.cur.execute("SELECT type_name, ship_type_id FROM ship_types")
+            classes = dict(db.cur.fetchall())
+            self.ships = upsert_dimension(db, 'ships', 'ship_id', ('esi_id', 'ship_name', 'ship_type_id'), [
+                (type_id, name, classes[ship_class]) for type_id, name, ship_class, _, _, _ in SHIP_MIX])
+            self.corporations = upsert_dimension(db, 'corporations', 'corporation_id',
+                                                 ('esi_id', 'corporation_name'), corporations)
+            pilot_ids = upsert_dimension(db, 'pilots', 'pilot_id', ('esi_id', 'pilot_name'), pilots)
+            self.systems = list(upsert_dimension(db, 'systems', 'system_id', ('esi_id', 'system_name'),
+                                                 systems).values())
+            db.conn.commit()
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"Error creating synthetic dimensions: {e}")
+            raise
+
+        self.our_corporation = self.corporations[corporation_esi_id]
+        self.other_corporations = [self.corporations[esi_id] for esi_id, _ in corporations[1:]]
+        # (pilot row id, name); alts of PLAYER_DATA come first and are all in our corporation
+        self.our_pilots = [(pilot_ids[esi_id], name) for esi_id, name in pilots[:len(our_names)]]
+        self.other_pilots = [(pilot_ids[esi_id], name) for esi_id, name in pilots[len(our_names):]]
+        rng.shuffle(self.our_pilots)
+        rng.shuffle(self.other_pilots)
+        self.our_weights = zipf_weights(len(self.our_pilots))
+        self.other_weights = zipf_weights(len(self.other_pilots))
+        self.ship_weights = list(itertools.accumulate(weight for _, _, _, weight, _, _ in SHIP_MIX))
+        self.loss_weights = list(itertools.accumulate(weight for _, _, _, _, weight, _ in SHIP_MIX))
+        logging.info(f"Dimensions: {len(self.our_pilots)} PLAYER_DATA characters, {len(self.other_pilots)} other "
+                     f"pilots, {len(corporations)} corporations, {len(systems)} systems, {len(SHIP_MIX)} hulls")
+
+    def kill_time(self, index: int) -> datetime:
+        # Increasing with the killmail id, denser towards the end (activity grows over the years)
+        position = (index + self.rng.random()) / self.args.kills
+        return self.start + (self.end - self.start) * position ** (1 / (1 + self.args.growth))
+
+    def pick_pilot(self, ours: bool):
+        pilots, weights = (self.our_pilots, self.our_weights) if ours else (self.other_pilots, self.other_weights)
+        return self.rng.choices(pilots, cum_weights=weights)[0]
+
+    def attacker_count(self) -> int:
+        # Pareto tail: mostly small gangs, occasionally hundreds of pilots on one kill
+        return min(int(self.rng.paretovariate(self.args.attacker_alpha)), self.args.max_attackers)
+
+    def kill(self, index: int):
+        """Return the killmail row and the attacker rows of kill number index."""
+        rng = self.rng
+        killmail_id = FIRST_KILLMAIL_ID + index
+        kill_datetime = self.kill_time(index)
+        loss = rng.random() < self.args.loss_share
+        type_id, _, _, _, _, median = rng.choices(SHIP_MIX, cum_weights=self.loss_weights if loss
+                                                  else self.ship_weights)[0]
+        victim_id, _ = self.pick_pilot(ours=loss)
+        killmail_row = (
+            killmail_id, f"{rng.getrandbits(160):040x}", kill_datetime, rng.choice(self.systems), victim_id,
+            self.ships[type_id], round(median * rng.lognormvariate(0, 0.6), 2), 'LOSS' if loss else 'KILL',
+            self.our_corporation if loss else rng.choice(self.other_corporations)
+        )
+
+        attacker_rows = []
+        for position in range(self.attacker_count()):
+            if rng.random() < NPC_ATTACKER_SHARE:
+                pilot_id, pilot_name, corporation_id = None, UNKNOWN_NAME, None
+            else:
+                # Our kills have our pilots on the killmail, mostly as a gang of alts
+                ours = not loss and (position == 0 or rng.random() < 0.7)
+                pilot_id, pilot_name = self.pick_pilot(ours)
+                corporation_id = self.our_corporation if ours else rng.choice(self.other_corporations)
+            attacker_rows.append((killmail_id, kill_datetime, position, pilot_id, pilot_name, corporation_id,
+                                  position == 0, rng.randint(0, 50000)))
+        return killmail_row, attacker_rows
+
+
+def copy_rows(db, table, columns, rows, force_not_null=()):
+    data = io.StringIO()
+    writer = csv.writer(data)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    data.seek(0)
+    options = f", FORCE_NOT_NULL ({', '.join(force_not_null)})" if force_not_null else ""
+    db.cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv{options})", data)
+
+
+def load_kills(db, history: SyntheticHistory, args):
+    db.cur.execute("SELECT create_killmail_partitions(%s, %s)", (history.start.date(), history.end.date()))
+    db.conn.commit()
+
+    started = time.monotonic()
+    attackers_loaded = 0
+    for chunk_start in range(0, args.kills, args.chunk):
+        killmails, attackers = [], []
+        for index in range(chunk_start, min(chunk_start + args.chunk, args.kills)):
+            killmail_row, attacker_rows = history.kill(index)
+            killmails.append(killmail_row)
+            attackers.extend(attacker_rows)
+        try:
+            copy_rows(db, 'killmails', KILLMAIL_COLUMNS, killmails)
+            copy_rows(db, 'killmail_attackers', ATTACKER_COLUMNS, attackers, force_not_null=('pilot_name',))
+            db.conn.commit()
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"Error loading synthetic kills {chunk_start}-{chunk_start + len(killmails)}: {e}")
+            raise
+        attackers_loaded += len(attackers)
+        loaded = chunk_start + len(killmails)
+        elapsed = time.monotonic() - started
+        logging.info(f"{loaded}/{args.kills} kills, {attackers_loaded} attackers "
+                     f"({loaded / elapsed if elapsed else 0:.0f} kills/s)")
+    return attackers_loaded
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kills', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=date.fromisoformat, default=date.today(),
+                        help='Date of the last kill, YYYY-MM-DD (default: today; fix it for identical datasets)')
+    parser.add_argument('--years', type=float, default=3, help='Length of the history')
+    parser.add_argument('--growth', type=float, default=1.0,
+                        help='0: flat activity, higher: more kills in recent months')
+    parser.add_argument('--pilots', type=int, default=20000, help='Pilots outside PLAYER_DATA')
+    parser.add_argument('--corporations', type=int, default=500, help='Corporations besides ours')
+    parser.add_argument('--systems', type=int, default=300)
+    parser.add_argument('--loss-share', type=float, default=0.3, help='Share of kills where we are the victim')
+    parser.add_argument('--attacker-alpha', type=float, default=1.2,
+                        help='Pareto exponent of the attacker count (lower: heavier tail)')
+    parser.add_argument('--max-attackers', type=int, default=500)
+    parser.add_argument('--chunk', type=int, default=50000, help='Kills per COPY and transaction')
+    parser.add_argument('--force', action='store_true', help='Load even if killmails is not empty')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    history = SyntheticHistory(args)
+    with DatabaseConnection() as db:
+        db.cur.execute("SELECT EXISTS (SELECT 1 FROM killmails)")
+        if db.cur.fetchone()[0] and not args.force:
+            db.conn.commit()
+            logging.error("killmails is not empty: run this on a scratch database (or pass --force)")
+            sys.exit(1)
+        db.conn.commit()
+
+        logging.info(f"Generating {args.kills} kills from {history.start:%Y-%m-%d} to {history.end:%Y-%m-%d} "
+                     f"(seed {args.seed})")
+        history.load_dimensions(db)
+        attackers = load_kills(db, history, args)
+        rebuild_rollups(db)
+        db.cur.execute("ANALYZE killmails")
+        db.cur.execute("ANALYZE killmail_attackers")
+        db.conn.commit()
+        logging.info(f"Synthetic history loaded: {args.kills} kills, {attackers} attackers "
+                     f"({attackers / max(args.kills, 1):.1f} per kill)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the zKillboard RedisQ feed, to exercise main.py --listen offline.
+
+GET  /listen.php?queueID=...&ttw=N  returns the next package, or {"package": null} after N seconds
+POST /push                          queues one package (or a JSON list of packages)
+
+Example:
+    python tools/redisq_standin.py --port 8090 --packages packages.json
+    python main.py --listen --redisq-url http://127.0.0.1:8090/listen.php
+"""
+
+import argparse
+import json
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+packages = deque()
+available = threading.Condition()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != '/listen.php':
+            self.send_json(404, {'error': 'not found'})
+            return
+        ttw = min(int(parse_qs(parsed.query).get('ttw', ['10'])[0]), 10)
+        with available:
+            available.wait_for(lambda: packages, timeout=ttw)
+            package = packages.popleft() if packages else None
+        self.send_json(200, {'package': package})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/push':
+            self.send_json(404, {'error': 'not found'})
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        queued = payload if isinstance(payload, list) else [payload]
+        with available:
+            packages.extend(queued)
+            available.notify_all()
+        self.send_json(200, {'queued': len(queued)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local RedisQ stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--packages', help='JSON file with a list of RedisQ packages served first')
+    args = parser.parse_args()
+
+    if args.packages:
+        with open(args.packages, encoding='utf-8') as f:
+            packages.extend(json.load(f))
+
+    server = ThreadingHTTPServer((args.host, args.port), FeedHandler)
+    logging.info(f"RedisQ stand-in listening on http://{args.host}:{args.port}/listen.php "
+                 f"({len(packages)} packages queued)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()